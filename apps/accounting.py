@@ -0,0 +1,387 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+from uuid import UUID
+
+import msgspec
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, get_buffer_string
+from langchain_core.outputs import ChatGeneration, Generation, LLMResult
+from msgspec import Struct
+
+from apps.settings import CONFIG
+from apps.utils import count_tokens
+
+
+class Usage(Struct):
+    llm_calls: int = 0
+    tool_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # 가격을 알 수 없는 모델의 비용은 포함하지 않습니다.
+    cost: float = 0.0
+    # 호출 시간의 합계입니다. 동시에 실행된 호출은 겹쳐서 더해집니다.
+    llm_seconds: float = 0.0
+    tool_seconds: float = 0.0
+    # 응답에 사용량이 없어 토큰 수를 직접 센 호출 수입니다.
+    estimated_calls: int = 0
+
+    def add(self, other: "Usage"):
+        for field in other.__struct_fields__:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def render(self) -> str:
+        line = (
+            f"{self.llm_calls} LLM calls, {self.tool_calls} tool calls, "
+            f"{self.input_tokens} input / {self.output_tokens} output tokens, "
+            f"${self.cost:.4f}, LLM {self.llm_seconds:.1f}s, "
+            f"tools {self.tool_seconds:.1f}s"
+        )
+        if self.estimated_calls:
+            line += f" ({self.estimated_calls} calls estimated)"
+        return line
+
+
+class OperationUsage(Usage):
+    # operation의 실제 경과 시간입니다.
+    wall_seconds: float = 0.0
+
+
+class Routing(Struct):
+    """Agent steps that a planner model took instead of the writer model."""
+
+    planner: str
+    writer: str
+    # planner가 도구를 골라 writer를 호출하지 않은 단계 수입니다.
+    steps: int = 0
+    # planner가 답하려고 해서 writer에게 다시 보낸 단계 수입니다.
+    escalations: int = 0
+
+    def render(self, models: dict[str, Usage]) -> str:
+        line = (
+            f"Routed {self.steps} tool steps to {self.planner} instead of "
+            f"{self.writer}, {self.escalations} escalated"
+        )
+        planner, writer = models.get(self.planner), models.get(self.writer)
+        if not (planner and planner.llm_calls and writer and writer.llm_calls):
+            return line
+        # writer가 같은 단계를 planner 호출의 평균 토큰으로 처리했다고 가정합니다.
+        latency = self.steps * (
+            writer.llm_seconds / writer.llm_calls
+            - planner.llm_seconds / planner.llm_calls
+        )
+        input_tokens = self.steps * planner.input_tokens // planner.llm_calls
+        output_tokens = self.steps * planner.output_tokens // planner.llm_calls
+        cost = estimate_cost(
+            self.writer, input_tokens, output_tokens
+        ) - estimate_cost(self.planner, input_tokens, output_tokens)
+        return (
+            f"{line}: {input_tokens} input tokens, ~{latency:.1f}s and "
+            f"${cost:.4f} saved"
+        )
+
+
+class RunReport(Struct):
+    started_at: datetime
+    wall_seconds: float
+    total: Usage
+    operations: dict[str, OperationUsage]
+    pages: dict[str, Usage]
+    models: dict[str, Usage]
+    routing: list[Routing]
+    unpriced_models: list[str]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """
+    Estimates the cost in USD from CONFIG["pricing"], or 0 if the model has
+    no price.
+    """
+    price = CONFIG["pricing"].get(model.rpartition("/")[2])
+    if price is None:
+        return 0.0
+    return (
+        input_tokens * price["input"] + output_tokens * price["output"]
+    ) / 1_000_000
+
+
+class RunAccounting:
+    """
+    Aggregates the tokens, cost, time and steps of one pipeline run per
+    operation, page and model.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._usage: defaultdict[tuple[str, str | None, str | None], Usage] = (
+            defaultdict(Usage)
+        )
+        self._wall_seconds: defaultdict[str, float] = defaultdict(float)
+        self._routing: dict[tuple[str, str], Routing] = {}
+        self._unpriced: set[str] = set()
+
+    @contextmanager
+    def activate(self) -> Iterator["RunAccounting"]:
+        token = _run.set(self)
+        try:
+            yield self
+        finally:
+            _run.reset(token)
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[None]:
+        token = _operation.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._wall_seconds[name] += time.perf_counter() - start
+            _operation.reset(token)
+
+    def record_llm(
+        self,
+        operation: str,
+        page: str | None,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        seconds: float,
+        estimated: bool = False,
+    ):
+        if model.rpartition("/")[2] not in CONFIG["pricing"]:
+            self._unpriced.add(model)
+        usage = self._usage[(operation, page, model)]
+        usage.llm_calls += 1
+        usage.input_tokens += input_tokens
+        usage.output_tokens += output_tokens
+        usage.cost += estimate_cost(model, input_tokens, output_tokens)
+        usage.llm_seconds += seconds
+        usage.estimated_calls += estimated
+
+    def record_tool(self, operation: str, page: str | None, seconds: float):
+        usage = self._usage[(operation, page, None)]
+        usage.tool_calls += 1
+        usage.tool_seconds += seconds
+
+    def record_routing(self, planner: str, writer: str, escalated: bool):
+        key = (planner, writer)
+        routing = self._routing.setdefault(key, Routing(*key))
+        if escalated:
+            routing.escalations += 1
+        else:
+            routing.steps += 1
+
+    def report(self) -> RunReport:
+        total = Usage()
+        operations: defaultdict[str, OperationUsage] = defaultdict(
+            OperationUsage
+        )
+        pages: defaultdict[str, Usage] = defaultdict(Usage)
+        models: defaultdict[str, Usage] = defaultdict(Usage)
+        for (operation, page, model), usage in self._usage.items():
+            total.add(usage)
+            operations[operation].add(usage)
+            if page is not None:
+                pages[page].add(usage)
+            if model is not None:
+                models[model].add(usage)
+        for operation, seconds in self._wall_seconds.items():
+            operations[operation].wall_seconds = seconds
+        return RunReport(
+            started_at=self.started_at,
+            wall_seconds=time.perf_counter() - self._start,
+            total=total,
+            operations=dict(operations),
+            pages=dict(pages),
+            models=dict(models),
+            routing=list(self._routing.values()),
+            unpriced_models=sorted(self._unpriced),
+        )
+
+    def summary(self) -> str:
+        report = self.report()
+        lines = [
+            f"Run finished in {report.wall_seconds:.1f}s: "
+            f"{report.total.render()}"
+        ]
+        for name, usage in report.operations.items():
+            if usage.llm_calls or usage.tool_calls:
+                lines.append(
+                    f"  {name} ({usage.wall_seconds:.1f}s): {usage.render()}"
+                )
+        for name, usage in report.models.items():
+            lines.append(f"  {name}: {usage.render()}")
+        for routing in report.routing:
+            lines.append(f"  {routing.render(report.models)}")
+        if report.unpriced_models:
+            lines.append(
+                f"  No pricing for {', '.join(report.unpriced_models)}"
+            )
+        return "\n".join(lines)
+
+    def write(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(
+            msgspec.json.format(msgspec.json.encode(self.report()), indent=2)
+        )
+
+
+_run: ContextVar[RunAccounting | None] = ContextVar("run", default=None)
+_operation: ContextVar[str] = ContextVar("operation", default="-")
+_page: ContextVar[str | None] = ContextVar("page", default=None)
+
+
+@contextmanager
+def page_scope(page: str) -> Iterator[None]:
+    """Attributes the model and tool calls inside the block to `page`."""
+    token = _page.set(page)
+    try:
+        yield
+    finally:
+        _page.reset(token)
+
+
+def record_routing(planner: str, writer: str, escalated: bool):
+    """
+    Records a step that an agent sent to its planner model into the current
+    run. Tokens and latency of the call itself are recorded by the callbacks.
+    """
+    accounting = _run.get()
+    if accounting is not None:
+        accounting.record_routing(planner, writer, escalated)
+
+
+def _generated_text(generation: Generation) -> str:
+    """Text of a generation including the arguments of its tool calls."""
+    message = getattr(generation, "message", None)
+    if not isinstance(message, AIMessage) or not message.tool_calls:
+        return generation.text
+    return generation.text + "".join(
+        tool_call["name"] + json.dumps(tool_call["args"])
+        for tool_call in message.tool_calls
+    )
+
+
+class AccountingCallbackHandler(BaseCallbackHandler):
+    """
+    Records chat model and tool calls into a `RunAccounting`, attributed to
+    the operation and page that were current when the handler was created.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self, accounting: RunAccounting, operation: str, page: str | None
+    ):
+        self.accounting = accounting
+        self.operation = operation
+        self.page = page
+        self._starts: dict[UUID, tuple[float, str]] = {}
+        # 사용량이 없는 응답의 입력 토큰을 세기 위해 요청을 보관합니다.
+        self._messages: dict[UUID, Any] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        invocation_params: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ):
+        params = invocation_params or {}
+        model = (
+            (metadata or {}).get("ls_model_name")
+            or params.get("model_name")
+            or params.get("model")
+            or (serialized or {}).get("name", "unknown")
+        )
+        self._starts[run_id] = (time.perf_counter(), str(model))
+        self._messages[run_id] = messages
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        if run_id not in self._starts:
+            return
+        start, model = self._starts.pop(run_id)
+        messages = self._messages.pop(run_id, [])
+        seconds = time.perf_counter() - start
+        input_tokens = output_tokens = 0
+        reported = False
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if (
+                    isinstance(generation, ChatGeneration)
+                    and isinstance(message, AIMessage)
+                    and message.usage_metadata
+                ):
+                    input_tokens += message.usage_metadata["input_tokens"]
+                    output_tokens += message.usage_metadata["output_tokens"]
+                    reported = True
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        if not reported and token_usage:
+            input_tokens = token_usage.get("prompt_tokens", 0)
+            output_tokens = token_usage.get("completion_tokens", 0)
+            reported = True
+        if not reported:
+            # 스트리밍 응답에 사용량이 없으면 요청과 응답의 토큰을 셉니다.
+            input_tokens = sum(
+                count_tokens(get_buffer_string(batch)) for batch in messages
+            )
+            output_tokens = sum(
+                count_tokens(_generated_text(generation))
+                for generations in response.generations
+                for generation in generations
+            )
+        self.accounting.record_llm(
+            self.operation,
+            self.page,
+            model,
+            input_tokens,
+            output_tokens,
+            seconds,
+            estimated=not reported,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._starts.pop(run_id, None)
+        self._messages.pop(run_id, None)
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs,
+    ):
+        self._starts[run_id] = (time.perf_counter(), "")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        if run_id in self._starts:
+            start, _ = self._starts.pop(run_id)
+            self.accounting.record_tool(
+                self.operation, self.page, time.perf_counter() - start
+            )
+
+    on_tool_error = on_tool_end  # type: ignore
+
+
+def run_callbacks() -> list[BaseCallbackHandler]:
+    """
+    Returns the callbacks that record calls into the current run, or an
+    empty list outside of a pipeline run.
+    """
+    accounting = _run.get()
+    if accounting is None:
+        return []
+    return [
+        AccountingCallbackHandler(accounting, _operation.get(), _page.get())
+    ]
@@ -1,52 +1,147 @@
-from typing import Annotated, Dict, Sequence, TypedDict
+import importlib
+import os
+import tempfile
+import time
+from functools import cache
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Dict,
+    Literal,
+    Sequence,
+    TextIO,
+    TypedDict,
+)
 from uuid import uuid4
 
-from langchain.schema import BaseMessage, HumanMessage, SystemMessage
-from langchain.tools import BaseTool
-from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import ToolMessage
-from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.constants import END
-from langgraph.graph import StateGraph, add_messages
-from langgraph.graph.state import CompiledStateGraph
-from langgraph.prebuilt.chat_agent_executor import StructuredResponseSchema
-
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, ValidationError
+
+from apps.accounting import record_routing, run_callbacks
 from apps.git import GitRepository
+from apps.limits import llm_slot
+from apps.resilience import resilient_call
 from apps.settings import CONFIG, IS_TEST
 from apps.tools.code_index_search import CodeIndexSearchTool
 from apps.tools.list_files import ListFilesTool
 from apps.tools.semantic_search_files import SemanticSearchFilesTool
 from apps.tools.view_file_content import ViewFileContentTool
-
-
-class AgentState(TypedDict):
-    messages: Annotated[Sequence[BaseMessage], add_messages]
-    number_of_steps: int
-    structured_response: str | None
+from apps.tracing import span, traced
+from apps.usage import StreamStats, model_name
+from apps.utils import count_tokens
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+    from langgraph.prebuilt.chat_agent_executor import StructuredResponseSchema
+
+# tool: 응답 형식을 도구로 제공하여 모델이 마지막 단계에서 직접 호출합니다.
+# post: ReAct 루프가 끝난 뒤 structured output을 위한 호출을 한 번 더 합니다.
+StructuredOutputMode = Literal["tool", "post"]
+
+# Provider별 chat model class입니다. 사용하는 provider의 SDK만 불러옵니다.
+CHAT_MODELS = {
+    "openai": ("langchain_openai", "ChatOpenAI"),
+    "google": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "anthropic": ("langchain_anthropic", "ChatAnthropic"),
+}
+# OpenAI는 요청하지 않으면 스트리밍 응답에 토큰 사용량을 보내지 않습니다.
+CHAT_MODEL_OPTIONS: dict[str, dict] = {
+    "openai": {"stream_usage": True},
+}
 
 
 def create_react_agent(
     prompt: str,
     model: BaseChatModel,
     tools: Sequence[BaseTool],
-    response_format: StructuredResponseSchema | None = None,
+    response_format: "StructuredResponseSchema | None" = None,
+    structured_output: StructuredOutputMode = "post",
+    planner: BaseChatModel | None = None,
 ):
+    """
+    Creates a ReAct agent graph.
+
+    With a `planner`, steps that only choose tools run on the planner. When
+    the planner tries to answer instead, the step is sent again to `model`,
+    which also writes the final answer and the structured response.
+    """
+    # langgraph는 import에 오래 걸리므로 agent를 만들 때 불러옵니다.
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.constants import END
+    from langgraph.graph import StateGraph, add_messages
+
+    class AgentState(TypedDict):
+        messages: Annotated[Sequence[BaseMessage], add_messages]
+        number_of_steps: int
+        structured_response: BaseModel | None
+
+    respond_with_tool = (
+        structured_output == "tool"
+        and isinstance(response_format, type)
+        and issubclass(response_format, BaseModel)
+    )
+    if respond_with_tool:
+        response_tool = response_format.__name__  # type: ignore
+        prompt += (
+            f"\n\nWhen you have the final answer, call the {response_tool} "
+            "tool with it instead of replying with text."
+        )
+        # 모든 단계에서 도구를 호출하게 하여 응답 도구로만 종료되게 합니다.
+        bound_tools, tool_choice = list(tools) + [response_format], "any"
+    else:
+        response_tool = None
+        bound_tools, tool_choice = list(tools), None
+
+    model_runnable = model.bind_tools(bound_tools, tool_choice=tool_choice)
+    planner_runnable = None
+    if planner is not None and model_name(planner) != model_name(model):
+        planner_runnable = planner.bind_tools(
+            bound_tools, tool_choice=tool_choice
+        )
+
     system_prompt = SystemMessage(prompt)
 
-    model_runnable = model.bind_tools(tools)
+    async def invoke(
+        runnable: Runnable,
+        input,
+        config: RunnableConfig,
+        chat_model: BaseChatModel = model,
+    ):
+        # 재시도와 hedging의 지연 시간 통계는 모델별로 관리합니다.
+        name = model_name(chat_model)
+        with span(name, "llm"):
+            return await resilient_call(
+                lambda: runnable.ainvoke(input, config),
+                key=name,
+                slot=llm_slot,
+            )
+
+    def is_answer(response: AIMessage) -> bool:
+        return not response.tool_calls or any(
+            tool_call["name"] == response_tool
+            for tool_call in response.tool_calls
+        )
 
     tools_by_name = {tool.name: tool for tool in tools}
 
     async def call_tool(state: AgentState):
         outputs = []
         for tool_call in state["messages"][-1].tool_calls:  # type: ignore
-            tool_result = await tools_by_name[tool_call["name"]].ainvoke(
-                tool_call["args"]
-            )
+            with span(tool_call["name"], "tool", tool_call["args"]):
+                tool_result = await tools_by_name[tool_call["name"]].ainvoke(
+                    tool_call["args"]
+                )
             outputs.append(
                 ToolMessage(
                     content=tool_result,
@@ -58,10 +153,24 @@ def create_react_agent(
 
     async def call_model(state: AgentState, config: RunnableConfig):
         steps = state.get("number_of_steps", 0)
-        response = await model_runnable.ainvoke(
-            [system_prompt] + state["messages"],  # type: ignore
-            config,
-        )
+        messages = [system_prompt] + state["messages"]  # type: ignore
+        if planner_runnable is not None:
+            response = await invoke(
+                planner_runnable,
+                messages,
+                config,
+                chat_model=planner,  # type: ignore
+            )
+            # 답변은 설정된 모델이 작성하도록 같은 단계를 다시 요청합니다.
+            escalated = is_answer(response)
+            record_routing(
+                model_name(planner),  # type: ignore
+                model_name(model),
+                escalated,
+            )
+            if not escalated:
+                return {"messages": [response], "number_of_steps": steps + 1}
+        response = await invoke(model_runnable, messages, config)
         return {"messages": [response], "number_of_steps": steps + 1}
 
     def should_continue(state: AgentState, config: RunnableConfig):
@@ -70,11 +179,51 @@ def create_react_agent(
         # If the last message is not a tool call, end the conversation
         if not messages[-1].tool_calls:  # type: ignore
             return "end"
+        if any(
+            tool_call["name"] == response_tool
+            for tool_call in messages[-1].tool_calls  # type: ignore
+        ):
+            return "respond"
         # If the allowed steps have been reached, need to provide a final answer based on the conversation
         if state.get("number_of_steps", 0) >= step_limit:
             return "final_answer"
         return "continue"
 
+    async def respond(state: AgentState):
+        errors = []
+        for tool_call in state["messages"][-1].tool_calls:  # type: ignore
+            if tool_call["name"] != response_tool:
+                continue
+            try:
+                response = response_format.model_validate(  # type: ignore
+                    tool_call["args"]
+                )
+                return {"structured_response": response}
+            except ValidationError as e:
+                errors.append(str(e))
+        # 응답이 형식에 맞지 않으면 오류를 알려주고 다시 호출하게 합니다.
+        outputs = [
+            ToolMessage(
+                content=(
+                    f"Invalid {response_tool}: {errors[0]}"
+                    if tool_call["name"] == response_tool
+                    else "Not executed. Call tools and respond separately."
+                ),
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"],
+            )
+            for tool_call in state["messages"][-1].tool_calls  # type: ignore
+        ]
+        return {"messages": outputs}
+
+    def should_retry(state: AgentState, config: RunnableConfig):
+        step_limit = config["configurable"].get("step_limit", 20)  # type: ignore
+        if state.get("structured_response"):
+            return "end"
+        if state.get("number_of_steps", 0) >= step_limit:
+            return "final_answer"
+        return "retry"
+
     async def call_final_answer(state: AgentState, config: RunnableConfig):
         messages = (
             [system_prompt]
@@ -86,7 +235,14 @@ def create_react_agent(
                 )
             ]
         )
-        response = await model.ainvoke(messages, config)
+        if respond_with_tool:
+            # 마지막 단계에서 바로 응답 형식으로 답하게 하여 호출을 줄입니다.
+            structured_model = model.with_structured_output(
+                response_format  # type: ignore
+            )
+            response = await invoke(structured_model, messages, config)
+            return {"structured_response": response}
+        response = await invoke(model, messages, config)
         return {"messages": [response]}
 
     async def generate_structured_response(
@@ -95,8 +251,8 @@ def create_react_agent(
         model_with_structured_output = model.with_structured_output(
             response_format  # type: ignore
         )
-        response = await model_with_structured_output.ainvoke(
-            state["messages"], config
+        response = await invoke(
+            model_with_structured_output, state["messages"], config
         )
         return {"structured_response": response}
 
@@ -104,47 +260,101 @@ def create_react_agent(
 
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("model", call_model)
-    workflow.add_node("tools", call_tool)
-    workflow.add_node("final_answer", call_final_answer)
+    workflow.add_node("model", traced("model", "agent")(call_model))
+    workflow.add_node("tools", traced("tools", "agent")(call_tool))
+    workflow.add_node(
+        "final_answer", traced("final_answer", "agent")(call_final_answer)
+    )
+
+    if respond_with_tool:
+        workflow.add_node("respond", traced("respond", "agent")(respond))
+        workflow.add_conditional_edges(
+            "respond",
+            should_retry,
+            {
+                "end": END,
+                "retry": "model",
+                "final_answer": "generate_structured_response",
+            },
+        )
 
     if response_format:
         workflow.add_node(
-            "generate_structured_response", generate_structured_response
+            "generate_structured_response",
+            traced("generate_structured_response", "agent")(
+                generate_structured_response
+            ),
         )
         workflow.add_edge("generate_structured_response", END)
 
     workflow.set_entry_point("model")
 
-    workflow.add_conditional_edges(
-        "model",
-        should_continue,
-        {
-            "continue": "tools",
-            "final_answer": "final_answer",
-            "end": final_node,
-        },
-    )
+    routes = {
+        "continue": "tools",
+        "final_answer": "final_answer",
+        "end": final_node,
+    }
+    if respond_with_tool:
+        routes["respond"] = "respond"
+    workflow.add_conditional_edges("model", should_continue, routes)
 
     workflow.add_edge("tools", "model")
-    workflow.add_edge("final_answer", final_node)
+    workflow.add_edge("final_answer", END if respond_with_tool else final_node)
 
     graph = workflow.compile(checkpointer=MemorySaver())
     return graph
 
 
+@cache
+def get_chat_model(
+    model: str, temperature: float, top_p: float
+) -> BaseChatModel:
+    """
+    Returns a chat model client for "provider/model".
+    Clients are shared across agents and repositories in the process.
+    """
+    company, model_name = model.split("/")
+    module, name = CHAT_MODELS[company]
+    model_cls = getattr(importlib.import_module(module), name)
+
+    # 모델 인스턴스화
+    return model_cls(
+        model=model_name,
+        temperature=temperature,
+        top_p=top_p,
+        **CHAT_MODEL_OPTIONS.get(company, {}),
+    )
+
+
+def get_planner_model(model_config: Dict) -> str | None:
+    """
+    Returns the planner for the model of `model_config`.
+
+    A "planner_model" in `model_config` is used as is. Otherwise the planner
+    of CONFIG["agent"] for the provider of the model is used, so a wiki that
+    overrides the model does not need another provider's key.
+    """
+    if "planner_model" in model_config:
+        return model_config["planner_model"]
+    planners = CONFIG["agent"]["planner_model"] or {}
+    provider = model_config["model"].partition("/")[0]
+    return planners.get(provider)
+
+
 class AgentBuilder:
     def __init__(
         self,
         repo: GitRepository,
         model_config: Dict,
-        response_format: StructuredResponseSchema | None,
+        response_format: "StructuredResponseSchema | None",
     ):
         self.system_prompt = open(CONFIG["agent"]["prompt"]).read()
         self.repo = repo
         self.response_format = response_format
+        self.structured_output = CONFIG["agent"]["structured_output"]
 
         self.model = self.setup_model(model_config)
+        self.planner = self.setup_planner(model_config)
         self.tools = self.setup_tools(repo)
 
     def setup_model(self, model_config: Dict) -> BaseChatModel:
@@ -152,20 +362,20 @@ class AgentBuilder:
         model_config = (
             {"model": "openai/gpt-4.1-nano"} if IS_TEST else model_config
         )
-        model_cls = {
-            "openai": ChatOpenAI,
-            "google": ChatGoogleGenerativeAI,
-            "anthropic": ChatAnthropic,
-        }
-        company, model_name = model_config["model"].split("/")
-
-        # 모델 인스턴스화
-        model: BaseChatModel = model_cls[company](
-            model=model_name,
+        return get_chat_model(
+            model=model_config["model"],
             temperature=model_config.get("temperature", 0),
             top_p=model_config.get("top_p", 1),
         )
-        return model
+
+    def setup_planner(self, model_config: Dict) -> BaseChatModel | None:
+        """
+        Setup the smaller model used for steps that only choose tools.
+        """
+        planner = get_planner_model(model_config)
+        if not planner or IS_TEST:
+            return None
+        return self.setup_model(dict(model_config, model=planner))
 
     def setup_tools(self, repo: GitRepository) -> Sequence[BaseTool]:
         """
@@ -179,47 +389,181 @@ class AgentBuilder:
         ]
         return tools
 
-    def build(self) -> CompiledStateGraph:
+    def build(self) -> "CompiledStateGraph":
         agent = create_react_agent(
             prompt=self.system_prompt,
             model=self.model,
             tools=self.tools,
             response_format=self.response_format,
+            structured_output=self.structured_output,
+            planner=self.planner,
         )
         return agent
 
 
+def _run_config() -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": str(uuid4()),
+            "step_limit": 10,
+        },
+        "recursion_limit": 50,
+        "callbacks": run_callbacks(),
+    }
+
+
+def _print_tool_messages(messages: Sequence[BaseMessage]):
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            message.pretty_print()
+
+
 async def complete_chat(
     prompt: str,
     repo: GitRepository,
     model_config: Dict = {"model": "openai/gpt-4o"},
-    response_format: StructuredResponseSchema | None = None,
+    response_format: "StructuredResponseSchema | None" = None,
     debug: bool = IS_TEST,
 ):
-    agent = AgentBuilder(
+    builder = AgentBuilder(
         repo=repo,
         model_config=model_config,
         response_format=response_format,
-    ).build()
+    )
+    agent = builder.build()
 
     message = {"messages": HumanMessage(content=prompt)}
 
-    config: RunnableConfig = {
-        "configurable": {
-            "thread_id": str(uuid4()),
-            "step_limit": 10,
-        },
-        "recursion_limit": 50,
-    }
-
-    response = await agent.ainvoke(message, config=config)
+    response = await agent.ainvoke(message, config=_run_config())
 
     if debug:
-        for message in response["messages"]:
-            if isinstance(message, ToolMessage):
-                message.pretty_print()
+        _print_tool_messages(response["messages"])
 
     if response_format:
         return response["structured_response"]
 
     return response["messages"][-1].content
+
+
+async def stream_chat(
+    prompt: str,
+    output: Path,
+    repo: GitRepository,
+    model_config: Dict = {"model": "openai/gpt-4o"},
+    debug: bool = IS_TEST,
+) -> StreamStats:
+    """
+    Runs the agent like `complete_chat` and streams the answer to `output`.
+
+    The text of each model call is written to a temporary file next to
+    `output` as it arrives, and the file starts over when another call
+    begins. When the run succeeds the file holds the final answer and is
+    renamed to `output`, so a failed run never leaves a partial file.
+
+    Args:
+        prompt (str): User prompt
+        output (Path): File the answer is written to
+        repo (GitRepository): Repository the agent's tools read from
+        model_config (Dict): Model settings
+
+    Returns:
+        StreamStats: Time to first token and output rate of the answer
+    """
+    builder = AgentBuilder(
+        repo=repo, model_config=model_config, response_format=None
+    )
+    agent = builder.build()
+    config = _run_config()
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=output.parent, prefix=f".{output.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as file:
+            stream = _AnswerStream(file)
+            async for mode, chunk in agent.astream(
+                {"messages": HumanMessage(content=prompt)},
+                config=config,
+                stream_mode=["messages", "updates"],
+            ):
+                if mode == "updates":
+                    # 다음 모델 호출은 이전 node가 끝난 뒤 시작됩니다.
+                    stream.call_start = time.perf_counter()
+                elif isinstance(chunk[0], AIMessageChunk):  # type: ignore
+                    stream.write(chunk[0])  # type: ignore
+
+            messages = (await agent.aget_state(config)).values["messages"]
+            stats = stream.finish(messages[-1])
+        os.replace(temp_path, output)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if debug:
+        _print_tool_messages(messages)
+    return stats
+
+
+def _text(content: str | list) -> str:
+    if isinstance(content, str):
+        return content
+    # Anthropic과 Gemini는 content를 block 목록으로 반환합니다.
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
+
+
+class _AnswerStream:
+    """Writes the text of the model call being streamed to a file."""
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.message_id: str | None = None
+        self.call_start = time.perf_counter()
+        self.first_token: float | None = None
+        self.last_token: float | None = None
+        self.ttft = 0.0
+        self.length = 0
+
+    def write(self, chunk: AIMessageChunk):
+        now = time.perf_counter()
+        if chunk.id != self.message_id:
+            # 새 모델 호출이 시작되면 이전 호출의 출력을 지웁니다.
+            self.message_id = chunk.id
+            self.file.seek(0)
+            self.file.truncate()
+            self.first_token = self.last_token = None
+            self.length = 0
+        text = _text(chunk.content)
+        if not text:
+            return
+        if self.first_token is None:
+            self.first_token = now
+            self.ttft = now - self.call_start
+        self.last_token = now
+        self.file.write(text)
+        self.length += len(text)
+
+    def finish(self, message: BaseMessage) -> StreamStats:
+        text = _text(message.content)  # type: ignore
+        if message.id != self.message_id or len(text) != self.length:
+            # 스트림이 최종 응답과 다르면(hedging 등) 최종 응답으로 다시 씁니다.
+            self.file.seek(0)
+            self.file.truncate()
+            self.file.write(text)
+            self.first_token = None
+        tokens = None
+        if isinstance(message, AIMessage) and message.usage_metadata:
+            tokens = message.usage_metadata["output_tokens"]
+        seconds = 0.0
+        if self.first_token is not None and self.last_token is not None:
+            seconds = self.last_token - self.first_token
+        return StreamStats(
+            ttft=self.ttft if self.first_token is not None else None,
+            tokens=tokens or count_tokens(text),
+            seconds=seconds,
+        )
@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import time
+
+from msgspec import Struct
+
+from apps.limits import configure_limits
+from apps.main import run
+from apps.settings import (
+    CONFIG,
+    GITHUB_ACCESS_TOKEN,
+    LOCAL_ONLY,
+    TRACE,
+    Logger,
+)
+from apps.tracing import tracing
+
+STATUS = {0: "success", 1: "failure", 100: "skipped"}
+
+
+class BatchResult(Struct):
+    repository: str
+    branch: str | None
+    exit_code: int
+    elapsed: float
+    error: str | None = None
+
+
+def parse_target(target: str) -> tuple[str, str | None]:
+    """
+    Parses "owner/name" or "owner/name@branch".
+    """
+    repository, _, branch = target.strip().partition("@")
+    return repository, branch or None
+
+
+def read_targets(filepath: str) -> list[str]:
+    """
+    Reads one target per line. Blank lines and "#" comments are ignored.
+    """
+    with open(filepath) as file:
+        lines = (line.split("#", 1)[0].strip() for line in file)
+        return [line for line in lines if line]
+
+
+async def run_batch(
+    targets: list[str],
+    pat: str,
+    concurrency: int = 4,
+    local_only: bool = LOCAL_ONLY,
+    config_path: str = "wiki_config.yaml",
+) -> list[BatchResult]:
+    """
+    Runs the wiki pipeline for several repositories concurrently.
+
+    All pipelines share the process-wide clients, tokenizer and caches, and
+    the LLM/embedding concurrency budget configured in `apps.limits`.
+
+    Args:
+        targets (list[str]): Repositories as "owner/name[@branch]".
+        pat (str): GitHub Personal Access Token.
+        concurrency (int): Maximum number of pipelines running at once.
+        local_only (bool): Use existing clones without the GitHub API.
+        config_path (str): Wiki configuration file shared by all targets.
+
+    Returns:
+        list[BatchResult]: Results in the order of `targets`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(target: str) -> BatchResult:
+        repository, branch = parse_target(target)
+        async with semaphore:
+            Logger.info(f"[{repository}] Starting wiki generation...")
+            start = time.perf_counter()
+            error = None
+            try:
+                exit_code = await run(
+                    repository=repository,
+                    pat=pat,
+                    branch=branch,
+                    local_only=local_only,
+                    config_path=config_path,
+                )
+            except Exception as e:
+                Logger.error(f"[{repository}] Failed: {e}", exc_info=True)
+                exit_code, error = 1, str(e)
+            return BatchResult(
+                repository=repository,
+                branch=branch,
+                exit_code=exit_code,
+                elapsed=time.perf_counter() - start,
+                error=error,
+            )
+
+    return await asyncio.gather(*(run_one(target) for target in targets))
+
+
+def batch_exit_code(results: list[BatchResult]) -> int:
+    """Fails the batch if any repository failed. Skipped ones succeed."""
+    return 1 if any(result.exit_code == 1 for result in results) else 0
+
+
+def render_summary(results: list[BatchResult], wall_seconds: float) -> str:
+    headers = ("Repository", "Branch", "Status", "Exit", "Time (s)")
+    rows = [
+        (
+            result.repository,
+            result.branch or "-",
+            STATUS.get(result.exit_code, "unknown"),
+            str(result.exit_code),
+            f"{result.elapsed:.1f}",
+        )
+        for result in results
+    ]
+    widths = [
+        max(len(row[i]) for row in [headers, *rows])
+        for i in range(len(headers))
+    ]
+
+    def line(row):
+        return " | ".join(cell.ljust(width) for cell, width in zip(row, widths))
+
+    lines = [line(headers), "-+-".join("-" * width for width in widths)]
+    lines.extend(line(row) for row in rows)
+    # 동시에 실행된 run의 시간은 겹치므로 합계와 실제 경과 시간을 따로 보여줍니다.
+    summed = sum(result.elapsed for result in results)
+    lines.append(
+        f"{len(results)} repositories in {wall_seconds:.1f}s "
+        f"({summed:.1f}s summed over runs)"
+    )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate Wikis for several GitHub repositories."
+    )
+
+    parser.add_argument(
+        "repositories",
+        type=str,
+        nargs="*",
+        help="GitHub repositories as owner/name or owner/name@branch.",
+    )
+    parser.add_argument(
+        "--file",
+        type=str,
+        help="File with one owner/name[@branch] per line.",
+        default=None,
+    )
+    parser.add_argument(
+        "--pat",
+        type=str,
+        help="GitHub Personal Access Token.",
+        default=GITHUB_ACCESS_TOKEN,
+    )
+    parser.add_argument(
+        "--config",
+        type=str,
+        help="Wiki configuration file used for every repository.",
+        default="wiki_config.yaml",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Number of repositories processed at once.",
+        default=4,
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        help="Concurrent LLM calls across all repositories.",
+        default=CONFIG["concurrency"]["llm"],
+    )
+    parser.add_argument(
+        "--embedding-concurrency",
+        type=int,
+        help="Concurrent embedding batches across all repositories.",
+        default=CONFIG["concurrency"]["embedding"],
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Use existing clones without calling the GitHub API.",
+        default=LOCAL_ONLY,
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome trace of all runs to this path.",
+        default=TRACE or None,
+    )
+
+    args = parser.parse_args()
+    targets = list(args.repositories)
+    if args.file:
+        targets += read_targets(args.file)
+    if not targets:
+        parser.error("No repositories given.")
+
+    configure_limits(
+        llm=args.llm_concurrency, embedding=args.embedding_concurrency
+    )
+    start = time.perf_counter()
+    with tracing(args.trace):
+        results = asyncio.run(
+            run_batch(
+                targets,
+                pat=args.pat,
+                concurrency=args.concurrency,
+                local_only=args.local,
+                config_path=args.config,
+            )
+        )
+    print(render_summary(results, time.perf_counter() - start))
+    exit(batch_exit_code(results))
@@ -0,0 +1,164 @@
+"""
+Import time of the CLI, measured with `python -X importtime`.
+
+Every run imports the statement in a fresh interpreter, like a GitHub Action
+invocation does, and reports the median total and the modules that take the
+longest, cumulative of what they import.
+
+    python -m apps.bench.bench_import [--runs 5] [--provider openai]
+
+`--provider` also imports the SDK of that provider, as a run with a single
+provider does. Exits with 1 when a module that should only be imported on
+use is loaded, or when the import takes longer than `--budget` seconds.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+from msgspec import Struct
+
+from apps.agent import CHAT_MODELS
+
+ROOT = Path(__file__).parents[2]
+STATEMENT = "import apps.main"
+# 실제로 사용할 때만 불러와야 하는 module입니다.
+LAZY_MODULES = (
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+    "faiss",
+    "langgraph",
+    "github",
+    "cleantext",
+)
+
+
+class ImportTiming(Struct):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+class ImportResult(Struct):
+    runs: int
+    total_seconds: float
+    top: list[ImportTiming]
+    loaded_lazy_modules: list[str]
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parses the "import time: self | cumulative | module" lines."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # 헤더
+        timings.append(
+            ImportTiming(
+                module=module.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+            )
+        )
+    return timings
+
+
+def _total_us(timings: list[ImportTiming]) -> int:
+    return sum(timing.self_us for timing in timings)
+
+
+def import_statement(provider: str | None = None) -> str:
+    if provider is None:
+        return STATEMENT
+    return f"{STATEMENT}; import {CHAT_MODELS[provider][0]}"
+
+
+def measure(statement: str = STATEMENT, runs: int = 5, top: int = 15):
+    """
+    Imports `statement` in `runs` fresh interpreters and takes the median.
+
+    Returns:
+        ImportResult: Total and slowest modules of the median run, and the
+        modules of `LAZY_MODULES` it loaded
+    """
+    results = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"Import failed:\n{process.stderr}")
+        results.append(parse_importtime(process.stderr))
+
+    results.sort(key=_total_us)
+    median = results[len(results) // 2]
+    modules = {timing.module for timing in median}
+    return ImportResult(
+        runs=runs,
+        total_seconds=_total_us(median) / 1e6,
+        top=sorted(median, key=lambda t: t.cumulative_us, reverse=True)[:top],
+        loaded_lazy_modules=[
+            module for module in LAZY_MODULES if module in modules
+        ],
+    )
+
+
+def render(result: ImportResult) -> str:
+    width = max((len(timing.module) for timing in result.top), default=0)
+    lines = [
+        f"Import time: {result.total_seconds:.3f}s "
+        f"(median of {result.runs} runs)",
+        "",
+        f"{'module'.ljust(width)}  cumulative      self",
+    ]
+    for timing in result.top:
+        lines.append(
+            f"{timing.module.ljust(width)}  {timing.cumulative_us / 1e3:8.1f}ms"
+            f"  {timing.self_us / 1e3:6.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def main(args: argparse.Namespace) -> int:
+    provider = args.provider
+    result = measure(import_statement(provider), args.runs, args.top)
+    print(render(result))
+
+    expected = {CHAT_MODELS[provider][0]} if provider else set()
+    unexpected = [m for m in result.loaded_lazy_modules if m not in expected]
+    if unexpected:
+        print(f"Imported on startup: {', '.join(unexpected)}")
+        return 1
+    if args.budget and result.total_seconds > args.budget:
+        print(f"Import time is over the budget of {args.budget:.3f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--runs", type=int, help="Number of interpreters to run.", default=5
+    )
+    parser.add_argument(
+        "--top", type=int, help="Number of modules to report.", default=15
+    )
+    parser.add_argument(
+        "--provider",
+        choices=sorted(CHAT_MODELS),
+        help="Also import the SDK of this provider.",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Maximum import time in seconds.",
+        default=None,
+    )
+    sys.exit(main(parser.parse_args()))
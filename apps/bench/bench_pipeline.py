@@ -0,0 +1,299 @@
+"""
+End-to-end benchmark of the wiki pipeline on a local fixture repository.
+
+Runs Download → GenerateStructure → GeneratePages → GenerateIndex without a
+network: the fixture is pushed to a local bare origin, chat models are
+replaced by `FakeChatModel` with the given latency profile, documents are
+embedded with the hashing embeddings and code search uses `git grep`.
+
+    python -m apps.bench.bench_pipeline [--runs 3] [--ttft 0.8] [--tps 80]
+    python -m apps.bench.bench_pipeline --update-baseline
+
+Reports the wall time, the time of each stage, model and tool calls and the
+peak RSS of the process. Exits with 1 when a metric is worse than the
+baseline by more than the tolerance, or when there is no baseline to compare
+with. Baselines depend on the machine, so record one with `--update-baseline`
+before comparing.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from msgspec import Struct
+
+from apps import agent, retriever
+from apps.bench.fake_chat import FakeChatModel, LatencyProfile
+from apps.bench.fixture import create_fixture_repo
+from apps.context import Context
+from apps.model import WikiConfiguration
+from apps.pipeline import Pipeline
+from apps.settings import CONFIG, PROJECT_DIR
+from apps.wiki_file import Download
+from apps.wiki_index import GenerateIndex
+from apps.wiki_page import GeneratePages
+from apps.wiki_structure import GenerateStructure
+
+DEFAULT_BASELINE = Path(PROJECT_DIR) / "bench" / "baselines" / "pipeline.json"
+# 작은 값의 흔들림을 회귀로 보지 않도록 허용하는 절대 차이입니다.
+MIN_DELTA = {"seconds": 0.1, "mib": 16.0, "calls": 0.0}
+
+
+class RunResult(Struct):
+    wall_seconds: float
+    stage_seconds: dict[str, float]
+    llm_calls: int
+    tool_calls: int
+    pages: int
+
+
+class BenchResult(Struct):
+    runs: int
+    wall_seconds: float
+    stage_seconds: dict[str, float]
+    llm_calls: int
+    tool_calls: int
+    pages: int
+    peak_rss_mib: float
+
+    def metrics(self) -> dict[str, float]:
+        """Flattens the result into metrics where lower is better."""
+        metrics = {
+            "wall_seconds": self.wall_seconds,
+            "peak_rss_mib": self.peak_rss_mib,
+            "llm_calls": float(self.llm_calls),
+            "tool_calls": float(self.tool_calls),
+        }
+        for stage, seconds in self.stage_seconds.items():
+            metrics[f"{stage}_seconds"] = seconds
+        return metrics
+
+
+def peak_rss_mib() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KiB, macOS는 byte 단위입니다.
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def fake_chat_models(files: list[str], latency: LatencyProfile, pages: int):
+    """Replaces every chat model client with a `FakeChatModel`."""
+
+    def get_chat_model(model: str, temperature: float, top_p: float):
+        return FakeChatModel(
+            model_name=model.partition("/")[2] or model,
+            files=files,
+            latency=latency,
+            pages=pages,
+        )
+
+    return mock.patch.object(agent, "get_chat_model", get_chat_model)
+
+
+async def run_pipeline(
+    root: Path,
+    source: str,
+    repository: str,
+    latency: LatencyProfile,
+    pages: int,
+) -> RunResult:
+    git_repo = create_fixture_repo(root, source=source, repository=repository)
+    files = sorted(
+        file for file in git_repo.list_tracked_files() if file.endswith(".py")
+    )
+    context = Context(git_repo=git_repo, config=WikiConfiguration())
+    pipeline = (
+        Pipeline.with_context(context)
+        .register(Download)
+        .register(GenerateStructure)
+        .register(GeneratePages)
+        .register(GenerateIndex)
+    )
+
+    with (
+        fake_chat_models(files, latency, pages),
+        mock.patch.object(retriever, "INDEX_DIR", str(root / "indexes")),
+        mock.patch.dict(CONFIG["embedder"], model="hashing"),
+    ):
+        retriever.get_embeddings.cache_clear()
+        try:
+            start = time.perf_counter()
+            result = await pipeline.execute(None)
+            wall_seconds = time.perf_counter() - start
+        finally:
+            retriever.get_embeddings.cache_clear()
+    if result.status == "failure":
+        raise RuntimeError("Pipeline failed") from result.error
+
+    report = pipeline.accounting.report()
+    return RunResult(
+        wall_seconds=wall_seconds,
+        stage_seconds={
+            name: usage.wall_seconds
+            for name, usage in report.operations.items()
+        },
+        llm_calls=report.total.llm_calls,
+        tool_calls=report.total.tool_calls,
+        pages=sum(
+            path.name != "README.md"
+            for path in context.wiki_repo.wiki_path.glob("*.md")
+        ),
+    )
+
+
+def benchmark(
+    source: str = PROJECT_DIR,
+    runs: int = 1,
+    latency: LatencyProfile = LatencyProfile(),
+    pages: int = 8,
+) -> BenchResult:
+    """
+    Runs the pipeline `runs` times on fresh fixtures and takes the median
+    of each timing.
+    """
+    results = []
+    for i in range(runs):
+        with tempfile.TemporaryDirectory() as root:
+            # Repository마다 index와 retriever cache가 따로 사용됩니다.
+            result = asyncio.run(
+                run_pipeline(
+                    Path(root), source, f"local/bench-{i}", latency, pages
+                )
+            )
+        results.append(result)
+        print(
+            f"Run {i + 1}/{runs}: {result.wall_seconds:.2f}s, "
+            f"{result.pages} pages"
+        )
+
+    stages = results[0].stage_seconds.keys()
+    return BenchResult(
+        runs=runs,
+        wall_seconds=statistics.median(r.wall_seconds for r in results),
+        stage_seconds={
+            stage: statistics.median(r.stage_seconds[stage] for r in results)
+            for stage in stages
+        },
+        llm_calls=max(r.llm_calls for r in results),
+        tool_calls=max(r.tool_calls for r in results),
+        pages=min(r.pages for r in results),
+        peak_rss_mib=peak_rss_mib(),
+    )
+
+
+def compare(
+    current: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """
+    Returns the metrics that are worse than the baseline by more than
+    `tolerance`, as a fraction of the baseline value.
+    """
+    regressions = []
+    for name, value in current.items():
+        if name not in baseline:
+            continue
+        unit = name.rpartition("_")[2]
+        limit = baseline[name] * (1 + tolerance) + MIN_DELTA.get(unit, 0.0)
+        if value > limit:
+            regressions.append(
+                f"{name}: {value:.2f} > {baseline[name]:.2f} "
+                f"(limit {limit:.2f})"
+            )
+    return regressions
+
+
+def render(result: BenchResult, baseline: dict[str, float]) -> str:
+    metrics = result.metrics()
+    width = max(len(name) for name in metrics)
+    lines = []
+    for name, value in metrics.items():
+        line = f"{name.ljust(width)}  {value:10.2f}"
+        if name in baseline:
+            base = baseline[name]
+            change = (value - base) / base if base else 0.0
+            line += f"  (baseline {base:.2f}, {change:+.1%})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(args: argparse.Namespace) -> int:
+    path = Path(args.baseline)
+    if not path.exists() and not args.update_baseline:
+        # 비교할 기준이 없으면 CI에서 통과한 것처럼 보이지 않도록 실패합니다.
+        print(f"No baseline at {path}, run with --update-baseline first.")
+        return 1
+
+    latency = LatencyProfile(
+        ttft_median=args.ttft,
+        ttft_sigma=args.ttft_sigma,
+        tokens_per_second=args.tps,
+    )
+    result = benchmark(args.source, args.runs, latency, args.pages)
+
+    baseline = json.loads(path.read_text()) if path.exists() else {}
+    print(render(result, baseline))
+
+    if args.update_baseline:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(result.metrics(), indent=2))
+        print(f"Baseline written to {path}")
+        return 0
+    if regressions := compare(result.metrics(), baseline, args.tolerance):
+        print("Regressions:\n" + "\n".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--source",
+        type=str,
+        help="Directory used as the fixture repository.",
+        default=PROJECT_DIR,
+    )
+    parser.add_argument(
+        "--runs", type=int, help="Number of pipeline runs.", default=3
+    )
+    parser.add_argument(
+        "--pages", type=int, help="Number of wiki pages.", default=8
+    )
+    parser.add_argument(
+        "--ttft",
+        type=float,
+        help="Median time to first token in seconds.",
+        default=0.8,
+    )
+    parser.add_argument(
+        "--ttft-sigma",
+        type=float,
+        help="Log-normal shape of the time to first token.",
+        default=0.4,
+    )
+    parser.add_argument(
+        "--tps", type=float, help="Output tokens per second.", default=80.0
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        help="Baseline metrics to compare with.",
+        default=str(DEFAULT_BASELINE),
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        help="Allowed slowdown as a fraction of the baseline.",
+        default=0.2,
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the results as the new baseline.",
+    )
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,236 @@
+"""
+Memory, load-time and recall trade-offs of reduced-precision vector storage.
+
+Every configuration is compared with the exact `IndexFlatL2` results on the
+same vectors. Recall@k is the share of the exact top-k neighbours that the
+configuration also returns.
+
+    python -m apps.bench.bench_quantization [--source DIR] [--k 10]
+
+The chunks of the fixture repository are embedded with the configured
+embeddings client, or the one given with `--embeddings`. When it cannot be
+used, or with `--synthetic N`, random vectors with a decaying spectrum stand
+in for real embeddings; truncation results are only meaningful for
+Matryoshka embeddings.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+from msgspec import Struct
+
+from apps.bench.bench_retrieval import generate_queries
+from apps.bench.fixture import create_fixture_repo
+from apps.retriever import DocumentLoader, get_embeddings
+from apps.settings import CONFIG, PROJECT_DIR
+from apps.vector_index import (
+    TRAINING_SIZE,
+    IndexMetadata,
+    create_index,
+    index_nbytes,
+)
+
+
+class ConfigResult(Struct):
+    name: str
+    nbytes: int
+    file_bytes: int
+    load_ms: float
+    search_ms: float
+    recall: float
+
+
+def configurations(dimensions: int) -> dict[str, IndexMetadata]:
+    base = {"model": CONFIG["embedder"]["model"], "dimensions": dimensions}
+
+    def metadata(quantization="none", stored=dimensions, reduction=None):
+        return IndexMetadata(
+            **base,
+            stored_dimensions=stored,
+            quantization=quantization,
+            reduction=reduction,
+        )
+
+    half, quarter = dimensions // 2, dimensions // 4
+    return {
+        "flat (baseline)": metadata(),
+        "fp16": metadata("fp16"),
+        "int8": metadata("int8"),
+        f"truncate {half}": metadata(stored=half, reduction="truncate"),
+        f"truncate {quarter}": metadata(stored=quarter, reduction="truncate"),
+        f"pca {quarter}": metadata(stored=quarter, reduction="pca"),
+        f"fp16 + truncate {half}": metadata(
+            "fp16", stored=half, reduction="truncate"
+        ),
+        f"int8 + pca {quarter}": metadata(
+            "int8", stored=quarter, reduction="pca"
+        ),
+    }
+
+
+def synthetic_vectors(n: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    scale = 1 / np.sqrt(np.arange(1, dimensions + 1))
+    vectors = rng.standard_normal((n, dimensions)) * scale
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def embedded_vectors(source: str) -> tuple[np.ndarray, np.ndarray]:
+    embeddings = get_embeddings()
+    with tempfile.TemporaryDirectory() as root:
+        git_repo = create_fixture_repo(Path(root), source=source)
+        documents = [
+            doc.page_content
+            for docs in DocumentLoader().load_documents(git_repo.repo_path)
+            for doc in docs
+        ]
+        queries = generate_queries(
+            git_repo.repo_path, git_repo.list_tracked_files()
+        )
+    vectors = np.array(embeddings.embed_documents(documents), np.float32)
+    query_vectors = np.array(
+        embeddings.embed_documents([query.text for query in queries]),
+        np.float32,
+    )
+    return vectors, query_vectors
+
+
+def measure(
+    name: str,
+    metadata: IndexMetadata,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    exact: np.ndarray,
+    k: int,
+    root: str,
+) -> ConfigResult:
+    index = create_index(metadata)
+    if not index.is_trained:
+        index.train(vectors[:TRAINING_SIZE])
+    index.add(vectors)
+
+    path = os.path.join(root, "index.faiss")
+    faiss.write_index(index, path)
+    loads = []
+    for _ in range(5):
+        start = time.perf_counter()
+        faiss.read_index(path)
+        loads.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    recall = statistics.mean(
+        len(set(row) & set(expected)) / k for row, expected in zip(found, exact)
+    )
+    return ConfigResult(
+        name=name,
+        nbytes=index_nbytes(index),
+        file_bytes=os.path.getsize(path),
+        load_ms=statistics.median(loads),
+        search_ms=search_ms,
+        recall=recall,
+    )
+
+
+def render(results: list[ConfigResult], k: int) -> str:
+    baseline = results[0]
+    headers = (
+        "Config",
+        "Memory MiB",
+        "Ratio",
+        "File MiB",
+        "Load ms",
+        "Search ms",
+        f"Recall@{k}",
+    )
+    rows = [
+        (
+            result.name,
+            f"{result.nbytes / 2**20:.2f}",
+            f"{result.nbytes / baseline.nbytes:.2f}",
+            f"{result.file_bytes / 2**20:.2f}",
+            f"{result.load_ms:.2f}",
+            f"{result.search_ms:.3f}",
+            f"{result.recall:.3f}",
+        )
+        for result in results
+    ]
+    widths = [
+        max(len(row[i]) for row in [headers, *rows])
+        for i in range(len(headers))
+    ]
+    lines = [
+        " | ".join(cell.ljust(width) for cell, width in zip(row, widths))
+        for row in [headers, *rows]
+    ]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def main(source: str, k: int, synthetic: int | None, dimensions: int):
+    vectors = queries = None
+    if not synthetic:
+        try:
+            vectors, queries = embedded_vectors(source)
+            print(f"Embedded {len(vectors)} chunks, {len(queries)} queries")
+        except Exception as e:
+            print(f"Using synthetic vectors: {e}")
+    if vectors is None or queries is None:
+        vectors = synthetic_vectors(synthetic or 20000, dimensions)
+        noise = synthetic_vectors(500, dimensions, seed=1) * 0.5
+        queries = vectors[:500] + noise
+        print(f"{len(vectors)} synthetic vectors, {len(queries)} queries")
+
+    exact_index = faiss.IndexFlatL2(vectors.shape[1])
+    exact_index.add(vectors)
+    _, exact = exact_index.search(queries, k)
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for name, metadata in configurations(vectors.shape[1]).items():
+            result = measure(name, metadata, vectors, queries, exact, k, root)
+            results.append(result)
+    print(render(results, k))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--source",
+        type=str,
+        help="Directory used as the fixture repository.",
+        default=PROJECT_DIR,
+    )
+    parser.add_argument(
+        "--k", type=int, help="Number of neighbours compared.", default=10
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        help="Use this many synthetic vectors instead of embeddings.",
+        default=None,
+    )
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        help="Dimensions of the synthetic vectors.",
+        default=CONFIG["embedder"]["dimensions"],
+    )
+    parser.add_argument(
+        "--embeddings",
+        type=str,
+        help="Embeddings model as provider/model, e.g. hashing.",
+        default=CONFIG["embedder"]["model"],
+    )
+    args = parser.parse_args()
+    CONFIG["embedder"]["model"] = args.embeddings
+    main(args.source, args.k, args.synthetic, args.dimensions)
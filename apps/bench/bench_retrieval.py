@@ -0,0 +1,227 @@
+"""
+Latency/recall benchmark of the retrieval modes on a local fixture repository.
+
+Queries are generated from the Python definitions of the fixture: the bare
+identifier ("get_file_churn") and the first line of its docstring. A query
+is a hit when a chunk of the defining file is among the top `k` results.
+
+    python -m apps.bench.bench_retrieval [--source DIR] [--k 12]
+
+The "vector" and "hybrid" modes need a working embeddings client; they are
+skipped when it cannot be created. `--embeddings hashing` builds the vector
+index offline.
+"""
+
+import argparse
+import ast
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from langchain.docstore import InMemoryDocstore
+from msgspec import Struct
+
+from apps.bench.fixture import create_fixture_repo
+from apps.lexical import BM25Index
+from apps.retriever import (
+    DocumentLoader,
+    HybridRetriever,
+    VectorStoreManager,
+    add_lexical_documents,
+)
+from apps.settings import CONFIG, PROJECT_DIR
+
+MODES = ("lexical", "vector", "hybrid")
+
+
+class Query(Struct, frozen=True):
+    text: str
+    kind: str  # "identifier" | "description"
+    file_path: str
+
+
+class ModeResult(Struct):
+    mode: str
+    recall: dict[str, float]
+    mrr: float
+    p50_ms: float
+    p95_ms: float
+
+
+def generate_queries(repo_path: Path, files: list[str]) -> list[Query]:
+    definitions: defaultdict[str, set[str]] = defaultdict(set)
+    descriptions: dict[str, str] = {}
+    for file_path in files:
+        if not file_path.endswith(".py"):
+            continue
+        try:
+            tree = ast.parse((repo_path / file_path).read_text())
+        except (SyntaxError, UnicodeDecodeError):
+            continue
+        for node in ast.walk(tree):
+            if not isinstance(
+                node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                continue
+            if node.name.startswith("__") or len(node.name) < 4:
+                continue
+            definitions[node.name].add(file_path)
+            docstring = ast.get_docstring(node) or ""
+            summary = docstring.strip().split("\n", 1)[0]
+            if len(summary.split()) >= 4:
+                descriptions[node.name] = summary
+
+    queries = []
+    for name, paths in sorted(definitions.items()):
+        # Names defined in several files have no single right answer.
+        if len(paths) != 1:
+            continue
+        (file_path,) = paths
+        queries.append(Query(name, "identifier", file_path))
+        if name in descriptions:
+            queries.append(Query(descriptions[name], "description", file_path))
+    return queries
+
+
+def evaluate(
+    retriever: HybridRetriever, queries: list[Query], k: int
+) -> ModeResult:
+    latencies, ranks = [], []
+    hits: defaultdict[str, list[bool]] = defaultdict(list)
+    for query in queries:
+        start = time.perf_counter()
+        documents = retriever.invoke(query.text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        files = [str(doc.metadata["file_path"]) for doc in documents[:k]]
+        rank = (
+            files.index(query.file_path) + 1 if query.file_path in files else 0
+        )
+        ranks.append(1 / rank if rank else 0.0)
+        hits[query.kind].append(rank > 0)
+        hits["all"].append(rank > 0)
+
+    return ModeResult(
+        mode=retriever.mode,
+        recall={kind: sum(hit) / len(hit) for kind, hit in hits.items()},
+        mrr=sum(ranks) / len(ranks),
+        p50_ms=statistics.median(latencies),
+        p95_ms=statistics.quantiles(latencies, n=20)[-1],
+    )
+
+
+def render(results: list[ModeResult], k: int) -> str:
+    headers = (
+        "Mode",
+        f"R@{k} all",
+        f"R@{k} ident",
+        f"R@{k} desc",
+        "MRR",
+        "p50 ms",
+        "p95 ms",
+    )
+    rows = [
+        (
+            result.mode,
+            f"{result.recall.get('all', 0):.3f}",
+            f"{result.recall.get('identifier', 0):.3f}",
+            f"{result.recall.get('description', 0):.3f}",
+            f"{result.mrr:.3f}",
+            f"{result.p50_ms:.2f}",
+            f"{result.p95_ms:.2f}",
+        )
+        for result in results
+    ]
+    widths = [
+        max(len(row[i]) for row in [headers, *rows])
+        for i in range(len(headers))
+    ]
+    lines = [
+        " | ".join(cell.ljust(width) for cell, width in zip(row, widths))
+        for row in [headers, *rows]
+    ]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def main(source: str, k: int, modes: list[str]):
+    with tempfile.TemporaryDirectory() as root:
+        git_repo = create_fixture_repo(Path(root), source=source)
+        files = git_repo.list_tracked_files()
+        queries = generate_queries(git_repo.repo_path, files)
+        print(f"{len(files)} files, {len(queries)} queries")
+
+        start = time.perf_counter()
+        documents = [
+            doc
+            for docs in DocumentLoader().load_documents(git_repo.repo_path)
+            for doc in docs
+        ]
+        lexical_index = BM25Index()
+        add_lexical_documents(lexical_index, documents)
+        print(
+            f"BM25 index: {len(lexical_index)} chunks, "
+            f"{lexical_index.nbytes / 2**20:.1f} MiB, "
+            f"built in {time.perf_counter() - start:.2f}s"
+        )
+        docstore = InMemoryDocstore({doc.id: doc for doc in documents})
+
+        vector_store = None
+        if set(modes) - {"lexical"}:
+            start = time.perf_counter()
+            try:
+                manager = VectorStoreManager(
+                    git_repo, index_dir=os.path.join(root, "indexes")
+                )
+                vector_store, _ = manager.load_or_create()
+                print(
+                    f"Vector index built in {time.perf_counter() - start:.2f}s"
+                )
+            except Exception as e:
+                print(f"Skipping vector and hybrid modes: {e}")
+
+        results = []
+        for mode in modes:
+            if mode != "lexical" and vector_store is None:
+                continue
+            retriever = HybridRetriever(
+                lexical_index=lexical_index,
+                docstore=vector_store.docstore if vector_store else docstore,
+                vector_store=vector_store,
+                mode=mode,  # type: ignore
+                k=k,
+            )
+            results.append(evaluate(retriever, queries, k))
+        print(render(results, k))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--source",
+        type=str,
+        help="Directory used as the fixture repository.",
+        default=PROJECT_DIR,
+    )
+    parser.add_argument(
+        "--k", type=int, help="Number of chunks retrieved.", default=12
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=MODES,
+        help="Retrieval modes to compare.",
+        default=list(MODES),
+    )
+    parser.add_argument(
+        "--embeddings",
+        type=str,
+        help="Embeddings model as provider/model, e.g. hashing.",
+        default=CONFIG["embedder"]["model"],
+    )
+    args = parser.parse_args()
+    CONFIG["embedder"]["model"] = args.embeddings
+    main(args.source, args.k, args.modes)
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import math
+import random
+import time
+import zlib
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import (
+    ChatGeneration,
+    ChatGenerationChunk,
+    ChatResult,
+)
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from msgspec import Struct
+
+from apps.model import WikiPage, WikiStructure
+
+# 한 번에 스트리밍할 토큰 수입니다.
+STREAM_CHUNK_TOKENS = 8
+
+
+class LatencyProfile(Struct, frozen=True):
+    """Latency of a provider: log-normal time to first token, then a rate."""
+
+    ttft_median: float = 0.8
+    ttft_sigma: float = 0.4
+    tokens_per_second: float = 80.0
+
+    def sample_ttft(self, rng: random.Random) -> float:
+        if self.ttft_median <= 0:
+            return 0.0
+        return self.ttft_median * rng.lognormvariate(0, self.ttft_sigma)
+
+    def generation_seconds(self, tokens: int) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return tokens / self.tokens_per_second
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that drives the agent like a real one, without a provider.
+
+    Every request first calls a few tools on files of the repository, then
+    answers: with a `WikiStructure` over the repository's directories when
+    that tool is bound, or with markdown otherwise. Latencies are sampled
+    from `latency`, seeded by the request, so a run is reproducible no matter
+    in which order concurrent requests arrive.
+    """
+
+    model_name: str
+    files: list[str]
+    latency: Any = LatencyProfile()
+    tool_steps: int = 3
+    pages: int = 8
+    answer_tokens: int = 600
+    seed: int = 0
+    bound_tools: list[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        names = [
+            convert_to_openai_tool(tool)["function"]["name"] for tool in tools
+        ]
+        return self.model_copy(update={"bound_tools": names})
+
+    def _rng(self, messages: list[BaseMessage]) -> random.Random:
+        text = "".join(str(message.content) for message in messages)
+        return random.Random(zlib.crc32(text.encode()) ^ self.seed)
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        steps = sum(isinstance(message, AIMessage) for message in messages)
+        tools = [name for name in self.bound_tools if name != "WikiStructure"]
+        if steps < self.tool_steps and tools and self.files:
+            name = tools[steps % len(tools)]
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": name,
+                        "args": self._tool_args(name, steps),
+                        "id": f"call_{steps}_{name}",
+                    }
+                ],
+            )
+        elif "WikiStructure" in self.bound_tools:
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "WikiStructure",
+                        "args": self._structure().model_dump(),
+                        "id": f"call_{steps}_WikiStructure",
+                    }
+                ],
+            )
+        else:
+            message = AIMessage(content=self._markdown(messages))
+
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        output_tokens = max(1, len(str(message.content).split()))
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return message
+
+    def _tool_args(self, name: str, step: int) -> dict[str, Any]:
+        file = self.files[step % len(self.files)]
+        match name:
+            case "list_files":
+                return {"dir_path": str(PurePosixPath("/", file).parent)}
+            case "view_file_content":
+                return {"file_path": file}
+            case "semantic_search_files":
+                return {"query": PurePosixPath(file).stem.replace("_", " ")}
+            case "code_index_search":
+                return {"symbol": PurePosixPath(file).stem}
+        return {}
+
+    def _structure(self) -> WikiStructure:
+        # 파일을 순서대로 `pages`개의 묶음으로 나눠 페이지마다 배정합니다.
+        size = math.ceil(len(self.files) / self.pages) if self.files else 1
+        pages = []
+        for i in range(0, len(self.files), size):
+            files = self.files[i : i + size]
+            name = PurePosixPath(files[0]).stem
+            pages.append(
+                WikiPage(
+                    path=f"/{name}.md",
+                    title=name.replace("_", " ").title(),
+                    description=f"How {', '.join(files[:3])} work together.",
+                    relevant_files=files[:5],
+                )
+            )
+        return WikiStructure(title="Benchmark wiki", pages=pages)
+
+    def _markdown(self, messages: list[BaseMessage]) -> str:
+        rng = self._rng(messages)
+        words = [PurePosixPath(file).stem for file in self.files or ["module"]]
+        body = " ".join(rng.choice(words) for _ in range(self.answer_tokens))
+        return f"# Page\n\n{body}"
+
+    def _chunks(self, message: AIMessage) -> Iterator[AIMessageChunk]:
+        if message.tool_calls or not isinstance(message.content, str):
+            yield AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=[
+                    {
+                        "name": tool_call["name"],
+                        "args": json.dumps(tool_call["args"]),
+                        "id": tool_call["id"],
+                        "index": i,
+                    }
+                    for i, tool_call in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+            )
+            return
+        words = message.content.split(" ")
+        for i in range(0, len(words), STREAM_CHUNK_TOKENS):
+            last = i + STREAM_CHUNK_TOKENS >= len(words)
+            text = " ".join(words[i : i + STREAM_CHUNK_TOKENS])
+            yield AIMessageChunk(
+                content=text if i == 0 else f" {text}",
+                usage_metadata=message.usage_metadata if last else None,
+            )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._respond(messages)
+        time.sleep(self._seconds(messages, message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._respond(messages)
+        await asyncio.sleep(self._seconds(messages, message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._respond(messages)
+        time.sleep(self.latency.sample_ttft(self._rng(messages)))
+        for chunk in self._chunks(message):
+            time.sleep(self._chunk_seconds(chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency.sample_ttft(self._rng(messages)))
+        for chunk in self._chunks(message):
+            await asyncio.sleep(self._chunk_seconds(chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    def _seconds(
+        self, messages: list[BaseMessage], message: AIMessage
+    ) -> float:
+        tokens = (message.usage_metadata or {}).get("output_tokens", 0)
+        return self.latency.sample_ttft(
+            self._rng(messages)
+        ) + self.latency.generation_seconds(tokens)
+
+    def _chunk_seconds(self, chunk: AIMessageChunk) -> float:
+        tokens = len(str(chunk.content).split()) or 1
+        return self.latency.generation_seconds(tokens)
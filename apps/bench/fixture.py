@@ -0,0 +1,58 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+from apps.git import GitRepository
+from apps.settings import PROJECT_DIR
+
+FIXTURE_REPOSITORY = "local/fixture"
+
+
+def create_fixture_repo(
+    root: Path,
+    source: str = PROJECT_DIR,
+    repository: str = FIXTURE_REPOSITORY,
+) -> GitRepository:
+    """
+    네트워크 없이 사용할 수 있는 로컬 Repository를 만듭니다.
+    `source` 디렉토리를 bare origin에 push한 뒤 clone합니다.
+
+    Args:
+        root (Path): Repository를 만들 빈 디렉토리
+        source (str): Repository의 내용으로 사용할 디렉토리
+        repository (str): Repository 이름 (owner/repo)
+
+    Returns:
+        GitRepository: local-only 모드의 Repository
+    """
+    origin, work = root / "origin.git", root / "work"
+    repo_dir = root / "repos"
+
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test"]
+            + list(args),
+            check=True,
+            capture_output=True,
+        )
+
+    shutil.copytree(
+        source,
+        work,
+        ignore=shutil.ignore_patterns(
+            "repos", "indexes", "wikis", "test", "__pycache__"
+        ),
+    )
+    git("init", "--bare", "-b", "main", str(origin))
+    git("-C", str(work), "init", "-b", "main")
+    git("-C", str(work), "add", ".")
+    git("-C", str(work), "commit", "-m", "initial commit")
+    git("-C", str(work), "push", str(origin), "main")
+    git("clone", str(origin), str(repo_dir / repository))
+
+    return GitRepository(
+        repository=repository,
+        pat=None,
+        repo_dir=str(repo_dir),
+        local_only=True,
+    )
@@ -0,0 +1,111 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from msgspec import Struct
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats(Struct):
+    name: str
+    hits: int = 0
+    misses: int = 0
+    # Requests that waited for an identical request already in flight.
+    coalesced: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        return (
+            (self.hits + self.coalesced) / self.requests
+            if self.requests
+            else 0.0
+        )
+
+    def render(self) -> str:
+        return (
+            f"{self.name}: {self.hit_rate:.1%} hit rate "
+            f"({self.hits} hits, {self.coalesced} coalesced, "
+            f"{self.misses} misses)"
+        )
+
+
+class AsyncLRUCache(Generic[K, V]):
+    """
+    LRU cache that also coalesces concurrent computations of the same key.
+
+    While a value is being computed, other callers asking for the same key
+    wait for that computation instead of starting their own.
+    """
+
+    def __init__(self, name: str, max_entries: int):
+        self.max_entries = max_entries
+        self.stats = CacheStats(name=name)
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._inflight: dict[K, asyncio.Future[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key: K, value: V):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_or_call(self, key: K, compute: Callable[[], V]) -> V:
+        """Synchronous variant of `get_or_compute` without coalescing."""
+        if key in self._entries:
+            self.stats.hits += 1
+            return self.get(key)  # type: ignore
+        self.stats.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    async def get_or_compute(
+        self, key: K, compute: Callable[[], Awaitable[V]]
+    ) -> V:
+        if key in self._entries:
+            self.stats.hits += 1
+            return self.get(key)  # type: ignore
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting, so mark a failure as retrieved.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        self.put(key, value)
+        return value
@@ -0,0 +1,273 @@
+import ast
+import hashlib
+import io
+import os
+from typing import Iterator, TextIO
+
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+from apps.settings import CONFIG
+
+_LANGUAGES = {
+    ".py": Language.PYTHON,
+    ".js": Language.JS,
+    ".mjs": Language.JS,
+    ".cjs": Language.JS,
+    ".jsx": Language.JS,
+    ".ts": Language.TS,
+    ".tsx": Language.TS,
+    ".java": Language.JAVA,
+    ".c": Language.C,
+    ".h": Language.C,
+    ".cpp": Language.CPP,
+    ".cc": Language.CPP,
+    ".hpp": Language.CPP,
+    ".go": Language.GO,
+    ".rs": Language.RUST,
+    ".html": Language.HTML,
+    ".xml": Language.HTML,
+    ".php": Language.PHP,
+    ".swift": Language.SWIFT,
+    ".cs": Language.CSHARP,
+    ".kt": Language.KOTLIN,
+    ".rb": Language.RUBY,
+    ".scala": Language.SCALA,
+    ".lua": Language.LUA,
+    ".sol": Language.SOL,
+    ".proto": Language.PROTO,
+    ".md": Language.MARKDOWN,
+    ".mdx": Language.MARKDOWN,
+    ".rst": Language.RST,
+    ".tex": Language.LATEX,
+}
+
+# 들여쓰기가 얕은 줄(상위 key, section)부터 나눕니다.
+_STRUCTURED_EXTENSIONS = {".json", ".yaml", ".yml", ".toml", ".ini", ".cfg"}
+_STRUCTURED_SEPARATORS = [
+    "\n\n",
+    r"\n(?=[^\s}\]])",
+    r"\n(?=  [^\s}\]])",
+    r"\n(?=    [^\s}\]])",
+    "\n",
+    " ",
+    "",
+]
+
+
+# 파일 앞부분에서 binary/minified 여부를 판단할 크기(byte)입니다.
+SNIFF_SIZE = 8192
+# 평균 줄 길이가 이보다 길면 minified 파일로 간주합니다.
+MINIFIED_LINE_LENGTH = 500
+
+
+def sniff(prefix: bytes) -> str | None:
+    """
+    Judges from the first bytes of a file whether it is worth indexing.
+
+    Args:
+        prefix (bytes): Up to `SNIFF_SIZE` bytes from the start of the file
+
+    Returns:
+        str | None: "binary" or "minified" if the file should be skipped
+    """
+    if b"\0" in prefix:
+        return "binary"
+    try:
+        prefix.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # prefix 끝에서 잘린 multibyte 문자는 허용합니다.
+        if e.start < len(prefix) - 3:
+            return "binary"
+    lines = prefix.count(b"\n") + 1
+    if (
+        len(prefix) > 2 * MINIFIED_LINE_LENGTH
+        and len(prefix) / lines > MINIFIED_LINE_LENGTH
+    ):
+        return "minified"
+    return None
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.strip().encode(), digest_size=16).hexdigest()
+
+
+def get_splitter(
+    ext: str, chunk_size: int, chunk_overlap: int
+) -> RecursiveCharacterTextSplitter:
+    if ext in _LANGUAGES:
+        return RecursiveCharacterTextSplitter.from_language(
+            language=_LANGUAGES[ext],
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+    if ext in _STRUCTURED_EXTENSIONS:
+        return RecursiveCharacterTextSplitter(
+            separators=_STRUCTURED_SEPARATORS,
+            is_separator_regex=True,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+    # 그 밖의 텍스트는 문단, 줄, 단어 순으로 나눕니다.
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+
+def split_text(
+    content: str,
+    file_path: str,
+    chunk_size: int | None = None,
+    chunk_overlap: int | None = None,
+) -> list[str]:
+    """
+    Splits a file into chunks with a splitter chosen by its extension.
+
+    Python files are split on definition boundaries, markdown on headings,
+    structured formats on their top-level keys and other code on the
+    language's definition keywords. Unknown formats are split by paragraphs
+    and lines.
+
+    Args:
+        content (str): File content
+        file_path (str): File path, used to choose the splitter
+        chunk_size (int | None): Maximum number of characters per chunk
+        chunk_overlap (int | None): Overlap of chunks split within a block
+
+    Returns:
+        list[str]: Chunks in file order
+    """
+    chunk_size = chunk_size or CONFIG["embedder"]["chunk_size"]
+    if chunk_overlap is None:
+        chunk_overlap = CONFIG["embedder"]["chunk_overlap"]
+    ext = os.path.splitext(file_path)[1].lower()
+    splitter = get_splitter(ext, chunk_size, chunk_overlap)
+
+    if ext == ".py":
+        try:
+            return split_python(content, chunk_size, splitter)
+        except (SyntaxError, ValueError):
+            pass
+    return splitter.split_text(content)
+
+
+def split_file(
+    file: TextIO, file_path: str, window_size: int | None = None
+) -> Iterator[str]:
+    """
+    Splits a file into chunks while reading it in windows, so memory stays
+    bounded by the window size however large the file is.
+
+    A file that fits in one window is split as a whole with `split_text`.
+
+    Args:
+        file (TextIO): File opened in text mode
+        file_path (str): File path, used to choose the splitter
+        window_size (int | None): Number of characters read at a time
+
+    Yields:
+        str: Chunks in file order
+    """
+    window_size = window_size or CONFIG["embedder"]["window_size"]
+    for window in iter_windows(file, window_size):
+        yield from split_text(window, file_path)
+
+
+def iter_windows(file: TextIO, window_size: int) -> Iterator[str]:
+    """
+    Reads a text file in windows of about `window_size` characters.
+
+    Windows end before the last line that starts without indentation, so
+    top-level definitions, keys and headings are not cut in half. The text
+    after that line is carried over to the next window, so a window holds
+    less than `2 * window_size` characters.
+    """
+    carry, block = "", file.read(window_size)
+    while block:
+        text = carry + block
+        # 다음 block을 미리 읽어 마지막 window는 자르지 않습니다.
+        if not (block := file.read(window_size)):
+            cut = len(text)
+        else:
+            cut = _last_top_level_line(text)
+            if len(text) - cut > window_size:
+                # 들여쓰기 없는 줄이 없으면 마지막 줄바꿈에서 자릅니다.
+                cut = text.rfind("\n") + 1 or len(text)
+        if text[:cut].strip():
+            yield text[:cut]
+        carry = text[cut:]
+
+
+def _last_top_level_line(text: str) -> int:
+    end = len(text) - 1
+    while (i := text.rfind("\n", 0, end)) >= 0:
+        if not text[i + 1].isspace():
+            return i + 1
+        end = i
+    return 0
+
+
+def split_python(
+    content: str,
+    chunk_size: int,
+    splitter: RecursiveCharacterTextSplitter,
+) -> list[str]:
+    """
+    Splits Python source on top-level statement and definition boundaries.
+
+    Adjacent statements are packed into chunks of up to `chunk_size`
+    characters. Classes that do not fit are split into their methods, and
+    other oversized definitions fall back to `splitter`.
+    """
+    tree = ast.parse(content)
+    # ast와 같은 줄 구분(\n, \r\n, \r)을 사용합니다.
+    lines = io.StringIO(content, newline="").readlines()
+    pieces = _split_nodes(tree.body, lines, 0, len(lines), chunk_size, splitter)
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > chunk_size:
+            chunks.append(current)
+            current = ""
+        current += piece
+    chunks.append(current)
+    return [chunk.strip("\n").rstrip() for chunk in chunks if chunk.strip()]
+
+
+def _start_line(node: ast.stmt, lines: list[str]) -> int:
+    decorators = getattr(node, "decorator_list", [])
+    start = min([node.lineno] + [d.lineno for d in decorators]) - 1
+    # 정의 바로 위의 주석은 정의와 같은 chunk에 포함합니다.
+    while start > 0 and lines[start - 1].lstrip().startswith("#"):
+        start -= 1
+    return start
+
+
+def _split_nodes(
+    nodes: list[ast.stmt],
+    lines: list[str],
+    begin: int,
+    end: int,
+    chunk_size: int,
+    splitter: RecursiveCharacterTextSplitter,
+) -> list[str]:
+    if not nodes:
+        return ["".join(lines[begin:end])]
+    starts = [begin] + [_start_line(node, lines) for node in nodes[1:]]
+    ends = starts[1:] + [end]
+
+    pieces = []
+    for node, start, stop in zip(nodes, starts, ends):
+        text = "".join(lines[start:stop])
+        if len(text) <= chunk_size:
+            pieces.append(text)
+        elif isinstance(node, ast.ClassDef) and len(node.body) > 1:
+            body_start = _start_line(node.body[0], lines)
+            pieces.append("".join(lines[start:body_start]))
+            pieces.extend(
+                _split_nodes(
+                    node.body, lines, body_start, stop, chunk_size, splitter
+                )
+            )
+        else:
+            pieces.extend(chunk + "\n" for chunk in splitter.split_text(text))
+    return pieces
@@ -2,7 +2,7 @@ import msgspec
 
 from apps.git import GitRepository, Path, WikiRepository
 from apps.model import WikiConfiguration
-from apps.settings import Logger
+from apps.settings import LOCAL_ONLY, WIKI_DIR, Logger
 from apps.utils import parse_duration
 
 
@@ -12,11 +12,29 @@ class Context:
         self.config = config
         self.wiki_repo = WikiRepository(git_repo, config)
 
+    @property
+    def artifacts_dir(self) -> Path:
+        """
+        Returns where reports and profiles of a run are written, next to
+        the generated wiki but outside of the uploaded directory.
+        """
+        return Path(WIKI_DIR) / self.git_repo.repository
+
+    @property
+    def run_report_path(self) -> Path:
+        """
+        Returns where the token, cost and time report of a run is written.
+        """
+        return self.artifacts_dir / "run_report.json"
+
 
 class ContextBuilder:
     @staticmethod
     def from_file(
-        filepath: str | Path, repository: str, pat: str | None
+        filepath: str | Path,
+        repository: str,
+        pat: str | None,
+        local_only: bool = LOCAL_ONLY,
     ) -> Context:
         config = WikiConfiguration()
 
@@ -32,26 +50,33 @@ class ContextBuilder:
         except Exception as e:
             Logger.warning(f"Error loading wiki config: {e}")
 
-        return ContextBuilder.from_config(config, repository, pat)
+        return ContextBuilder.from_config(config, repository, pat, local_only)
 
     @staticmethod
     def from_data(
-        config_data: dict, repository: str, pat: str | None
+        config_data: dict,
+        repository: str,
+        pat: str | None,
+        local_only: bool = LOCAL_ONLY,
     ) -> Context:
         config = msgspec.convert(
             config_data,
             type=WikiConfiguration,
             strict=False,
         )
-        return ContextBuilder.from_config(config, repository, pat)
+        return ContextBuilder.from_config(config, repository, pat, local_only)
 
     @staticmethod
     def from_config(
-        config: WikiConfiguration, repository: str, pat: str | None
+        config: WikiConfiguration,
+        repository: str,
+        pat: str | None,
+        local_only: bool = LOCAL_ONLY,
     ) -> Context:
         git_repo = GitRepository(
             repository=repository,
             pat=pat,
+            local_only=local_only,
         )
 
         return Context(
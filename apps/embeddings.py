@@ -0,0 +1,117 @@
+import zlib
+from array import array
+from collections import Counter
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from apps.cache import AsyncLRUCache, CacheStats
+from apps.lexical import tokenize
+from apps.settings import CONFIG
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    In-process embeddings that project identifier-aware terms onto a fixed
+    number of dimensions with signed feature hashing.
+
+    Needs no model files or network, so indexes build quickly and the same
+    text always gets the same vector. Similarity is lexical: texts are close
+    when they share terms, including parts of identifiers.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> list[float]:
+        counts = Counter(tokenize(text))
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if not counts:
+            return vector.tolist()
+        hashes = np.fromiter(
+            (zlib.crc32(term.encode()) for term in counts), dtype=np.uint32
+        )
+        # 해시의 최상위 비트를 부호로 사용하여 충돌의 영향을 상쇄합니다.
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        weights = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32))
+        np.add.at(vector, hashes % self.dimensions, signs * weights)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def create_embeddings(model: str, dimensions: int) -> Embeddings:
+    """
+    Creates the embeddings client for "provider/model".
+
+    Providers:
+        openai: OpenAI embeddings API, e.g. "openai/text-embedding-3-small"
+        hashing: In-process feature hashing, no network needed
+        fake: Deterministic random vectors for tests
+    """
+    provider, _, model_name = model.partition("/")
+    match provider:
+        case "openai":
+            from langchain_openai import OpenAIEmbeddings
+
+            return OpenAIEmbeddings(model=model_name, dimensions=dimensions)
+        case "hashing":
+            return HashingEmbeddings(dimensions=dimensions)
+        case "fake":
+            return DeterministicFakeEmbedding(size=dimensions)
+    raise ValueError(f"Unknown embeddings provider: {model}")
+
+
+_query_embeddings: AsyncLRUCache[tuple[str, str], array] = AsyncLRUCache(
+    "Query embeddings", CONFIG["retriever"]["query_cache_size"]
+)
+
+
+def query_cache_stats() -> CacheStats:
+    return _query_embeddings.stats
+
+
+def normalize_query(query: str) -> str:
+    """Folds case and whitespace so near-identical queries share an entry."""
+    return " ".join(query.split()).casefold()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings that cache query vectors and coalesce identical in-flight
+    queries. Document embeddings are passed through unchanged.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str):
+        self.embeddings = embeddings
+        self.model = model
+
+    def _key(self, text: str) -> tuple[str, str]:
+        return self.model, normalize_query(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = _query_embeddings.get_or_call(
+            self._key(text),
+            lambda: array("f", self.embeddings.embed_query(text)),
+        )
+        return vector.tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        async def embed() -> array:
+            return array("f", await self.embeddings.aembed_query(text))
+
+        vector = await _query_embeddings.get_or_compute(self._key(text), embed)
+        return vector.tolist()
@@ -0,0 +1,118 @@
+from typing import Iterable
+
+from apps.settings import CONFIG
+from apps.utils import count_tokens
+
+# Entries shown per directory, tried from widest to narrowest.
+_WIDTHS = (0, 64, 32, 16, 8, 4, 2, 1)
+
+
+class _Node:
+    __slots__ = ("dirs", "files", "file_count")
+
+    def __init__(self):
+        self.dirs: dict[str, _Node] = {}
+        self.files: list[str] = []
+        self.file_count = 0
+
+
+def _files(count: int, qualifier: str = "") -> str:
+    noun = "file" if count == 1 else "files"
+    return " ".join(str(part) for part in (count, qualifier, noun) if part)
+
+
+def _build(paths: Iterable[str]) -> _Node:
+    root = _Node()
+    for path in paths:
+        *parts, name = path.strip("/").split("/")
+        node = root
+        node.file_count += 1
+        for part in parts:
+            node = node.dirs.setdefault(part, _Node())
+            node.file_count += 1
+        node.files.append(name)
+    return root
+
+
+def _render(
+    node: _Node,
+    prefix: str,
+    depth: int,
+    width: int,
+    max_depth: int,
+    lines: list[str],
+):
+    entries: list[tuple[str, _Node | None]] = [
+        (name, node.dirs[name]) for name in sorted(node.dirs)
+    ] + [(name, None) for name in sorted(node.files)]
+
+    shown = entries[:width] if width else entries
+    hidden = entries[len(shown) :]
+    hidden_files = sum(child.file_count if child else 1 for _, child in hidden)
+
+    for i, (name, child) in enumerate(shown):
+        is_last = i == len(shown) - 1 and not hidden
+        connector = "└── " if is_last else "├── "
+        if child is None:
+            lines.append(f"{prefix}{connector}{name}")
+        elif depth + 1 >= max_depth:
+            lines.append(
+                f"{prefix}{connector}{name}/ ({_files(child.file_count)})"
+            )
+        else:
+            lines.append(f"{prefix}{connector}{name}/")
+            _render(
+                child,
+                prefix + ("    " if is_last else "│   "),
+                depth + 1,
+                width,
+                max_depth,
+                lines,
+            )
+
+    if hidden:
+        lines.append(f"{prefix}└── … {_files(hidden_files, 'more')}")
+
+
+def render_file_tree(
+    paths: Iterable[str],
+    max_tokens: int | None = None,
+    max_depth: int | None = None,
+) -> str:
+    """
+    Render a list of relative file paths as a tree that fits a token budget.
+
+    Wide directories are collapsed first ("… 412 more files"), then the tree
+    depth is reduced until the rendered tree fits into `max_tokens`.
+
+    Args:
+        paths (Iterable[str]): File paths relative to the root directory.
+        max_tokens (int | None): Token budget of the rendered tree.
+        max_depth (int | None): Maximum depth of directories to expand.
+
+    Returns:
+        str: Rendered file tree
+    """
+    max_tokens = max_tokens or CONFIG["file_tree"]["max_tokens"]
+    max_depth = max_depth or CONFIG["file_tree"]["max_depth"]
+
+    root = _build(paths)
+    if root.file_count == 0:
+        return "/"
+
+    levels = [(width, max_depth) for width in _WIDTHS] + [
+        (1, depth) for depth in range(max_depth - 1, 0, -1)
+    ]
+
+    tree = "/"
+    for width, depth in levels:
+        lines = ["/"]
+        _render(root, "", 0, width, depth, lines)
+        tree = "\n".join(lines)
+        # A token is rarely shorter than 1/8 of its characters, so skip
+        # tokenizing levels that obviously do not fit.
+        if len(tree) > max_tokens * 8:
+            continue
+        if count_tokens(tree) <= max_tokens:
+            break
+    return tree
@@ -1,18 +1,23 @@
-import os
+import heapq
+import math
 import shutil
 import subprocess
+import tempfile
+import time
 from collections import Counter
 from datetime import datetime
 from enum import Enum
+from functools import cache, cached_property
 from pathlib import Path
 from typing import Self
 
-from directory_tree import DisplayTree
-from github import Auth, Github
+from msgspec import Struct
 
+from apps.file_tree import render_file_tree
 from apps.model import WikiConfiguration
-from apps.settings import IS_TEST, REPO_DIR, Logger
-from apps.utils import normalize_path
+from apps.settings import CONFIG, IS_TEST, LOCAL_ONLY, REPO_DIR, Logger
+from apps.tracing import span
+from apps.utils import is_included_file, normalize_path
 
 
 class ChangeMode(Enum):
@@ -21,59 +26,258 @@ class ChangeMode(Enum):
     DELETED = "D"
 
 
+# HEAD 또는 현재 branch를 변경할 수 있는 git 명령어 목록입니다.
+MUTATING_COMMANDS = frozenset(
+    {
+        "am",
+        "checkout",
+        "cherry-pick",
+        "commit",
+        "merge",
+        "pull",
+        "rebase",
+        "reset",
+        "revert",
+        "switch",
+    }
+)
+
+
+class RepositoryState(Struct, frozen=True):
+    """Repository 상태의 스냅샷입니다. HEAD를 변경하는 git 명령이 실행되면 갱신됩니다."""
+
+    owner: str
+    repo: str
+    path: Path
+    default_branch: str
+    commit_hash: str
+    branch: str
+
+
+class FileChurn(Struct):
+    """파일의 변경 이력 지표입니다."""
+
+    path: str
+    commits: int = 0
+    lines_changed: int = 0
+    weighted_churn: float = 0.0
+
+
+class RepositoryMetadata(Struct, frozen=True):
+    """GitHub Repository의 메타데이터입니다."""
+
+    owner: str
+    repo: str
+    default_branch: str
+    clone_url: str
+
+
+class LocalRepositoryNotFoundError(Exception):
+    """
+    Exception raised when local-only mode is used without an existing clone.
+    """
+
+    pass
+
+
 def is_git_repo(path: str | Path) -> bool:
     repo_path = Path(path) if isinstance(path, str) else path
     return repo_path.exists() and (repo_path / ".git").exists()
 
 
+@cache
+def fetch_metadata(repository: str, pat: str | None) -> RepositoryMetadata:
+    """
+    GitHub API로 Repository 메타데이터를 가져옵니다.
+    같은 Repository에 대한 결과는 프로세스 내에서 공유됩니다.
+
+    Args:
+        repository (str): owner/name 형식의 Repository 이름
+        pat (str | None): GitHub Personal Access Token
+
+    Returns:
+        RepositoryMetadata: Repository 메타데이터
+    """
+    from github import Auth, Github
+
+    auth = Auth.Token(pat) if pat else None
+    gh_repo = Github(auth=auth).get_repo(repository)
+    return RepositoryMetadata(
+        owner=gh_repo.owner.login,
+        repo=gh_repo.name,
+        default_branch=gh_repo.default_branch,
+        clone_url=gh_repo.clone_url,
+    )
+
+
+@cache
+def infer_local_metadata(repository: str, repo_dir: str) -> RepositoryMetadata:
+    """
+    이미 clone된 Repository에서 메타데이터를 추론합니다. 네트워크를 사용하지 않습니다.
+
+    Args:
+        repository (str): owner/name 형식의 Repository 이름
+        repo_dir (str): Repository가 clone된 상위 디렉토리
+
+    Raises:
+        LocalRepositoryNotFoundError: clone된 Repository가 없는 경우
+
+    Returns:
+        RepositoryMetadata: Repository 메타데이터
+    """
+    owner, repo = repository.split("/")
+    repo_path = Path(repo_dir) / owner / repo
+    if not is_git_repo(repo_path):
+        raise LocalRepositoryNotFoundError(
+            f"Local-only mode requires an existing clone at {repo_path}."
+        )
+
+    def git(*args: str) -> str | None:
+        with span(f"git {args[0]}", "git"):
+            result = subprocess.run(
+                ["git", "-C", repo_path, *args],
+                capture_output=True,
+                text=True,
+            )
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    # origin/HEAD가 없는 경우 현재 branch를 기본 branch로 간주합니다.
+    origin_head = git("symbolic-ref", "--short", "refs/remotes/origin/HEAD")
+    default_branch = (
+        origin_head.removeprefix("origin/")
+        if origin_head
+        else git("rev-parse", "--abbrev-ref", "HEAD") or "main"
+    )
+    return RepositoryMetadata(
+        owner=owner,
+        repo=repo,
+        default_branch=default_branch,
+        clone_url=git("remote", "get-url", "origin") or str(repo_path),
+    )
+
+
+def fetch_last_commit_time(
+    repository: str, pat: str | None, path: str | None = None
+) -> datetime | None:
+    """
+    GitHub API로 기본 branch의 마지막 commit 시간을 가져옵니다.
+
+    Args:
+        repository (str): owner/name 형식의 Repository 이름
+        pat (str | None): GitHub Personal Access Token
+        path (str | None): 이 경로를 변경한 commit만 조회합니다.
+
+    Returns:
+        datetime | None: 로컬 시간대 기준 마지막 commit 시간
+    """
+    from github import Auth, Github
+
+    auth = Auth.Token(pat) if pat else None
+    gh_repo = Github(auth=auth).get_repo(repository, lazy=True)
+    commits = gh_repo.get_commits(path=path) if path else gh_repo.get_commits()
+    commit = next(iter(commits), None)
+    if commit is None:
+        return None
+    return commit.commit.committer.date.astimezone().replace(tzinfo=None)
+
+
 class GitRepository:
     def __init__(
         self,
         repository: str,
         pat: str | None,
         repo_dir: str = REPO_DIR,
+        local_only: bool = LOCAL_ONLY,
     ):
         self.pat = pat
         self.repo_dir = repo_dir
         self.repository = repository
-
-        auth = Auth.Token(pat) if pat else None
-        self._gh = Github(auth=auth)
-        p = self._gh.get_user()
-        self._repo = self._gh.get_repo(self.repository)
+        self.local_only = local_only
+        self._state: RepositoryState | None = None
+        # HEAD 스냅샷 단위로 캐시되는 값입니다.
+        self._tracked_files: tuple[RepositoryState, frozenset[str]] | None
+        self._tracked_files = None
+        self._file_tree: tuple[RepositoryState, int | None, str] | None = None
+
+    @cached_property
+    def metadata(self) -> RepositoryMetadata:
+        """
+        Returns the metadata of the repository.
+        Looked up lazily, from the existing clone in local-only mode.
+        """
+        if self.local_only:
+            return infer_local_metadata(self.repository, str(self.repo_dir))
+        return fetch_metadata(self.repository, self.pat)
 
     @property
     def repo(self) -> str:
         """
         Returns the name of the repository.
         """
-        return self._repo.name
+        return self.metadata.repo
 
     @property
     def owner(self) -> str:
         """
         Returns the owner of the repository.
         """
-        return self._repo.owner.login
+        return self.metadata.owner
+
+    @property
+    def default_branch(self) -> str:
+        """
+        Returns the default branch of the repository.
+        """
+        return self.metadata.default_branch
 
     @property
     def branch(self) -> str:
         """
         Returns the current branch of the repository.
         """
+        return self.state.branch
+
+    @property
+    def state(self) -> RepositoryState:
+        """
+        Returns the memoized snapshot of the repository state.
+        """
+        if self._state is None:
+            return self.refresh()
+        return self._state
+
+    def refresh(self) -> RepositoryState:
+        """
+        Repository 상태 스냅샷을 다시 계산합니다.
+
+        Returns:
+            RepositoryState: 갱신된 Repository 상태
+        """
+        # 하나의 git 프로세스로 HEAD sha와 branch를 함께 가져옵니다.
         result = self.exec(
-            ["rev-parse", "--abbrev-ref", "HEAD"],
+            ["rev-parse", "HEAD", "--abbrev-ref", "HEAD"],
             capture_output=True,
             text=True,
         )
-        return result.stdout.strip()
+        commit_hash, branch = result.stdout.split()
+        self._state = RepositoryState(
+            owner=self.owner,
+            repo=self.repo,
+            path=self.repo_path,
+            default_branch=self.default_branch,
+            commit_hash=commit_hash,
+            branch=branch,
+        )
+        return self._state
 
     def exec(self, args: list[str], **kwargs) -> subprocess.CompletedProcess:
         base_args = ["git", "-C", self.repo_path]
-        result = subprocess.run(
-            base_args + args,
-            **kwargs,
-        )
+        command = next((arg for arg in args if not arg.startswith("-")), None)
+        with span(f"git {command}", "git"):
+            result = subprocess.run(
+                base_args + args,
+                **kwargs,
+            )
         if result.returncode != 0:
             Logger.error(
                 f"Git command failed {result.args}: {result.stderr or result.stdout}"
@@ -84,6 +288,8 @@ class GitRepository:
                 output=result.stdout,
                 stderr=result.stderr,
             )
+        if command in MUTATING_COMMANDS:
+            self._state = None  # 다음 접근 시 스냅샷을 다시 계산합니다.
         return result
 
     @property
@@ -91,16 +297,43 @@ class GitRepository:
         """
         Returns the path to the local repository.
         """
-        return Path(self.repo_dir) / self._repo.owner.login / self._repo.name
+        return Path(self.repo_dir) / self.owner / self.repo
 
     @property
     def commit_hash(self) -> str:
-        result = self.exec(
-            ["rev-parse", "HEAD"],
-            capture_output=True,
-            text=True,
-        )
-        return result.stdout.strip()
+        return self.state.commit_hash
+
+    @property
+    def remote_url(self) -> str:
+        """
+        Returns the clone URL, authenticated with the PAT if given.
+        """
+        url = self.metadata.clone_url
+        if self.pat:
+            url = url.replace("https://", f"https://{self.pat}@")
+        return url
+
+    def get_remote_commit_hash(self, branch: str | None = None) -> str | None:
+        """
+        clone하지 않고 원격 branch의 HEAD commit hash를 가져옵니다. (git ls-remote)
+
+        Args:
+            branch (str | None): 조회할 branch. 설정하지 않을 경우 기본 branch를 조회합니다.
+
+        Returns:
+            str | None: commit hash. branch가 없는 경우 None
+        """
+        branch = branch or self.default_branch
+        with span("git ls-remote", "git"):
+            result = subprocess.run(
+                ["git", "ls-remote", self.remote_url, f"refs/heads/{branch}"],
+                capture_output=True,
+                text=True,
+                timeout=30,
+                check=True,
+            )
+        line = result.stdout.strip()
+        return line.split()[0] if line else None
 
     def clone(self) -> Self:
         """
@@ -114,19 +347,17 @@ class GitRepository:
             return self
 
         # repository가 없으므로 clone한다.
-        url = self._repo.clone_url
-        if self.pat:
-            url = url.replace("https://", f"https://{self.pat}@")
-
-        subprocess.run(
-            [
-                "git",
-                "clone",
-                url,
-                self.repo_path,
-            ],
-            check=True,
-        )
+        with span("git clone", "git"):
+            subprocess.run(
+                [
+                    "git",
+                    "clone",
+                    self.remote_url,
+                    self.repo_path,
+                ],
+                check=True,
+            )
+        self._state = None
 
         return self
 
@@ -137,7 +368,7 @@ class GitRepository:
         Raises:
             subprocess.CalledProcessError: git checkout이 실패한 경우
         """
-        branch = branch or self._repo.default_branch
+        branch = branch or self.default_branch
         self.exec(["fetch", "--all"])
         self.exec(["checkout", branch])
         return self
@@ -153,6 +384,151 @@ class GitRepository:
         self.exec(["pull", "--rebase=true"])
         return self
 
+    def stream(self, args: list[str], chunk_size: int = 1 << 16):
+        """
+        git 명령의 NUL(-z) 구분 출력을 전체를 메모리에 올리지 않고 순차적으로 읽습니다.
+
+        Args:
+            args (list[str]): git 명령 인자. NUL 구분 출력(-z)을 사용해야 합니다.
+            chunk_size (int): 한 번에 읽을 바이트 크기
+
+        Yields:
+            str: NUL로 구분된 각 레코드
+
+        Raises:
+            subprocess.CalledProcessError: git 명령이 실패한 경우
+        """
+        base_args = ["git", "-C", self.repo_path]
+        command = next((arg for arg in args if not arg.startswith("-")), None)
+        # stderr를 pipe로 받으면 stdout을 읽는 동안 buffer가 차서 멈출 수 있으므로
+        # 임시 파일에 기록합니다.
+        with (
+            span(f"git {command}", "git"),
+            tempfile.TemporaryFile() as stderr_file,
+        ):
+            process = subprocess.Popen(
+                base_args + args,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+            )
+            assert process.stdout is not None
+            try:
+                remainder = b""
+                while chunk := process.stdout.read(chunk_size):
+                    records = (remainder + chunk).split(b"\0")
+                    remainder = records.pop()
+                    for record in records:
+                        yield record.decode("utf-8", errors="replace")
+                if remainder:
+                    yield remainder.decode("utf-8", errors="replace")
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+        if returncode != 0:
+            Logger.error(f"Git command failed {process.args}: {stderr!r}")
+            raise subprocess.CalledProcessError(
+                returncode=returncode, cmd=process.args, stderr=stderr
+            )
+
+    def list_tracked_files(self) -> frozenset[str]:
+        """
+        현재 작업 트리에 존재하는 추적 파일 목록을 가져옵니다.
+        ignore_patterns로 삭제된 파일은 제외되며, 결과는 HEAD 스냅샷 단위로 캐시됩니다.
+
+        Returns:
+            frozenset[str]: Repository 기준 상대 경로 목록
+        """
+        state = self.state
+        if self._tracked_files and self._tracked_files[0] is state:
+            return self._tracked_files[1]
+
+        deleted = set(self.stream(["ls-files", "-z", "--deleted"]))
+        files = frozenset(
+            file
+            for file in self.stream(["ls-files", "-z"])
+            if file and file not in deleted
+        )
+        self._tracked_files = (state, files)
+        return files
+
+    def get_file_churn(
+        self,
+        since: str | None = None,
+        half_life_days: float = 30.0,
+        filter_exists: bool = False,
+    ) -> dict[str, FileChurn]:
+        """
+        Repository의 파일별 churn 지표를 계산합니다.
+        `git log -z --numstat` 출력을 스트리밍으로 파싱하므로 로그 크기와 무관하게 메모리 사용량이 일정합니다.
+
+        가중 churn은 commit마다 log(1 + 변경된 라인 수)에 최근성 감쇠
+        0.5 ** (경과일 / half_life_days)를 곱하여 누적합니다.
+
+        Args:
+            since (str): 최근 몇개월 전부터의 commit을 가져올지 설정합니다. e.g "3 months ago"
+            half_life_days (float): 가중치가 절반이 되는 기간(일)입니다.
+            filter_exists (bool): True일 경우, 현재 추적중인 파일만 가져옵니다.
+
+        Returns:
+            dict[str, FileChurn]: 파일 경로별 churn 지표
+        """
+        args = ["log", "-z", "--numstat", "--no-renames", "--format=%ct"]
+        if since:
+            args += ["--since", since]
+
+        tracked = self.list_tracked_files() if filter_exists else None
+        now = time.time()
+        decay = 1.0
+
+        churn: dict[str, FileChurn] = {}
+        for record in self.stream(args):
+            record = record.lstrip("\n")
+            if not record:
+                continue
+            if "\t" not in record:
+                # numstat 레코드가 아니면 commit 시간입니다.
+                age_days = max(now - int(record), 0) / 86400
+                decay = 0.5 ** (age_days / half_life_days)
+                continue
+
+            added, deleted, file = record.split("\t", 2)
+            if tracked is not None and file not in tracked:
+                continue
+            # 바이너리 파일은 "-"로 표시됩니다.
+            lines = sum(int(n) for n in (added, deleted) if n != "-")
+
+            item = churn.get(file)
+            if item is None:
+                item = churn[file] = FileChurn(path=file)
+            item.commits += 1
+            item.lines_changed += lines
+            item.weighted_churn += math.log1p(lines) * decay
+        return churn
+
+    def get_hotspot_files(
+        self,
+        since: str | None = None,
+        top_n: int = 10,
+        filter_exists: bool = True,
+    ) -> list[FileChurn]:
+        """
+        가중 churn이 가장 높은 파일을 가져옵니다.
+
+        Args:
+            since (str): 최근 몇개월 전부터의 commit을 가져올지 설정합니다. e.g "3 months ago"
+            top_n (int): 가져올 파일의 개수를 설정합니다.
+            filter_exists (bool): True일 경우, 현재 추적중인 파일만 가져옵니다.
+
+        Returns:
+            list[FileChurn]: 가중 churn 내림차순으로 정렬된 파일 목록
+        """
+        churn = self.get_file_churn(since=since, filter_exists=filter_exists)
+        return heapq.nlargest(
+            top_n, churn.values(), key=lambda item: item.weighted_churn
+        )
+
     def get_most_updated_files(
         self,
         since: str | None = None,
@@ -170,21 +546,10 @@ class GitRepository:
         Returns:
             list[tuple[str, int]]: 가장 많이 수정된 파일, 수정횟수 목록
         """
-        args = ["log", "--name-only", "--pretty=format:"]
-        if since:
-            args += ["--since", since]
-        result = self.exec(
-            args,
-            capture_output=True,
-            text=True,
+        churn = self.get_file_churn(since=since, filter_exists=filter_exists)
+        file_count = Counter(
+            {file: item.commits for file, item in churn.items()}
         )
-        files = [
-            file
-            for file in result.stdout.splitlines()
-            if file
-            and (not filter_exists or (Path(self.repo_path) / file).exists())
-        ]
-        file_count = Counter(files)
         return file_count.most_common(top_n)
 
     def download(
@@ -209,24 +574,78 @@ class GitRepository:
                 elif path.is_dir():
                     shutil.rmtree(path)
 
-    def get_file_tree(self) -> str:
+        self.refresh()
+
+    def get_file_tree(self, max_tokens: int | None = None) -> str:
         """
         Repository의 파일 트리를 가져옵니다.
+        인덱싱 대상 파일만 포함하며, 토큰 예산을 넘지 않도록 넓은 디렉토리는 요약됩니다.
+        결과는 HEAD 스냅샷 단위로 캐시됩니다.
+
+        Args:
+            max_tokens (int | None): 파일 트리의 최대 토큰 수
 
         Returns:
             str: Repository의 파일 트리
         """
-        tree = (
-            DisplayTree(
-                dirPath=self.repo_path,
-                maxDepth=6,
-                stringRep=True,
-            )
-            or "."
+        state = self.state
+        if self._file_tree and self._file_tree[:2] == (state, max_tokens):
+            return self._file_tree[2]
+
+        file_filters = CONFIG["file_filters"]
+        extensions = (
+            file_filters["code_extensions"] + file_filters["doc_extensions"]
         )
-        tree = tree.replace(f"{self.repo}/", "/")
+        files = [
+            file
+            for file in self.list_tracked_files()
+            if is_included_file(
+                file,
+                extensions,
+                file_filters["excluded_dirs"],
+                file_filters["excluded_files"],
+            )
+        ]
+        tree = render_file_tree(files, max_tokens=max_tokens)
+        self._file_tree = (state, max_tokens, tree)
         return tree
 
+    def grep_files(self, terms: list[str]) -> list[tuple[str, int]]:
+        """
+        검색어가 포함된 파일을 git grep으로 찾습니다. (대소문자 무시, 바이너리 제외)
+
+        Args:
+            terms (list[str]): 검색어 목록. 하나라도 포함된 라인을 찾습니다.
+
+        Returns:
+            list[tuple[str, int]]: 파일 경로, 일치한 라인 수 목록 (라인 수 내림차순)
+        """
+        if not terms:
+            return []
+        patterns = [arg for term in terms for arg in ("-e", term)]
+        args = ["grep", "-I", "-i", "-F", "-c", "-z", *patterns]
+        with span("git grep", "git"):
+            result = subprocess.run(
+                ["git", "-C", self.repo_path, *args],
+                capture_output=True,
+                text=True,
+            )
+        # git grep은 일치하는 항목이 없으면 1을 반환합니다.
+        if result.returncode == 1:
+            return []
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(
+                returncode=result.returncode,
+                cmd=result.args,
+                output=result.stdout,
+                stderr=result.stderr,
+            )
+        matches = []
+        for line in result.stdout.splitlines():
+            file, _, count = line.partition("\0")
+            matches.append((file, int(count)))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
     def list_diff_files(self, commit_hash: str):
         """
         Repository의 commit hash에 대한 diff 파일 목록을 가져옵니다.
@@ -253,15 +672,43 @@ class GitRepository:
 class WikiRepository(GitRepository):
     def __init__(self, base: GitRepository, config: WikiConfiguration):
         repository = config.wiki.repository or base.repository
-        owner, repo = repository.split("/")
         super().__init__(
             repository=repository,
             pat=base.pat,
+            repo_dir=base.repo_dir,
+            local_only=base.local_only,
         )
         self._base_repo = base
-        self.wiki_path = base.repo_path / normalize_path(
-            config.wiki.directory or "/"
-        )
+        self.wiki_directory = normalize_path(config.wiki.directory or "/")
+
+    @property
+    def wiki_path(self) -> Path:
+        """
+        Returns the directory where the wiki files are generated.
+        """
+        return self._base_repo.repo_path / self.wiki_directory
+
+    def fetch_last_commit_time(self) -> datetime | None:
+        """
+        clone하지 않고 Wiki 디렉토리의 마지막 commit 시간을 가져옵니다.
+        이미 clone된 경우 로컬 Repository를, 그렇지 않으면 GitHub API를 사용합니다.
+
+        Returns:
+            datetime | None: 마지막 commit 시간. 알 수 없는 경우 None
+        """
+        if is_git_repo(self.repo_path):
+            return self.get_last_commit_time()
+        if self.local_only:
+            return None
+        try:
+            return fetch_last_commit_time(
+                self.repository,
+                self.pat,
+                path=self.wiki_directory or None,
+            )
+        except Exception as e:
+            Logger.error(f"Failed to fetch last commit time: {e}")
+            return None
 
     def upload(self):
         """
@@ -275,7 +722,7 @@ class WikiRepository(GitRepository):
 
         self.exec(["add", "."])
         self.exec(["commit", "-m", message])
-        self.exec(["push", "origin", self._repo.default_branch])
+        self.exec(["push", "origin", self.default_branch])
 
     def get_last_commit_time(self) -> datetime | None:
         """
@@ -286,11 +733,7 @@ class WikiRepository(GitRepository):
         """
         try:
             # git --no-pager log -1 --format="%ci" apps/
-            path = (
-                os.path.relpath(self.wiki_path, self.repo_path)
-                if str(self.wiki_path) == self.repo_path
-                else "."
-            )
+            path = self.wiki_directory or "."
             result = self.exec(
                 ["--no-pager", "log", "-1", "--format=%cd", path],
                 capture_output=True,
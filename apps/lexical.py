@@ -0,0 +1,178 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Iterable
+
+import msgspec
+from msgspec import Struct
+
+# 한글이나 악센트가 있는 단어도 용어가 되도록 Unicode 문자를 사용합니다.
+_WORD = re.compile(r"[^\W\d]\w*|\d+")
+_SUBWORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lowercase terms for the lexical index.
+
+    Identifiers are kept whole and also split on snake_case and camelCase
+    boundaries, so "getFileChurn" matches "get_file_churn", "file churn" and
+    the exact identifier. Words in any script are terms; only ASCII pieces
+    are split on camelCase.
+    """
+    terms = []
+    for word in _WORD.findall(text):
+        terms.append(word.lower())
+        parts = [
+            part.lower()
+            for piece in word.split("_")
+            if piece
+            for part in (
+                _SUBWORD.findall(piece) if piece.isascii() else [piece]
+            )
+        ]
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+class _Snapshot(Struct):
+    doc_ids: list[str]
+    doc_lengths: list[int]
+    postings: dict[str, dict[int, int]]
+
+
+class BM25Index:
+    """
+    In-memory inverted index scored with Okapi BM25.
+
+    Documents are identified by the same ids as in the vector store, so the
+    two indexes can be updated together and their results fused. Postings
+    refer to documents by number to keep the index small.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # Document number -> id ("" once deleted) and length in terms.
+        self.doc_ids: list[str] = []
+        self.doc_lengths: list[int] = []
+        # term -> {document number: term frequency}
+        self.postings: dict[str, dict[int, int]] = {}
+        self.total_length = 0
+        self._numbers: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._numbers
+
+    @property
+    def nbytes(self) -> int:
+        """Rough estimate of the memory held by the index."""
+        postings = sum(len(docs) for docs in self.postings.values())
+        return postings * 64 + len(self.doc_ids) * 96
+
+    def add(self, doc_id: str, text: str):
+        if doc_id in self._numbers:
+            self.delete([doc_id])
+        terms = tokenize(text)
+        number = len(self.doc_ids)
+        for term, tf in Counter(terms).items():
+            self.postings.setdefault(term, {})[number] = tf
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(terms))
+        self.total_length += len(terms)
+        self._numbers[doc_id] = number
+
+    def delete(self, doc_ids: Iterable[str]) -> int:
+        """
+        Deletes documents with a single pass over the postings.
+
+        Returns:
+            int: Number of documents deleted.
+        """
+        numbers = set()
+        for doc_id in doc_ids:
+            number = self._numbers.pop(doc_id, None)
+            if number is not None:
+                numbers.add(number)
+                self.total_length -= self.doc_lengths[number]
+                self.doc_ids[number] = ""
+                self.doc_lengths[number] = 0
+        if not numbers:
+            return 0
+        for term in list(self.postings):
+            docs = self.postings[term]
+            for number in numbers.intersection(docs):
+                del docs[number]
+            if not docs:
+                del self.postings[term]
+        return len(numbers)
+
+    def search(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        """
+        Returns up to `k` (doc_id, score) pairs, best first.
+        """
+        n = len(self._numbers)
+        if n == 0:
+            return []
+        avg_length = self.total_length / n or 1.0
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for number, tf in docs.items():
+                norm = self.k1 * (
+                    1 - self.b + self.b * self.doc_lengths[number] / avg_length
+                )
+                score = idf * tf * (self.k1 + 1) / (tf + norm)
+                scores[number] = scores.get(number, 0.0) + score
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.doc_ids[number], score) for number, score in best]
+
+    def _compact(self):
+        """Renumbers documents to drop the slots of deleted documents."""
+        if len(self.doc_ids) == len(self._numbers):
+            return
+        renumber = {}
+        doc_ids, doc_lengths = [], []
+        for number, doc_id in enumerate(self.doc_ids):
+            if doc_id:
+                renumber[number] = len(doc_ids)
+                doc_ids.append(doc_id)
+                doc_lengths.append(self.doc_lengths[number])
+        self.postings = {
+            term: {renumber[number]: tf for number, tf in docs.items()}
+            for term, docs in self.postings.items()
+        }
+        self.doc_ids, self.doc_lengths = doc_ids, doc_lengths
+        self._numbers = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+
+    def save(self, path: str):
+        self._compact()
+        snapshot = _Snapshot(
+            doc_ids=self.doc_ids,
+            doc_lengths=self.doc_lengths,
+            postings=self.postings,
+        )
+        with open(path, "wb") as f:
+            f.write(msgspec.msgpack.encode(snapshot))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "rb") as f:
+            snapshot = msgspec.msgpack.decode(f.read(), type=_Snapshot)
+        index = cls()
+        index.doc_ids = snapshot.doc_ids
+        index.doc_lengths = snapshot.doc_lengths
+        index.postings = snapshot.postings
+        index.total_length = sum(snapshot.doc_lengths)
+        index._numbers = {
+            doc_id: i for i, doc_id in enumerate(snapshot.doc_ids)
+        }
+        return index
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from weakref import WeakKeyDictionary
+
+from apps.settings import CONFIG
+
+_limits = dict(CONFIG["concurrency"])
+_llm_semaphores: WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = WeakKeyDictionary()
+_embedding_semaphore = threading.BoundedSemaphore(_limits["embedding"])
+
+
+def configure_limits(llm: int | None = None, embedding: int | None = None):
+    """
+    Overrides the process-wide concurrency budget.
+
+    Args:
+        llm (int | None): Maximum number of concurrent LLM calls.
+        embedding (int | None): Maximum number of concurrent embedding batches.
+    """
+    global _embedding_semaphore
+    if llm:
+        _limits["llm"] = llm
+        _llm_semaphores.clear()
+    if embedding:
+        _limits["embedding"] = embedding
+        _embedding_semaphore = threading.BoundedSemaphore(embedding)
+
+
+def llm_slot() -> asyncio.Semaphore:
+    """
+    Returns the semaphore limiting concurrent LLM calls of all repositories.
+
+    Usage:
+        async with llm_slot():
+            ...
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(_limits["llm"])
+    return semaphore
+
+
+def embedding_slot() -> threading.BoundedSemaphore:
+    """
+    Returns the semaphore limiting concurrent embedding batches.
+    Embedding batches run in worker threads, so this is a thread semaphore.
+
+    Usage:
+        with embedding_slot():
+            ...
+    """
+    return _embedding_semaphore
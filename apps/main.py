@@ -2,10 +2,18 @@ import argparse
 import asyncio
 from typing import Literal
 
-from apps.context import ContextBuilder
+from apps.context import Context, ContextBuilder
 from apps.pipeline import Pipeline
-from apps.settings import GITHUB_ACCESS_TOKEN
-from apps.wiki_file import Download, SkippedOperationError, Upload
+from apps.profiling import ProfileMode, start_profiling, stop_profiling
+from apps.retriever import log_cache_stats
+from apps.settings import GITHUB_ACCESS_TOKEN, LOCAL_ONLY, TRACE
+from apps.tracing import tracing
+from apps.wiki_file import (
+    CheckFreshness,
+    Download,
+    SkippedOperationError,
+    Upload,
+)
 from apps.wiki_index import GenerateIndex
 from apps.wiki_page import GeneratePages
 from apps.wiki_structure import GenerateStructure
@@ -13,11 +21,10 @@ from apps.wiki_structure import GenerateStructure
 type ExitCode = Literal[0, 1, 100]
 
 
-async def run(repository: str, pat: str, branch: str) -> ExitCode:
-    context = ContextBuilder.from_file("wiki_config.yaml", repository, pat)
-
-    pipeline = (
+def build_pipeline(context: Context):
+    return (
         Pipeline.with_context(context)
+        .register(CheckFreshness)
         .register(Download)
         .register(GenerateStructure)
         .register(GeneratePages)
@@ -25,7 +32,33 @@ async def run(repository: str, pat: str, branch: str) -> ExitCode:
         .register(Upload)
     )
 
-    result = await pipeline.execute(branch)
+
+async def run(
+    repository: str,
+    pat: str,
+    branch: str,
+    local_only: bool = LOCAL_ONLY,
+    config_path: str = "wiki_config.yaml",
+    profile: ProfileMode | None = None,
+) -> ExitCode:
+    context = ContextBuilder.from_file(
+        config_path, repository, pat, local_only=local_only
+    )
+
+    pipeline = build_pipeline(context)
+
+    profiler = None
+    if profile:
+        profiler = start_profiling(profile)
+        pipeline.observers.append(profiler)
+    try:
+        result = await pipeline.execute(branch)
+    finally:
+        if profiler:
+            stop_profiling(profiler, context.artifacts_dir / "profile")
+    log_cache_stats()
+    if not isinstance(result.error, SkippedOperationError):
+        pipeline.accounting.write(context.run_report_path)
 
     match result.status:
         case "failure" if isinstance(result.error, SkippedOperationError):
@@ -54,13 +87,34 @@ if __name__ == "__main__":
         help="GitHub Personal Access Token.",
         default=GITHUB_ACCESS_TOKEN,
     )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Use an existing clone without calling the GitHub API.",
+        default=LOCAL_ONLY,
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome trace of the run to this path.",
+        default=TRACE or None,
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cpu", "memory"],
+        help="Profile the run and write reports next to the wiki.",
+        default=None,
+    )
 
     args = parser.parse_args()
-    exit_code = asyncio.run(
-        run(
-            repository=args.repository,
-            pat=args.pat,
-            branch=args.branch,
+    with tracing(args.trace):
+        exit_code = asyncio.run(
+            run(
+                repository=args.repository,
+                pat=args.pat,
+                branch=args.branch,
+                local_only=args.local,
+                profile=args.profile,
+            )
         )
-    )
     exit(exit_code)
@@ -1,4 +1,4 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from msgspec import Struct, field
 from pydantic import BaseModel, Field
@@ -76,3 +76,13 @@ class WikiConfiguration(Struct, frozen=True):
 
     explanation: list[str] = field(default_factory=list)
     """개념, 원리, 배경 지식을 깊이 이해하고 싶을 때 사용합니다."""
+
+
+class WikiState(Struct):
+    """마지막으로 Wiki를 생성한 시점의 정보입니다. 다음 실행에서 생성을 건너뛸지 판단하는데 사용됩니다."""
+
+    source_commit: str
+    """Wiki 생성에 사용된 원본 Repository의 commit hash입니다."""
+
+    generated_at: datetime
+    """Wiki가 생성된 시간입니다."""
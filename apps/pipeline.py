@@ -3,7 +3,10 @@ from typing import Any, Generic, Literal, TypeVar
 
 import msgspec
 
+from apps.accounting import RunAccounting
 from apps.model import WikiStructure
+from apps.settings import Logger
+from apps.tracing import span
 
 T = TypeVar("T")
 U = TypeVar("U")
@@ -39,6 +42,16 @@ class Operation(Generic[T, U, CTX], ABC):
         pass
 
 
+class PipelineObserver:
+    """Hook called around every operation of a pipeline."""
+
+    def before_operation(self, operation: Operation) -> None:
+        pass
+
+    def after_operation(self, operation: Operation, result: Result) -> None:
+        pass
+
+
 class Pipeline(Generic[CTX]):
     def __init__(self, context: CTX) -> None:
         self.context: CTX = context
@@ -59,23 +72,42 @@ class _Pipeline(Generic[PT, PU, CTX]):
     def __init__(self, context: CTX) -> None:
         self.context = context
         self.operations: list[Operation] = []
+        self.observers: list[PipelineObserver] = []
+        self.accounting = RunAccounting()
 
     def register(
         self, operation: Operation[T, U, CTX]
     ) -> "_Pipeline[PT, U, CTX]":
         pipeline = _Pipeline[PT, U, CTX](self.context)
         pipeline.operations = self.operations + [operation]
+        pipeline.observers = list(self.observers)
         return pipeline
 
     async def execute(self, param: PT = None) -> Result[PU]:
+        with self.accounting.activate():
+            result = await self._execute(param)
+        Logger.info(self.accounting.summary())
+        return result
+
+    async def _execute(self, param: PT = None) -> Result[PU]:
         input: Any = param
 
         result: Result[Any] = Result(status="success")
         for operation in self.operations:
-            result = await operation.invoke(context=self.context, input=input)
-            if result.status == "failure":
-                await operation.rollback(context=self.context, input=input)
-                return result
+            with (
+                self.accounting.operation(operation.name),
+                span(operation.name, "operation"),
+            ):
+                for observer in self.observers:
+                    observer.before_operation(operation)
+                result = await operation.invoke(
+                    context=self.context, input=input
+                )
+                for observer in self.observers:
+                    observer.after_operation(operation, result)
+                if result.status == "failure":
+                    await operation.rollback(context=self.context, input=input)
+                    return result
             input = result.value
         return result
 
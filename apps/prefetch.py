@@ -0,0 +1,190 @@
+import asyncio
+import math
+from pathlib import Path, PurePosixPath
+
+from msgspec import Struct
+
+from apps.git import GitRepository
+from apps.lexical import tokenize
+from apps.settings import Logger
+from apps.tools.common import read_file_content
+from apps.utils import count_tokens, get_encoding
+
+# view_file_content가 한 번에 보여주는 줄 수입니다.
+LINES_PER_PAGE = 100
+# 이보다 적게 배정되는 파일은 잘라서 넣지 않고 제외합니다.
+MIN_FILE_TOKENS = 256
+
+
+class PrefetchedFile(Struct):
+    path: str
+    content: str
+    tokens: int
+    lines: int
+    truncated: bool = False
+
+
+class PrefetchSavings(Struct):
+    """Agent work avoided by inlining files, estimated from their sizes."""
+
+    steps: int
+    input_tokens: int
+
+
+async def prefetch_files(
+    repo: GitRepository,
+    paths: list[str],
+    query: str,
+    budget: int,
+) -> list[PrefetchedFile]:
+    """
+    Loads files in parallel and trims them to a token budget.
+
+    Files are ranked by how many terms of `query` their path and content
+    share, keeping the given order on ties. The budget is shared fairly:
+    small files are kept whole and the rest split what is left evenly.
+    Lower-ranked files are dropped when a file would be cut to fewer than
+    `MIN_FILE_TOKENS`.
+
+    Args:
+        repo (GitRepository): Repository containing the files
+        paths (list[str]): File paths relative to the repository root
+        query (str): Text the files should be relevant to
+        budget (int): Maximum number of tokens of all files together
+
+    Returns:
+        list[PrefetchedFile]: Files in rank order
+    """
+    paths = list(
+        dict.fromkeys(
+            PurePosixPath(path.lstrip("/")).as_posix() for path in paths
+        )
+    )
+    loaded = await asyncio.gather(
+        *(asyncio.to_thread(_load, repo.repo_path / path) for path in paths)
+    )
+    files = [
+        PrefetchedFile(
+            path=path,
+            content=content,
+            tokens=count_tokens(content),
+            lines=len(content.splitlines()),
+        )
+        for path, content in zip(paths, loaded)
+        if content
+    ]
+    files = rank_files(files, query)
+
+    shares = fitting_shares([file.tokens for file in files], budget)
+    return [
+        _truncate(file, share)
+        for file, share in zip(files, shares)
+        if share > 0
+    ]
+
+
+def _load(path: Path) -> str:
+    if not path.is_file():
+        return ""  # relevant_files에는 디렉토리가 포함될 수 있습니다.
+    try:
+        return read_file_content(path)
+    except Exception as e:
+        Logger.debug(f"Skipped prefetching {path}: {e}")
+        return ""
+
+
+def rank_files(files: list[PrefetchedFile], query: str) -> list[PrefetchedFile]:
+    terms = set(tokenize(query))
+
+    def score(file: PrefetchedFile) -> int:
+        # 경로에 포함된 term은 본문보다 높게 평가합니다.
+        path_terms = terms & set(tokenize(file.path))
+        return 2 * len(path_terms) + len(terms & set(tokenize(file.content)))
+
+    return sorted(files, key=score, reverse=True)
+
+
+def fair_shares(sizes: list[int], budget: int) -> list[int]:
+    """
+    Splits `budget` so that every size gets at most an equal share of what
+    the smaller sizes leave over.
+    """
+    shares = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for n, i in enumerate(order):
+        shares[i] = min(sizes[i], remaining // (len(sizes) - n))
+        remaining -= shares[i]
+    return shares
+
+
+def fitting_shares(sizes: list[int], budget: int) -> list[int]:
+    """
+    Drops the last sizes until no size would be cut to fewer than
+    `MIN_FILE_TOKENS`, then returns the fair shares of the sizes left.
+    Sizes that fit whole are never a reason to drop.
+    """
+    shares = fair_shares(sizes, budget)
+    while len(shares) > 1 and any(
+        share < min(size, MIN_FILE_TOKENS) for size, share in zip(sizes, shares)
+    ):
+        sizes = sizes[:-1]
+        shares = fair_shares(sizes, budget)
+    return shares
+
+
+def _truncate(file: PrefetchedFile, tokens: int) -> PrefetchedFile:
+    if file.tokens <= tokens:
+        return file
+    encoding = get_encoding()
+    encoded = encoding.encode(file.content, disallowed_special=())
+    content = encoding.decode(encoded[:tokens])
+    # 마지막 줄이 잘리지 않도록 줄 단위로 자릅니다.
+    content = content[: content.rfind("\n") + 1] or content
+    return PrefetchedFile(
+        path=file.path,
+        content=content,
+        tokens=tokens,
+        lines=len(content.splitlines()),
+        truncated=True,
+    )
+
+
+def render_files(files: list[PrefetchedFile]) -> str:
+    blocks = []
+    for file in files:
+        note = ""
+        if file.truncated:
+            note = (
+                f"\n... [truncated after line {file.lines}, "
+                "use view_file_content to read the rest]"
+            )
+        blocks.append(
+            f'<file path="{file.path}">\n{file.content.rstrip()}{note}\n</file>'
+        )
+    return "\n\n".join(blocks)
+
+
+def estimate_savings(
+    files: list[PrefetchedFile], prompt_tokens: int
+) -> PrefetchSavings:
+    """
+    Estimates the agent steps and input tokens saved by inlining `files`.
+
+    Without prefetching, every page of `LINES_PER_PAGE` lines is one more
+    model call that re-sends the prompt and all pages read before it.
+    Afterwards both transcripts hold the same file content, so only these
+    extra calls differ.
+
+    Args:
+        files (list[PrefetchedFile]): Inlined files
+        prompt_tokens (int): Tokens of the prompt without the files
+    """
+    steps = input_tokens = read = 0
+    for file in files:
+        pages = math.ceil(file.lines / LINES_PER_PAGE)
+        for _ in range(pages):
+            steps += 1
+            input_tokens += prompt_tokens + read
+            read += file.tokens // pages
+    return PrefetchSavings(steps=steps, input_tokens=input_tokens)
@@ -0,0 +1,242 @@
+import re
+import sys
+import threading
+import tracemalloc
+from abc import ABC, abstractmethod
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Literal
+
+from msgspec import Struct
+
+from apps.pipeline import Operation, PipelineObserver, Result
+from apps.settings import Logger
+
+ProfileMode = Literal["cpu", "memory"]
+
+# 보고서에 포함할 상위 항목 수입니다.
+TOP_N = 30
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_qualname}"
+
+
+def _folded(frame: FrameType | None) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    return stack[::-1]
+
+
+class Profiler(PipelineObserver, ABC):
+    @abstractmethod
+    def start(self): ...
+
+    @abstractmethod
+    def stop(self, directory: Path) -> list[Path]:
+        """Stops profiling and writes the reports into `directory`."""
+
+
+class CpuProfiler(Profiler):
+    """
+    Samples the stacks of all threads from a background thread.
+
+    Needs no tracing hooks, so the overhead stays small and the asyncio run
+    keeps its timing. The event loop waiting in `select` shows up as idle
+    time of the main thread.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="cpu-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                thread = names.get(ident, str(ident))
+                self.stacks[(thread, *_folded(frame))] += 1
+            self.samples += 1
+
+    def stop(self, directory: Path) -> list[Path]:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        directory.mkdir(parents=True, exist_ok=True)
+        folded = directory / "cpu.folded"
+        folded.write_text(
+            "".join(
+                f"{';'.join(stack)} {count}\n"
+                for stack, count in self.stacks.most_common()
+            )
+        )
+        top = directory / "cpu_top.txt"
+        top.write_text(self.render())
+        return [folded, top]
+
+    def render(self) -> str:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack[1:]):
+                total[name] += count
+        samples = sum(self.stacks.values()) or 1
+        lines = [
+            f"{self.samples} samples every {self.interval * 1000:.0f}ms",
+            "",
+            "self%   total%  function",
+        ]
+        for name, count in own.most_common(TOP_N):
+            lines.append(
+                f"{count / samples:6.1%}  {total[name] / samples:6.1%}  {name}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+class MemorySnapshot(Struct):
+    label: str
+    current: int
+    peak: int
+    top: list[str]
+    growth: list[str]
+    folded: str
+
+
+class MemoryProfiler(Profiler):
+    """
+    Takes tracemalloc snapshots after every pipeline operation and at the
+    points passed to `take_snapshot`, such as after loading an index.
+    """
+
+    def __init__(self, frames: int = 25):
+        self.frames = frames
+        self.snapshots: list[MemorySnapshot] = []
+        self._previous: tracemalloc.Snapshot | None = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        tracemalloc.start(self.frames)
+
+    def after_operation(self, operation: Operation, result: Result):
+        self.snapshot(f"after {operation.name}")
+
+    def snapshot(self, label: str):
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            growth = []
+            if self._previous is not None:
+                stats = snapshot.compare_to(self._previous, "lineno")
+                growth = [str(stat) for stat in stats[:TOP_N]]
+            self._previous = snapshot
+            self.snapshots.append(
+                MemorySnapshot(
+                    label=label,
+                    current=current,
+                    peak=peak,
+                    top=[
+                        str(stat)
+                        for stat in snapshot.statistics("lineno")[:TOP_N]
+                    ],
+                    growth=growth,
+                    folded=_folded_allocations(snapshot),
+                )
+            )
+        Logger.info(
+            f"Memory {label}: {current / 2**20:.1f} MiB, "
+            f"peak {peak / 2**20:.1f} MiB"
+        )
+
+    def stop(self, directory: Path) -> list[Path]:
+        self.snapshot("end")
+        tracemalloc.stop()
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for i, snapshot in enumerate(self.snapshots):
+            slug = re.sub(r"\W+", "_", snapshot.label).strip("_")
+            path = directory / f"memory_{i:02d}_{slug}.folded"
+            path.write_text(snapshot.folded)
+            paths.append(path)
+        top = directory / "memory_top.txt"
+        top.write_text(self.render())
+        return [*paths, top]
+
+    def render(self) -> str:
+        sections = []
+        for snapshot in self.snapshots:
+            header = (
+                f"== {snapshot.label}: {snapshot.current / 2**20:.1f} MiB, "
+                f"peak {snapshot.peak / 2**20:.1f} MiB"
+            )
+            lines = [header, "-- top allocations", *snapshot.top]
+            if snapshot.growth:
+                lines += ["-- growth since previous snapshot", *snapshot.growth]
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections) + "\n"
+
+
+def _folded_allocations(snapshot: tracemalloc.Snapshot) -> str:
+    """
+    Folds the allocated bytes by stack, in KiB, for flamegraph tools.
+    tracemalloc keeps the frames of a traceback from the oldest one.
+    """
+    lines = []
+    for stat in snapshot.statistics("traceback"):
+        kib = stat.size // 1024
+        if kib == 0:
+            break  # 크기 순으로 정렬되어 있습니다.
+        frames = ";".join(
+            f"{Path(frame.filename).name}:{frame.lineno}"
+            for frame in stat.traceback
+        )
+        lines.append(f"{frames} {kib}\n")
+    return "".join(lines)
+
+
+_memory: MemoryProfiler | None = None
+
+
+def start_profiling(mode: ProfileMode) -> Profiler:
+    """Starts a CPU or memory profiler for the whole process."""
+    global _memory
+    profiler = CpuProfiler() if mode == "cpu" else MemoryProfiler()
+    if isinstance(profiler, MemoryProfiler):
+        _memory = profiler
+    profiler.start()
+    return profiler
+
+
+def stop_profiling(profiler: Profiler, directory: Path) -> list[Path]:
+    global _memory
+    if profiler is _memory:
+        _memory = None
+    paths = profiler.stop(directory)
+    Logger.info(f"Profile written to {directory}")
+    return paths
+
+
+def take_snapshot(label: str):
+    """Takes a memory snapshot if memory profiling is running."""
+    if _memory is not None:
+        _memory.snapshot(label)
@@ -0,0 +1,171 @@
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from typing import AsyncContextManager, Awaitable, Callable, TypeVar
+
+from apps.settings import CONFIG, Logger
+
+T = TypeVar("T")
+
+# 일시적인 오류로 보고 다시 시도할 HTTP 상태 코드입니다.
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# 상태 코드가 없는 provider SDK의 일시적인 오류입니다.
+RETRYABLE_ERRORS = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "OverloadedError",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Returns whether `error` is transient and the call may succeed later."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Exponential backoff with full jitter, in seconds."""
+    return random.uniform(0, min(maximum, base * 2**attempt))
+
+
+class LatencyTracker:
+    """Keeps the latencies of recent successful calls per key."""
+
+    def __init__(self, size: int = 200):
+        self._latencies: defaultdict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=size)
+        )
+
+    def record(self, key: str, seconds: float):
+        self._latencies[key].append(seconds)
+
+    def quantile(self, key: str, q: float, min_samples: int) -> float | None:
+        """
+        Returns the `q` quantile of the recent latencies of `key`, or None
+        while fewer than `min_samples` calls have been recorded.
+        """
+        latencies = self._latencies.get(key)
+        if not latencies or len(latencies) < min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def clear(self):
+        self._latencies.clear()
+
+
+_latencies = LatencyTracker()
+
+
+async def resilient_call(
+    call: Callable[[], Awaitable[T]],
+    key: str,
+    slot: Callable[[], AsyncContextManager] | None = None,
+    settings: dict | None = None,
+) -> T:
+    """
+    Awaits `call` with a timeout, retrying transient errors with jittered
+    exponential backoff.
+
+    With hedging enabled, a duplicate call is started once the first one
+    takes longer than the recent p95 latency of `key`. The first successful
+    result is used and the other call is cancelled.
+
+    Args:
+        call (Callable[[], Awaitable[T]]): Starts one attempt of the call
+        key (str): Calls sharing a latency distribution, e.g. the model name
+        slot (Callable[[], AsyncContextManager] | None): Concurrency limit
+            held by every attempt. Waiting for it does not count towards
+            the timeout.
+        settings (dict | None): Overrides CONFIG["resilience"]
+
+    Returns:
+        T: Result of the first successful attempt
+
+    Raises:
+        Exception: Error of the last attempt, or the first non-retryable one
+    """
+    settings = settings or CONFIG["resilience"]
+    max_retries, attempt = settings["max_retries"], 0
+    while True:
+        try:
+            return await _hedged(call, key, slot, settings)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(
+                attempt, settings["backoff_base"], settings["backoff_max"]
+            )
+            attempt += 1
+            Logger.warning(
+                f"Retrying {key} in {delay:.1f}s "
+                f"({attempt}/{max_retries}): {type(e).__name__} {e}"
+            )
+            await asyncio.sleep(delay)
+
+
+async def _attempt(
+    call: Callable[[], Awaitable[T]],
+    key: str,
+    slot: Callable[[], AsyncContextManager] | None,
+    timeout: float,
+) -> T:
+    if slot is not None:
+        async with slot():
+            return await _attempt(call, key, None, timeout)
+    start = time.perf_counter()
+    result = await asyncio.wait_for(call(), timeout)
+    _latencies.record(key, time.perf_counter() - start)
+    return result
+
+
+async def _hedged(
+    call: Callable[[], Awaitable[T]],
+    key: str,
+    slot: Callable[[], AsyncContextManager] | None,
+    settings: dict,
+) -> T:
+    threshold = None
+    if settings["hedge"]:
+        threshold = _latencies.quantile(
+            key, settings["hedge_quantile"], settings["hedge_min_samples"]
+        )
+
+    def start() -> asyncio.Task[T]:
+        return asyncio.ensure_future(
+            _attempt(call, key, slot, settings["timeout"])
+        )
+
+    pending = {start()}
+    try:
+        if threshold is not None:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            if not done:
+                Logger.debug(f"Hedging {key} after {threshold:.1f}s")
+                pending.add(start())
+
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = error or task.exception()
+        raise error  # type: ignore
+    finally:
+        for task in pending:
+            task.cancel()
@@ -1,56 +1,415 @@
 import asyncio
+import io
 import os
+import threading
+from collections import OrderedDict, defaultdict
+from functools import cache
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Literal
+from weakref import WeakValueDictionary
 
-import faiss
-from langchain.docstore import InMemoryDocstore
-from langchain.schema import Document
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
 
+from apps.cache import AsyncLRUCache
+from apps.chunking import SNIFF_SIZE, content_hash, sniff, split_file
+from apps.embeddings import (
+    CachedQueryEmbeddings,
+    create_embeddings,
+    normalize_query,
+    query_cache_stats,
+)
 from apps.git import ChangeMode, GitRepository
+from apps.lexical import BM25Index
+from apps.limits import embedding_slot
+from apps.profiling import take_snapshot
 from apps.settings import CONFIG, INDEX_DIR, MAX_EMBEDDING_TOKENS, Logger
+from apps.tracing import span
 from apps.utils import count_tokens, filter_files
+from apps.vector_index import (
+    TRAINING_SIZE,
+    IndexMetadata,
+    create_index,
+    index_nbytes,
+)
 
-_index_lock = asyncio.Lock()
-_cache = {}
+CacheKey = tuple[str, str]
+RetrievalMode = Literal["hybrid", "vector", "lexical"]
+
+
+class _CacheEntry:
+    __slots__ = ("retriever", "nbytes")
+
+    def __init__(self, retriever: BaseRetriever, nbytes: int):
+        self.retriever = retriever
+        self.nbytes = nbytes
+
+
+class RetrieverCache:
+    """
+    LRU cache of loaded retrievers keyed by (repository, commit hash).
+
+    Each key has its own lock, so building one repository's index does not
+    block retrieval for other repositories. A lock is kept only while a task
+    holds or waits on it. Entries are evicted when either
+    the entry count or the estimated memory of loaded stores exceeds the
+    configured budget.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[CacheKey, _CacheEntry] = OrderedDict()
+        # 잠금을 쓰는 task가 없으면 잠금도 사라져 오래 실행되는 batch에서도
+        # commit마다 쌓이지 않습니다.
+        self._locks: WeakValueDictionary[CacheKey, asyncio.Lock] = (
+            WeakValueDictionary()
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get(self, key: CacheKey) -> BaseRetriever | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry.retriever
+
+    def put(self, key: CacheKey, retriever: BaseRetriever, nbytes: int):
+        self._entries[key] = _CacheEntry(retriever, nbytes)
+        self._entries.move_to_end(key)
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or self.nbytes > self.max_bytes
+        ):
+            evicted, entry = self._entries.popitem(last=False)
+            Logger.info(
+                f"Evicted retriever {evicted} "
+                f"({entry.nbytes / 2**20:.1f} MiB) from cache."
+            )
+
+    def lock(self, key: CacheKey) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+
+_cache = RetrieverCache(
+    max_entries=CONFIG["retriever"]["cache_size"],
+    max_bytes=CONFIG["retriever"]["cache_memory_mb"] * 2**20,
+)
+
+
+# 검색 결과는 (repository, commit, mode, k, query) 단위로 캐시합니다.
+_results: AsyncLRUCache[tuple, list[Document]] = AsyncLRUCache(
+    "Retrieval results", CONFIG["retriever"]["result_cache_size"]
+)
+
+
+def log_cache_stats():
+    for stats in (query_cache_stats(), _results.stats):
+        if stats.requests:
+            Logger.info(stats.render())
+
+
+def estimate_nbytes(vector_store: FAISS) -> int:
+    """Estimates the memory held by a loaded vector store."""
+    vectors = index_nbytes(vector_store.index)
+    texts = sum(
+        len(doc.page_content)
+        for doc in vector_store.docstore._dict.values()  # type: ignore
+    )
+    return vectors + texts
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retrieves chunks from the vector store and the BM25 index and merges both
+    rankings with reciprocal rank fusion.
+
+    The "vector" mode uses MMR over the vector store only, and the "lexical"
+    mode uses the BM25 index only, so queries need no embedding call and no
+    vector store is required.
+    """
+
+    lexical_index: BM25Index
+    docstore: Docstore
+    vector_store: FAISS | None = None
+    # (repository, commit) of the indexes. Results are cached when it is set.
+    index_version: CacheKey | None = None
+    mode: RetrievalMode = "hybrid"
+    k: int = 12
+    # Candidates taken from each ranking before fusion.
+    fetch_k: int = 24
+    lambda_mult: float = 0.25
+    rrf_k: int = 60
+
+    def _get_vector_store(self) -> FAISS:
+        if self.vector_store is None:
+            raise ValueError(f"{self.mode} retrieval needs a vector store.")
+        return self.vector_store
+
+    def _mmr_kwargs(self) -> dict:
+        k = self.k if self.mode == "vector" else self.fetch_k
+        return {"k": k, "fetch_k": 2 * k, "lambda_mult": self.lambda_mult}
+
+    def _lexical_search(self, query: str, k: int) -> list[Document]:
+        documents = []
+        for doc_id, _ in self.lexical_index.search(query, k):
+            doc = self.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                documents.append(doc)
+        return documents
+
+    def _fuse(self, *rankings: list[Document]) -> list[Document]:
+        scores: dict[str, float] = {}
+        documents: dict[str, Document] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking, 1):
+                key = doc.id or str(id(doc))
+                documents.setdefault(key, doc)
+                scores[key] = scores.get(key, 0.0) + 1 / (self.rrf_k + rank)
+        best = sorted(scores, key=scores.__getitem__, reverse=True)
+        return [documents[key] for key in best[: self.k]]
+
+    def _result_key(self, query: str) -> tuple:
+        repository, commit_hash = self.index_version or ("", "")
+        return (
+            repository,
+            commit_hash,
+            self.mode,
+            self.k,
+            normalize_query(query),
+        )
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        if self.index_version is None:
+            return self._search(query)
+        documents = _results.get_or_call(
+            self._result_key(query), lambda: self._search(query)
+        )
+        return list(documents)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        if self.index_version is None:
+            return await self._asearch(query)
+        documents = await _results.get_or_compute(
+            self._result_key(query), lambda: self._asearch(query)
+        )
+        return list(documents)
+
+    def _search(self, query: str) -> list[Document]:
+        if self.mode == "lexical":
+            return self._lexical_search(query, self.k)
+        vector_store = self._get_vector_store()
+        vector_docs = vector_store.max_marginal_relevance_search(
+            query, **self._mmr_kwargs()
+        )
+        if self.mode == "vector":
+            return vector_docs
+        return self._fuse(
+            vector_docs, self._lexical_search(query, self.fetch_k)
+        )
+
+    async def _asearch(self, query: str) -> list[Document]:
+        if self.mode == "lexical":
+            return self._lexical_search(query, self.k)
+        vector_store = self._get_vector_store()
+        vector_docs = await vector_store.amax_marginal_relevance_search(
+            query, **self._mmr_kwargs()
+        )
+        if self.mode == "vector":
+            return vector_docs
+        return self._fuse(
+            vector_docs, self._lexical_search(query, self.fetch_k)
+        )
 
 
 async def get_retriever(git_repo: GitRepository) -> BaseRetriever:
-    async with _index_lock:
-        if _cache.get(git_repo.repository):
-            return _cache[git_repo.repository]
+    key = (git_repo.repository, git_repo.commit_hash)
+    if retriever := _cache.get(key):
+        return retriever
+
+    async with _cache.lock(key):
+        if retriever := _cache.get(key):
+            return retriever
         vector_store_manager = VectorStoreManager(git_repo)
-        faiss = await vector_store_manager.get_vector_store()
-        faiss_retriever = faiss.as_retriever(
-            search_type="mmr", search_kwargs={"k": 12, "lambda_mult": 0.25}
+        vector_store, lexical_index = await vector_store_manager.get_indexes()
+        take_snapshot("index loaded")
+        retriever = HybridRetriever(
+            lexical_index=lexical_index,
+            docstore=vector_store.docstore,
+            vector_store=vector_store,
+            mode=CONFIG["retriever"]["mode"],
+            index_version=key,
         )
-        _cache[git_repo.repository] = faiss_retriever
-        return faiss_retriever
+        nbytes = estimate_nbytes(vector_store) + lexical_index.nbytes
+        _cache.put(key, retriever, nbytes)
+        return retriever
+
+
+_warmups: dict[CacheKey, asyncio.Task] = {}
+# 인덱스를 만들지 못한 commit입니다. 검색할 때마다 다시 만들지 않습니다.
+_failed_warmups: dict[CacheKey, BaseException] = {}
+
+
+def start_index_warmup(git_repo: GitRepository) -> asyncio.Task:
+    """
+    Starts loading or building the index of the current commit in the
+    background. Calling it again for the same commit returns the same task.
+    A failed warm-up is retried only by calling this again.
+    """
+    key = (git_repo.repository, git_repo.commit_hash)
+    task = _warmups.get(key)
+    if task is not None:
+        return task
+    _failed_warmups.pop(key, None)
+
+    def on_done(task: asyncio.Task):
+        _warmups.pop(key, None)
+        if not task.cancelled() and (error := task.exception()):
+            Logger.error(f"Index warm-up failed for {key}: {error}")
+            _failed_warmups[key] = error
+
+    Logger.info(f"Warming up index for {git_repo.repository}...")
+    task = asyncio.create_task(get_retriever(git_repo))
+    task.add_done_callback(on_done)
+    _warmups[key] = task
+    return task
+
+
+async def wait_for_retriever(
+    git_repo: GitRepository, timeout: float | None = None
+) -> BaseRetriever | None:
+    """
+    Waits up to `timeout` seconds for the index of the current commit.
+
+    Returns:
+        BaseRetriever | None: The retriever, or None if it is not ready yet
+        or could not be built for the commit.
+    """
+    key = (git_repo.repository, git_repo.commit_hash)
+    if retriever := _cache.get(key):
+        return retriever
+    if key in _failed_warmups:
+        return None
+    task = start_index_warmup(git_repo)
+    timeout = timeout or CONFIG["retriever"]["warmup_timeout"]
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+    except TimeoutError:
+        return None
+    except Exception:
+        # 실패는 on_done에서 기록하고, 호출한 쪽은 lexical 검색을 사용합니다.
+        return None
+
+
+@cache
+def get_embeddings() -> CachedQueryEmbeddings:
+    """Returns the embeddings client shared by all repositories."""
+    model = CONFIG["embedder"]["model"]
+    return CachedQueryEmbeddings(
+        create_embeddings(model, CONFIG["embedder"]["dimensions"]), model
+    )
+
+
+def add_lexical_documents(lexical_index: BM25Index, documents: list[Document]):
+    for doc in documents:
+        if doc.id:
+            lexical_index.add(doc.id, doc.page_content)
+
+
+def deduplicate(
+    documents: list[Document], chunks: dict[str, Document]
+) -> list[Document]:
+    """
+    Drops chunks whose content is already indexed.
+
+    The path of a dropped chunk's file is recorded in the "duplicates"
+    metadata of the indexed chunk, so the file can be reindexed when that
+    chunk is deleted.
+
+    Args:
+        documents (list[Document]): Chunks of one file
+        chunks (dict[str, Document]): Indexed chunks by content hash
+
+    Returns:
+        list[Document]: Chunks with new content
+    """
+    unique = []
+    for doc in documents:
+        digest = doc.metadata["content_hash"]
+        indexed = chunks.get(digest)
+        if indexed is None:
+            chunks[digest] = doc
+            unique.append(doc)
+            continue
+        file_path = str(doc.metadata["file_path"])
+        duplicates = indexed.metadata.setdefault("duplicates", [])
+        if file_path != str(indexed.metadata["file_path"]) and (
+            file_path not in duplicates
+        ):
+            duplicates.append(file_path)
+    return unique
+
+
+def store_duplicates(vector_store: FAISS, chunks: dict[str, Document]):
+    """Copies the "duplicates" metadata onto the documents in the docstore."""
+    for doc in chunks.values():
+        duplicates = doc.metadata.get("duplicates")
+        stored = vector_store.docstore.search(str(doc.id))
+        if duplicates and isinstance(stored, Document) and stored is not doc:
+            stored.metadata["duplicates"] = list(duplicates)
+
+
+_folder_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
 
 
 class VectorStoreManager:
-    def __init__(self, git_repo: GitRepository):
+    def __init__(self, git_repo: GitRepository, index_dir: str | None = None):
         self.index_name = "index"
         self.git_repo = git_repo
         self.folder_path = os.path.join(
-            INDEX_DIR, git_repo.owner, git_repo.repo
+            index_dir or INDEX_DIR, git_repo.owner, git_repo.repo
         )
         self.commit_hash_path = os.path.join(self.folder_path, "commit_hash")
-        self.embedding = OpenAIEmbeddings(
-            model=CONFIG["embedder"]["model"],
-            dimensions=CONFIG["embedder"]["dimensions"],
-        )
+        self.lexical_index_path = os.path.join(self.folder_path, "index.bm25")
+        self.metadata_path = os.path.join(self.folder_path, "index.meta.json")
+        self.metadata = IndexMetadata.from_config()
+        self.embedding = get_embeddings()
         self.document_loader = DocumentLoader()
 
-    async def get_vector_store(self) -> FAISS:
-        vector_store = self._load_from_disk() or self._create_vector_store()
-        return vector_store
+    async def get_indexes(self) -> tuple[FAISS, BM25Index]:
+        # 인덱스 생성은 오래 걸리므로 event loop를 막지 않도록 별도 스레드에서 실행합니다.
+        return await asyncio.to_thread(self.load_or_create)
+
+    def load_or_create(self) -> tuple[FAISS, BM25Index]:
+        # 같은 Repository의 인덱스 디렉토리를 동시에 갱신하지 않도록 합니다.
+        with _folder_locks[self.folder_path]:
+            indexes = self._load_from_disk()
+            if indexes is None:
+                indexes = self._create_indexes()
+                self._save_to_disk(*indexes)
+            return indexes
 
-    def _load_from_disk(self) -> FAISS | None:
+    def _load_from_disk(self) -> tuple[FAISS, BM25Index] | None:
+        if not self._is_compatible():
+            return None
         try:
             vector_store = FAISS.load_local(
                 folder_path=self.folder_path,
@@ -58,33 +417,119 @@ class VectorStoreManager:
                 embeddings=self.embedding,
                 allow_dangerous_deserialization=True,
             )
-            if updated := self._update_vector_store(vector_store):
-                self._save_to_disk(vector_store)
-            return vector_store
+            lexical_index = self._load_lexical_index(vector_store)
+            if updated := self._update_indexes(vector_store, lexical_index):
+                self._save_to_disk(vector_store, lexical_index)
+            return vector_store, lexical_index
         except Exception as e:
             Logger.error(f"Failed to load vector store from disk: {e}")
             return None
 
-    def _save_to_disk(self, vector_store: FAISS) -> None:
+    def _is_compatible(self) -> bool:
+        if not os.path.exists(self.commit_hash_path):
+            return False
+        # metadata가 없는 이전 인덱스는 IndexFlatL2로 만들어졌습니다.
+        metadata = IndexMetadata.read(self.metadata_path) or IndexMetadata(
+            model=self.metadata.model,
+            dimensions=self.metadata.dimensions,
+            stored_dimensions=self.metadata.dimensions,
+        )
+        if metadata != self.metadata:
+            Logger.info(
+                f"Index settings changed for {self.git_repo.repository}. "
+                f"Rebuilding index: {metadata} -> {self.metadata}"
+            )
+            return False
+        return True
+
+    def _load_lexical_index(self, vector_store: FAISS) -> BM25Index:
+        if os.path.exists(self.lexical_index_path):
+            return BM25Index.load(self.lexical_index_path)
+        # BM25 인덱스가 없는 이전 인덱스는 docstore의 chunk로 만듭니다.
+        Logger.info(f"Building BM25 index for {self.git_repo.repository}...")
+        lexical_index = BM25Index()
+        for doc_id, doc in vector_store.docstore._dict.items():  # type: ignore
+            lexical_index.add(doc_id, doc.page_content)
+        lexical_index.save(self.lexical_index_path)
+        return lexical_index
+
+    def _save_to_disk(
+        self, vector_store: FAISS, lexical_index: BM25Index
+    ) -> None:
+        os.makedirs(self.folder_path, exist_ok=True)
         vector_store.save_local(
             folder_path=self.folder_path, index_name=self.index_name
         )
+        lexical_index.save(self.lexical_index_path)
+        self.metadata.write(self.metadata_path)
         open(self.commit_hash_path, "w").write(self.git_repo.commit_hash)
 
-    def _create_vector_store(self) -> FAISS:
+    def _create_indexes(self) -> tuple[FAISS, BM25Index]:
         Logger.info(f"Creating FAISS index for {self.git_repo.repository}...")
-        index = faiss.IndexFlatL2(self.embedding.dimensions)
         vector_store = FAISS(
             embedding_function=self.embedding,
-            index=index,
+            index=create_index(self.metadata),
             docstore=InMemoryDocstore(),
             index_to_docstore_id={},
         )
+        lexical_index = BM25Index()
+        chunks: dict[str, Document] = {}
+        # 학습이 필요한 인덱스는 TRAINING_SIZE만큼 모은 뒤 학습하고 추가합니다.
+        pending: list[tuple[Document, list[float]]] = []
         for docs in self.document_loader.load_documents(
             self.git_repo.repo_path
         ):
-            vector_store.add_documents(docs)
-        return vector_store
+            docs = deduplicate(docs, chunks)
+            if not docs:
+                continue
+            embedded = list(zip(docs, self._embed(docs)))
+            if vector_store.index.is_trained:
+                self._add_embedded(vector_store, embedded)
+            else:
+                pending.extend(embedded)
+                if len(pending) >= TRAINING_SIZE:
+                    self._add_embedded(vector_store, pending)
+                    pending = []
+            add_lexical_documents(lexical_index, docs)
+        if pending:
+            self._add_embedded(vector_store, pending)
+        store_duplicates(vector_store, chunks)
+        duplicates = sum(
+            len(doc.metadata.get("duplicates", [])) for doc in chunks.values()
+        )
+        Logger.info(
+            f"Indexed {len(chunks)} unique chunks, "
+            f"skipped {duplicates} duplicates."
+        )
+        return vector_store, lexical_index
+
+    def _embed(self, documents: list[Document]) -> list[list[float]]:
+        with (
+            embedding_slot(),
+            span("embed_documents", "embedding", {"documents": len(documents)}),
+        ):
+            return self.embedding.embed_documents(
+                [doc.page_content for doc in documents]
+            )
+
+    def _add_embedded(
+        self,
+        vector_store: FAISS,
+        embedded: list[tuple[Document, list[float]]],
+    ):
+        if not vector_store.index.is_trained:
+            Logger.info(
+                f"Training {self.metadata.quantization}/"
+                f"{self.metadata.reduction} index on {len(embedded)} vectors"
+            )
+            vector_store.index.train(
+                np.array([vector for _, vector in embedded], dtype=np.float32)
+            )
+        vector_store.add_embeddings(
+            [(doc.page_content, vector) for doc, vector in embedded],
+            metadatas=[doc.metadata for doc, _ in embedded],
+            ids=[doc.id for doc, _ in embedded],  # type: ignore
+        )
 
     def _get_commit_hash(self) -> str:
         if os.path.exists(self.commit_hash_path):
@@ -92,49 +537,77 @@ class VectorStoreManager:
                 return f.read().strip()
         return ""
 
-    def _update_vector_store(self, vector_store: FAISS) -> bool:
+    def _update_indexes(
+        self, vector_store: FAISS, lexical_index: BM25Index
+    ) -> bool:
         commit_hash = self._get_commit_hash()
         if self.git_repo.commit_hash == commit_hash:
             return False  # No changes detected
         Logger.info(
             f"Commit hash changed for {self.git_repo.repository}. "
-            "{self.git_repo.commit_hash} -> {new_commit_hash}"
+            f"{commit_hash} -> {self.git_repo.commit_hash}"
         )
-        updated = False
-        for mode, file_path in self.git_repo.list_diff_files(commit_hash):
-            updated = True
-            load = mode in [ChangeMode.ADDED, ChangeMode.MODIFIED]
-            delete = mode in [ChangeMode.DELETED, ChangeMode.MODIFIED]
+        changes = list(self.git_repo.list_diff_files(commit_hash))
+        if not changes:
+            return False
+
+        chunks: dict[str, Document] = {}
+        ids_by_file: defaultdict[str, list[str]] = defaultdict(list)
+        for doc_id, doc in vector_store.docstore._dict.items():  # type: ignore
+            # 이전 버전의 인덱스에는 content_hash가 없습니다.
+            digest = doc.metadata.get("content_hash") or content_hash(
+                doc.page_content
+            )
+            doc.metadata["content_hash"] = digest
+            chunks[digest] = doc
+            ids_by_file[str(doc.metadata["file_path"])].append(doc_id)
+
+        deleted: set[str] = set()
+        load: dict[str, Path] = {}
+        for mode, file_path in changes:
+            if mode in [ChangeMode.DELETED, ChangeMode.MODIFIED]:
+                deleted.update(ids_by_file.pop(str(file_path), []))
+            if mode in [ChangeMode.ADDED, ChangeMode.MODIFIED]:
+                load[str(file_path)] = Path(file_path)
+        # 삭제되는 chunk와 내용이 같아 건너뛰었던 파일도 다시 읽습니다.
+        for doc_id in list(deleted):
+            doc = vector_store.docstore.search(doc_id)
+            for duplicate in getattr(doc, "metadata", {}).get("duplicates", []):
+                if os.path.exists(self.git_repo.repo_path / duplicate):
+                    deleted.update(ids_by_file.pop(duplicate, []))
+                    load[duplicate] = Path(duplicate)
 
+        if deleted:
+            for doc_id in deleted:
+                doc = vector_store.docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    chunks.pop(doc.metadata["content_hash"], None)
+            vector_store.delete(ids=list(deleted))
+            lexical_index.delete(deleted)
+            Logger.debug(f"Deleted {len(deleted)} chunks from index.")
+
+        for file_path in load.values():
             try:
-                if delete:
-                    # Delete modified/deleted files from the index
-                    chunk = 0
-                    while True:
-                        id = f"{file_path}_{chunk}"
-                        try:
-                            if vector_store.delete(ids=[id]):
-                                Logger.debug(f"Deleted {id} from index.")
-                                chunk += 1
-                            else:
-                                break
-                        except Exception as e:
-                            break
-                if load:
-                    documents = self.document_loader.load_documents_from_file(
-                        repo_root=self.git_repo.repo_path,
-                        file_path=file_path,
+                documents = self.document_loader.load_documents_from_file(
+                    repo_root=self.git_repo.repo_path,
+                    file_path=file_path,
+                )
+                documents = deduplicate(documents, chunks)
+                if len(documents) > 0:
+                    # Add modified/added files to the index
+                    self._add_embedded(
+                        vector_store,
+                        list(zip(documents, self._embed(documents))),
+                    )
+                    add_lexical_documents(lexical_index, documents)
+                    Logger.debug(
+                        f"Added {file_path} into index. "
+                        f"({len(documents)} documents)"
                     )
-                    if len(documents) > 0:
-                        # Add modified/added files to the index
-                        vector_store.add_documents(documents=documents)
-                        Logger.debug(
-                            f"Added {file_path} into index. "
-                            f"({len(documents)} documents)"
-                        )
             except Exception as e:
                 Logger.warning(f"Error loading file {file_path}: {e}")
-        return updated
+        store_duplicates(vector_store, chunks)
+        return True
 
 
 class DocumentLoader:
@@ -142,33 +615,31 @@ class DocumentLoader:
         self, repo_root: Path, file_path: Path
     ) -> list[Document]:
         documents = []
-        with open(repo_root / file_path) as f:
-            try:
-                ext = os.path.splitext(file_path)[1]
-                is_code = (
-                    ext == ""
-                    or ext in CONFIG["file_filters"]["code_extensions"]
-                )
-
-                content = f.read()
-                token_count = count_tokens(content)
-                if not is_code and token_count > MAX_EMBEDDING_TOKENS:
-                    Logger.warning(f"File {file_path} exceeds max token limit.")
+        max_chunks = CONFIG["embedder"]["max_chunks_per_file"]
+        try:
+            with open(repo_root / file_path, "rb") as f:
+                if reason := sniff(f.read(SNIFF_SIZE)):
+                    Logger.debug(f"Skipped {reason} file {file_path}.")
                     return documents
-
-                chunk_size = CONFIG["embedder"]["chunk_size"]
-                chunk_overlap = CONFIG["embedder"]["chunk_overlap"]
-                code_splitter = RecursiveCharacterTextSplitter.from_language(
-                    language=get_language(ext),
-                    chunk_size=chunk_size,
-                    chunk_overlap=chunk_overlap,
-                )
-                chunks = code_splitter.split_text(content)
-
-                for i, chunk in enumerate(chunks):
-                    id = f"{file_path}_{i}"
+                f.seek(0)
+                text = io.TextIOWrapper(f, encoding="utf-8", errors="replace")
+                for i, chunk in enumerate(split_file(text, str(file_path))):
+                    if i == max_chunks:
+                        Logger.warning(
+                            f"File {file_path} exceeds {max_chunks} chunks. "
+                            "The rest of the file is not indexed."
+                        )
+                        break
+                    token_count = count_tokens(chunk)
+                    # 임베딩 모델의 입력 한도를 넘는 chunk는 API가 거부합니다.
+                    if token_count > MAX_EMBEDDING_TOKENS:
+                        Logger.warning(
+                            f"Skipped chunk {i} of {file_path} with "
+                            f"{token_count} tokens."
+                        )
+                        continue
                     doc = Document(
-                        id=id,
+                        id=f"{file_path}_{i}",
                         page_content=chunk,
                         metadata={
                             "file_path": file_path,
@@ -176,13 +647,13 @@ class DocumentLoader:
                             "title": file_path,
                             "token_count": token_count,
                             "chunk": i,
+                            "content_hash": content_hash(chunk),
                         },
                     )
                     documents.append(doc)
-                return documents
-            except Exception as e:
-                Logger.warning(f"Error loading file {file_path}: {e}")
-                return documents
+        except Exception as e:
+            Logger.warning(f"Error loading file {file_path}: {e}")
+        return documents
 
     def load_documents(self, repo_path: Path) -> Generator[list[Document]]:
         code_extensions = CONFIG["file_filters"]["code_extensions"]
@@ -201,24 +672,3 @@ class DocumentLoader:
             )
             if len(docs) > 0:
                 yield docs
-
-
-def get_language(ext: str) -> Language:
-    languages = {
-        ".py": Language.PYTHON,
-        ".js": Language.JS,
-        ".ts": Language.TS,
-        ".java": Language.JAVA,
-        ".cpp": Language.CPP,
-        ".c": Language.C,
-        ".go": Language.GO,
-        ".rs": Language.RUST,
-        ".jsx": Language.JS,
-        ".tsx": Language.TS,
-        ".html": Language.HTML,
-        ".php": Language.PHP,
-        ".swift": Language.SWIFT,
-        ".cs": Language.CSHARP,
-        ".kt": Language.KOTLIN,
-    }
-    return languages.get(ext, Language.C)
@@ -7,6 +7,12 @@ load_dotenv()
 
 IS_TEST = os.getenv("IS_TEST", "0") == "1"
 
+# GitHub API를 호출하지 않고 이미 clone된 Repository만 사용합니다.
+LOCAL_ONLY = os.getenv("LOCAL_ONLY", "0") == "1"
+
+# 설정하면 실행 과정의 span을 Chrome trace 형식으로 이 경로에 저장합니다.
+TRACE = os.getenv("TRACE", "")
+
 EXIT_CODE_SKIPPED = 100
 
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -30,6 +36,17 @@ MAX_INPUT_TOKENS = 8191
 CONFIG = {
     "agent": {
         "prompt": os.path.join(PROJECT_DIR, "prompts", "agent_prompt2"),
+        # tool: 응답 형식을 도구로 제공하여 마지막 호출에서 바로 응답합니다.
+        # post: ReAct 루프가 끝난 뒤 응답 형식으로 한 번 더 호출합니다.
+        "structured_output": "tool",
+        # 도구를 고르는 단계에 사용할 provider별 작은 모델입니다. 답변과 structured
+        # output은 각 단계에 설정된 모델이 작성합니다. 설정된 모델의 provider가
+        # 없거나 None이면 모든 단계에 같은 모델을 사용합니다.
+        "planner_model": {
+            "openai": "openai/gpt-4.1-mini",
+            "google": "google/gemini-2.0-flash-lite",
+            "anthropic": "anthropic/claude-3-5-haiku-latest",
+        },
     },
     "index_generation": {
         "model": "openai/gpt-4o",
@@ -39,7 +56,9 @@ CONFIG = {
         "model": "openai/gpt-4.1",
         "temperature": 0.4,
         "top_p": 0.8,
-        "prompt": os.path.join(PROJECT_DIR, "prompts", "page_prompt6"),
+        "prompt": os.path.join(PROJECT_DIR, "prompts", "page_prompt7"),
+        # 페이지 프롬프트에 미리 넣을 relevant_files의 최대 토큰 수입니다.
+        "prefetch_tokens": 24000,
     },
     "structure_generation": {
         "model": "openai/gpt-4.1",
@@ -47,14 +66,72 @@ CONFIG = {
         "prompt": os.path.join(PROJECT_DIR, "prompts", "structure_prompt5"),
     },
     "embedder": {
-        "model": "text-embedding-3-small",
+        # provider/model 형식입니다. openai/<model>, hashing(CPU), fake(테스트)
+        "model": os.getenv("EMBEDDING_MODEL", "openai/text-embedding-3-small"),
         "dimensions": 1024,
         "chunk_size": 2048,
         "chunk_overlap": 256,
+        # 큰 파일은 이 크기(문자 수)씩 읽어 나눕니다.
+        "window_size": 65536,
+        # 파일 하나에서 인덱싱할 최대 chunk 수입니다.
+        "max_chunks_per_file": 256,
+        # 벡터 저장 정밀도입니다. none(float32), fp16, int8
+        "quantization": "none",
+        # 저장할 차원 수입니다. None이면 dimensions를 그대로 사용합니다.
+        "reduced_dimensions": None,
+        # 차원 축소 방법입니다. truncate(Matryoshka), pca
+        "reduction": "truncate",
+    },
+    "retriever": {
+        # (repository, commit) 단위로 메모리에 유지할 인덱스 수와 메모리 한도입니다.
+        "cache_size": 4,
+        "cache_memory_mb": 2048,
+        # 인덱스가 준비되지 않은 경우 기다리는 시간(초)입니다. 초과하면 lexical 검색을 사용합니다.
+        "warmup_timeout": 5,
+        # hybrid: 벡터 검색과 BM25를 RRF로 결합, vector: 벡터 검색만 사용,
+        # lexical: BM25만 사용하여 검색 시 임베딩을 호출하지 않습니다.
+        "mode": "hybrid",
+        # 검색어 임베딩과 검색 결과를 캐시할 최대 항목 수입니다.
+        "query_cache_size": 1024,
+        "result_cache_size": 256,
+        # 검색 결과로 반환할 최대 파일 수입니다.
+        "max_files": 8,
     },
     "tokenizer": {
         "model": "gpt-4o-mini",
     },
+    "concurrency": {
+        # 모든 Repository가 공유하는 동시 호출 수 제한입니다.
+        "llm": 8,
+        "embedding": 4,
+    },
+    "resilience": {
+        # LLM 호출 한 번의 제한 시간(초)입니다. 초과하면 다시 시도합니다.
+        "timeout": 180,
+        # 일시적인 오류의 재시도 횟수와 지수 backoff(초)입니다.
+        "max_retries": 4,
+        "backoff_base": 1.0,
+        "backoff_max": 30.0,
+        # 응답이 최근 지연 시간의 p95보다 늦으면 같은 요청을 한 번 더 보냅니다.
+        "hedge": False,
+        "hedge_quantile": 0.95,
+        "hedge_min_samples": 20,
+    },
+    # 실행 보고서의 비용 추정에 사용하는 1M 토큰당 가격(USD)입니다.
+    # 여기에 없는 모델의 비용은 계산하지 않습니다.
+    "pricing": {
+        "gpt-4.1": {"input": 2.0, "output": 8.0},
+        "gpt-4.1-mini": {"input": 0.4, "output": 1.6},
+        "gpt-4.1-nano": {"input": 0.1, "output": 0.4},
+        "gpt-4o": {"input": 2.5, "output": 10.0},
+        "gpt-4o-mini": {"input": 0.15, "output": 0.6},
+        "gemini-2.0-flash-lite": {"input": 0.075, "output": 0.3},
+        "claude-3-5-haiku-latest": {"input": 0.8, "output": 4.0},
+    },
+    "file_tree": {
+        "max_tokens": 6000,
+        "max_depth": 6,
+    },
     "file_filters": {
         "code_extensions": [
             ".py",
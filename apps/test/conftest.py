@@ -3,6 +3,7 @@ import shutil
 
 import pytest
 
+from apps.bench.fixture import create_fixture_repo
 from apps.git import GitRepository, WikiRepository
 from apps.model import WikiConfiguration
 from apps.settings import GITHUB_ACCESS_TOKEN, PROJECT_DIR
@@ -36,3 +37,12 @@ def repo(_repo: GitRepository):
 @pytest.fixture(scope="session")
 def wiki_repo(repo: GitRepository) -> WikiRepository:
     return WikiRepository(repo, config=WikiConfiguration())
+
+
+@pytest.fixture(scope="session")
+def local_repo(tmp_path_factory) -> GitRepository:
+    """
+    네트워크 없이 사용할 수 있는 로컬 Repository입니다.
+    apps 소스를 bare origin에 push한 뒤 clone하여 local-only 모드로 사용합니다.
+    """
+    return create_fixture_repo(tmp_path_factory.mktemp("local"))
@@ -0,0 +1,321 @@
+import json
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import (
+    ChatGeneration,
+    ChatGenerationChunk,
+    ChatResult,
+)
+from langchain_core.tools import tool
+
+from apps import agent as agent_module
+from apps.accounting import RunAccounting, page_scope, run_callbacks
+from apps.agent import create_react_agent, get_planner_model, stream_chat
+from apps.model import WikiStructure
+from apps.settings import CONFIG
+
+STRUCTURE = {
+    "title": "Wiki",
+    "pages": [{"path": "/a.md", "title": "A", "description": "a"}],
+}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """정해진 응답을 순서대로 반환하고 호출 횟수를 기록하는 모델"""
+
+    responses: list[Any]
+    model_name: str = "writer"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _next(self) -> AIMessage:
+        message = self.responses[self.calls]
+        self.calls += 1
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._next())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._next()
+        if message.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": tool_call["name"],
+                            "args": json.dumps(tool_call["args"]),
+                            "id": tool_call["id"],
+                            "index": 0,
+                        }
+                        for tool_call in message.tool_calls
+                    ],
+                    usage_metadata=message.usage_metadata,
+                )
+            )
+            return
+        # 답변은 단어 단위로 나눠 스트리밍합니다.
+        words = str(message.content).split(" ")
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content=word if i == 0 else f" {word}",
+                    usage_metadata=(
+                        message.usage_metadata if i == len(words) - 1 else None
+                    ),
+                )
+            )
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@tool
+def list_files(path: str) -> str:
+    """Lists files in a directory."""
+    return "a.py\nb.py"
+
+
+def tool_call(name: str, args: dict) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": name, "args": args, "id": str(uuid4())}],
+        usage_metadata={
+            "input_tokens": 100,
+            "output_tokens": 10,
+            "total_tokens": 110,
+        },
+    )
+
+
+async def run(
+    model: BaseChatModel, structured_output, **kwargs
+) -> WikiStructure:
+    agent = create_react_agent(
+        prompt="You are a test agent.",
+        model=model,
+        tools=[list_files],
+        response_format=WikiStructure,
+        structured_output=structured_output,
+        **kwargs,
+    )
+    response = await agent.ainvoke(
+        {"messages": [HumanMessage(content="Create a wiki structure.")]},
+        config={
+            "configurable": {"thread_id": str(uuid4()), "step_limit": 10},
+            "callbacks": run_callbacks(),
+        },
+    )
+    return response["structured_response"]
+
+
+@pytest.mark.asyncio
+async def test_structured_output_tool():
+    model = ScriptedChatModel(
+        responses=[
+            tool_call("list_files", {"path": "/"}),
+            # 형식에 맞지 않는 응답은 오류를 받고 다시 호출합니다.
+            tool_call("WikiStructure", {"pages": "invalid"}),
+            tool_call("WikiStructure", STRUCTURE),
+        ]
+    )
+    structure = await run(model, "tool")
+    assert structure == WikiStructure.model_validate(STRUCTURE)
+    assert model.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_structured_output_post():
+    model = ScriptedChatModel(
+        responses=[
+            tool_call("list_files", {"path": "/"}),
+            AIMessage(content="The wiki has one page."),
+            # 루프가 끝난 뒤 응답 형식으로 한 번 더 호출합니다.
+            tool_call("WikiStructure", STRUCTURE),
+        ]
+    )
+    structure = await run(model, "post")
+    assert structure == WikiStructure.model_validate(STRUCTURE)
+    assert model.calls == 3
+
+
+def test_planner_follows_model_provider(monkeypatch):
+    # wiki에서 모델을 바꾸면 같은 provider의 planner를 사용합니다.
+    assert get_planner_model({"model": "google/gemini-2.0-flash"}) == (
+        "google/gemini-2.0-flash-lite"
+    )
+    assert get_planner_model({"model": "openai/gpt-4.1"}) == (
+        "openai/gpt-4.1-mini"
+    )
+    assert get_planner_model({"model": "other/model"}) is None
+    assert (
+        get_planner_model({"model": "openai/gpt-4.1", "planner_model": None})
+        is None
+    )
+    monkeypatch.setitem(CONFIG["agent"], "planner_model", None)
+    assert get_planner_model({"model": "openai/gpt-4.1"}) is None
+
+
+@pytest.mark.asyncio
+async def test_planner_routing():
+    planner = ScriptedChatModel(
+        model_name="planner",
+        responses=[
+            tool_call("list_files", {"path": "/"}),
+            tool_call("list_files", {"path": "/apps"}),
+            # planner가 답하려고 하면 같은 단계를 writer에게 다시 요청합니다.
+            tool_call("WikiStructure", {"title": "draft"}),
+        ],
+    )
+    writer = ScriptedChatModel(
+        responses=[tool_call("WikiStructure", STRUCTURE)]
+    )
+
+    accounting = RunAccounting()
+    with accounting.activate():
+        structure = await run(writer, "tool", planner=planner)
+    assert structure == WikiStructure.model_validate(STRUCTURE)
+    assert (planner.calls, writer.calls) == (3, 1)
+
+    # 토큰과 시간은 callback이, routing은 agent가 같은 run에 기록합니다.
+    report = accounting.report()
+    assert report.models["planner"].input_tokens == 300
+    assert report.models["writer"].llm_calls == 1
+    (routing,) = report.routing
+    assert (routing.steps, routing.escalations) == (2, 1)
+    assert "Routed 2 tool steps to planner instead of writer" in (
+        accounting.summary()
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_chat(local_repo, tmp_path, monkeypatch):
+    answer = "# Retriever\n\nThe retriever fuses BM25 and vector rankings."
+    model = ScriptedChatModel(
+        responses=[
+            tool_call("list_files", {"dir_path": "/"}),
+            AIMessage(
+                content=answer,
+                usage_metadata={
+                    "input_tokens": 100,
+                    "output_tokens": 12,
+                    "total_tokens": 112,
+                },
+            ),
+            ValueError("provider error"),
+        ]
+    )
+    monkeypatch.setattr(agent_module, "get_chat_model", lambda **_: model)
+    monkeypatch.setitem(CONFIG["agent"], "planner_model", None)
+
+    output = tmp_path / "wiki" / "retriever.md"
+    stats = await stream_chat("Write a page.", output=output, repo=local_repo)
+
+    # 도구 호출 단계의 출력은 남기지 않고 최종 답변만 저장합니다.
+    assert output.read_text() == answer
+    assert stats.tokens == 12
+    assert stats.ttft is not None
+    assert list(output.parent.iterdir()) == [output]
+
+    # 실패하면 임시 파일을 지우고 기존 파일을 그대로 둡니다.
+    with pytest.raises(ValueError):
+        await stream_chat("Write a page.", output=output, repo=local_repo)
+    assert output.read_text() == answer
+    assert list(output.parent.iterdir()) == [output]
+
+
+@pytest.mark.asyncio
+async def test_run_accounting(local_repo, tmp_path, monkeypatch):
+    model = ScriptedChatModel(
+        model_name="gpt-4.1",
+        responses=[
+            tool_call("list_files", {"dir_path": "/"}),
+            AIMessage(
+                content="# Retriever",
+                usage_metadata={
+                    "input_tokens": 1000,
+                    "output_tokens": 500,
+                    "total_tokens": 1500,
+                },
+            ),
+        ],
+    )
+    monkeypatch.setattr(agent_module, "get_chat_model", lambda **_: model)
+    monkeypatch.setitem(CONFIG["agent"], "planner_model", None)
+
+    accounting = RunAccounting()
+    with accounting.activate(), accounting.operation("GeneratePages"):
+        with page_scope("/retriever.md"):
+            await stream_chat(
+                "Write a page.",
+                output=tmp_path / "retriever.md",
+                repo=local_repo,
+            )
+    # run 밖의 호출은 기록하지 않습니다.
+    model.calls = 0
+    await stream_chat(
+        "Write a page.", output=tmp_path / "other.md", repo=local_repo
+    )
+
+    report = accounting.report()
+    usage = report.operations["GeneratePages"]
+    assert (usage.llm_calls, usage.tool_calls) == (2, 1)
+    assert (usage.input_tokens, usage.output_tokens) == (1100, 510)
+    assert usage.cost == pytest.approx((1100 * 2 + 510 * 8) / 1e6)
+    assert usage.wall_seconds >= usage.llm_seconds
+    assert report.pages["/retriever.md"] == report.total
+    assert report.models["gpt-4.1"].llm_calls == 2
+    assert "GeneratePages" in accounting.summary()
+
+    path = tmp_path / "report" / "run_report.json"
+    accounting.write(path)
+    assert json.loads(path.read_text())["total"]["tool_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_accounting_without_usage(local_repo, tmp_path, monkeypatch):
+    # OpenAI처럼 스트리밍 응답에 사용량을 보내지 않는 모델
+    model = ScriptedChatModel(
+        model_name="gpt-4.1",
+        responses=[
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "list_files", "args": {"dir_path": "/"}, "id": "1"}
+                ],
+            ),
+            AIMessage(content="# Retriever\n\nThe retriever fuses rankings."),
+        ],
+    )
+    monkeypatch.setattr(agent_module, "get_chat_model", lambda **_: model)
+    monkeypatch.setitem(CONFIG["agent"], "planner_model", None)
+
+    accounting = RunAccounting()
+    with accounting.activate(), accounting.operation("GeneratePages"):
+        await stream_chat(
+            "Write a page.", output=tmp_path / "retriever.md", repo=local_repo
+        )
+
+    usage = accounting.report().total
+    assert usage.llm_calls == usage.estimated_calls == 2
+    assert usage.input_tokens > 0 and usage.output_tokens > 0
+    assert usage.cost > 0
+    assert "2 calls estimated" in accounting.summary()
+
+
+def test_openai_streams_usage(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    model = agent_module.get_chat_model.__wrapped__(
+        model="openai/gpt-4.1-mini", temperature=0.0, top_p=1.0
+    )
+    assert model.stream_usage
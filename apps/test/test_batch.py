@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from apps import batch
+from apps.batch import (
+    BatchResult,
+    batch_exit_code,
+    parse_target,
+    read_targets,
+    render_summary,
+    run_batch,
+)
+
+
+def test_parse_target():
+    assert parse_target("owner/name") == ("owner/name", None)
+    assert parse_target(" owner/name@dev \n") == ("owner/name", "dev")
+    assert parse_target("owner/name@") == ("owner/name", None)
+
+
+def test_read_targets(tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text(
+        "# 생성할 저장소\n"
+        "owner/a\n"
+        "\n"
+        "owner/b@dev  # 개발 브랜치\n"
+        "   \n"
+        "  owner/c\n"
+    )
+    assert read_targets(str(path)) == ["owner/a", "owner/b@dev", "owner/c"]
+
+
+@pytest.mark.asyncio
+async def test_run_batch(monkeypatch):
+    running = 0
+    max_running = 0
+    delays = {"owner/a": 0.03, "owner/b": 0.01, "owner/c": 0.0}
+
+    async def run(repository: str, branch: str | None, **kwargs) -> int:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        try:
+            await asyncio.sleep(delays.get(repository, 0.0))
+            if repository == "owner/c":
+                raise RuntimeError("clone failed")
+            return 100 if branch == "old" else 0
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(batch, "run", run)
+    targets = ["owner/a", "owner/b@old", "owner/c", "owner/d"]
+    results = await run_batch(targets, pat="", concurrency=2)
+
+    # 먼저 끝난 순서와 관계없이 입력 순서대로 반환합니다.
+    assert [result.repository for result in results] == [
+        "owner/a",
+        "owner/b",
+        "owner/c",
+        "owner/d",
+    ]
+    assert [result.exit_code for result in results] == [0, 100, 1, 0]
+    assert results[1].branch == "old"
+    assert results[2].error == "clone failed"
+    assert max_running == 2
+    assert batch_exit_code(results) == 1
+    # 건너뛴 저장소는 실패가 아닙니다.
+    assert batch_exit_code(results[:2]) == 0
+
+
+def test_render_summary():
+    results = [
+        BatchResult("owner/a", None, exit_code=0, elapsed=3.0),
+        BatchResult("owner/b", "dev", exit_code=100, elapsed=2.0),
+    ]
+    lines = render_summary(results, wall_seconds=3.5).splitlines()
+    assert lines[0].split(" | ")[0].strip() == "Repository"
+    assert "owner/b" in lines[3] and "skipped" in lines[3]
+    # 동시에 실행된 run의 시간 합계가 아닌 실제 경과 시간을 보여줍니다.
+    assert lines[-1] == "2 repositories in 3.5s (5.0s summed over runs)"
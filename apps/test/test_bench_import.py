@@ -0,0 +1,28 @@
+from apps.bench.bench_import import measure, parse_importtime
+
+# apps.main이 불러오는 pipeline module입니다.
+PIPELINE_MODULES = (
+    "import apps.context, apps.pipeline, apps.wiki_file, "
+    "apps.wiki_structure, apps.wiki_page, apps.wiki_index"
+)
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   msgspec._core\n"
+        "import time:        30 |        150 | msgspec\n"
+    )
+    timings = parse_importtime(output)
+    assert [timing.module for timing in timings] == ["msgspec._core", "msgspec"]
+    assert timings[1].self_us == 30 and timings[1].cumulative_us == 150
+
+
+def test_lazy_imports():
+    # provider SDK, faiss, langgraph는 사용할 때만 불러옵니다.
+    result = measure(PIPELINE_MODULES, runs=1)
+    assert result.loaded_lazy_modules == []
+    assert result.total_seconds > 0
+
+    result = measure(f"{PIPELINE_MODULES}; import langchain_openai", runs=1)
+    assert result.loaded_lazy_modules == ["langchain_openai"]
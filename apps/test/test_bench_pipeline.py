@@ -0,0 +1,36 @@
+import argparse
+
+from apps.bench.bench_pipeline import benchmark, compare, main
+from apps.bench.fake_chat import LatencyProfile
+
+
+def test_pipeline_benchmark():
+    # 지연 없이 전체 pipeline을 네트워크 없이 실행합니다.
+    result = benchmark(
+        runs=1,
+        latency=LatencyProfile(ttft_median=0, tokens_per_second=0),
+        pages=2,
+    )
+    assert result.pages == 2
+    assert set(result.stage_seconds) == {
+        "Download",
+        "GenerateStructure",
+        "GeneratePages",
+        "GenerateIndex",
+    }
+    assert result.llm_calls > 0 and result.tool_calls > 0
+    assert result.peak_rss_mib > 0
+
+    metrics = result.metrics()
+    assert compare(metrics, metrics, tolerance=0.0) == []
+    baseline = dict(metrics, wall_seconds=metrics["wall_seconds"] / 10 - 1)
+    (regression,) = compare(metrics, baseline, tolerance=0.2)
+    assert regression.startswith("wall_seconds")
+
+
+def test_missing_baseline_fails(tmp_path, capsys):
+    args = argparse.Namespace(
+        baseline=str(tmp_path / "pipeline.json"), update_baseline=False
+    )
+    assert main(args) == 1
+    assert "No baseline" in capsys.readouterr().out
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from apps.cache import AsyncLRUCache
+
+
+@pytest.mark.asyncio
+async def test_coalesces_inflight_requests():
+    cache: AsyncLRUCache[str, int] = AsyncLRUCache("test", max_entries=2)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    values = await asyncio.gather(
+        *(cache.get_or_compute("a", compute) for _ in range(5))
+    )
+    assert values == [1] * 5
+    assert calls == 1
+    assert (cache.stats.misses, cache.stats.coalesced) == (1, 4)
+
+    assert await cache.get_or_compute("a", compute) == 1
+    assert cache.stats.hits == 1
+
+    # 가장 오래 사용되지 않은 항목이 제거됩니다.
+    await cache.get_or_compute("b", compute)
+    await cache.get_or_compute("c", compute)
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached():
+    cache: AsyncLRUCache[str, int] = AsyncLRUCache("test", max_entries=2)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("a", fail) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert cache.get("a") is None
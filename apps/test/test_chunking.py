@@ -0,0 +1,109 @@
+import io
+
+from apps.chunking import (
+    content_hash,
+    iter_windows,
+    sniff,
+    split_file,
+    split_text,
+)
+
+PYTHON_SOURCE = """import os
+
+
+def first():
+    return os.sep
+
+
+# 두 번째 함수
+@staticmethod
+def second():
+    return 2
+
+
+class Third:
+    def method(self):
+        return 3
+
+    def other(self):
+        return 4
+"""
+
+
+def test_split_python_on_definitions():
+    chunks = split_text(
+        PYTHON_SOURCE, "module.py", chunk_size=60, chunk_overlap=0
+    )
+
+    # 정의 앞의 주석과 decorator는 정의와 같은 chunk에 포함됩니다.
+    assert any(
+        chunk.startswith("# 두 번째 함수\n@staticmethod") for chunk in chunks
+    )
+    # chunk_size를 넘는 class는 method 단위로 나뉩니다.
+    assert any(chunk.lstrip().startswith("def other") for chunk in chunks)
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    for line in PYTHON_SOURCE.splitlines():
+        assert any(line.strip() in chunk for chunk in chunks)
+
+
+def test_split_python_syntax_error():
+    # 파싱할 수 없는 파일은 일반 splitter로 나눕니다.
+    chunks = split_text("def broken(:\n    pass\n", "broken.py")
+    assert chunks == ["def broken(:\n    pass"]
+
+
+def test_split_markdown_and_structured():
+    markdown = (
+        "# Title\n\nintro\n\n## Install\n\npip install\n\n## Usage\n\nrun it"
+    )
+    chunks = split_text(markdown, "README.md", chunk_size=30, chunk_overlap=0)
+    assert [chunk.splitlines()[0] for chunk in chunks] == [
+        "# Title",
+        "## Install",
+        "## Usage",
+    ]
+
+    yaml = "server:\n  host: localhost\n  port: 80\nclient:\n  retries: 3\n"
+    chunks = split_text(yaml, "config.yaml", chunk_size=40, chunk_overlap=0)
+    assert chunks == [
+        "server:\n  host: localhost\n  port: 80",
+        "client:\n  retries: 3",
+    ]
+
+
+def test_content_hash():
+    assert content_hash("def a(): pass\n") == content_hash("def a(): pass")
+    assert content_hash("def a(): pass") != content_hash("def b(): pass")
+
+
+def test_sniff():
+    assert sniff(b"def main():\n    pass\n") is None
+    assert sniff(b"\x89PNG\r\n\x1a\n\x00\x00") == "binary"
+    assert sniff(b"\xff\xfe\xfd" * 100) == "binary"
+    # prefix 끝에서 잘린 multibyte 문자는 텍스트로 판단합니다.
+    assert sniff("가나다".encode()[:-1]) is None
+    assert sniff(b"var a=1;" * 1000) == "minified"
+
+
+def test_iter_windows():
+    sections = [f"## Section {i}\n\n    body {i}\n" * 3 for i in range(50)]
+    content = "".join(sections)
+    windows = list(iter_windows(io.StringIO(content), 100))
+
+    # 모든 window는 들여쓰기 없는 줄에서 시작하고, 합치면 원본과 같습니다.
+    assert len(windows) > 1
+    assert "".join(windows) == content
+    assert all(window.startswith("## Section") for window in windows)
+    assert max(map(len, windows)) < 200
+
+    # 들여쓰기 없는 줄이 없어도 window는 크기의 두 배를 넘지 않습니다.
+    content = "    indented line\n" * 100
+    windows = list(iter_windows(io.StringIO(content), 100))
+    assert "".join(windows) == content
+    assert max(map(len, windows)) < 200
+
+
+def test_split_file_matches_split_text():
+    # window 하나에 들어가는 파일은 split_text와 같은 결과를 냅니다.
+    chunks = split_file(io.StringIO(PYTHON_SOURCE), "module.py", 4096)
+    assert list(chunks) == split_text(PYTHON_SOURCE, "module.py")
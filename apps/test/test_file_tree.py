@@ -0,0 +1,46 @@
+from apps.file_tree import render_file_tree
+from apps.git import GitRepository
+from apps.utils import is_included_file
+
+
+def test_render_file_tree():
+    paths = ["README.md", "src/main.py", "src/utils/io.py"]
+    tree = render_file_tree(paths)
+    assert tree.splitlines()[0] == "/"
+    assert "├── src/" in tree
+    assert "│   ├── utils/" in tree
+    assert "└── README.md" in tree
+
+
+def test_render_file_tree_collapses_wide_directories():
+    paths = [f"gen/file{i}.py" for i in range(500)] + ["main.py"]
+    unbounded = render_file_tree(paths, max_tokens=100_000)
+    assert "more files" not in unbounded
+
+    tree = render_file_tree(paths, max_tokens=200)
+    assert "more files" in tree
+    assert len(tree) < len(unbounded)
+
+
+def test_file_tree_uses_filtered_tracked_files(local_repo: GitRepository):
+    tree = local_repo.get_file_tree()
+    assert "git.py" in tree
+    assert "__pycache__" not in tree
+    assert local_repo.get_file_tree() is tree
+
+
+def test_excluded_dirs_are_relative_to_root():
+    excluded_dirs = ["./.venv/", "./.git/", "./docs/", "./bin/"]
+
+    def included(path: str) -> bool:
+        return is_included_file(path, [".py", ".ts"], excluded_dirs, [])
+
+    # 점으로 시작하는 디렉토리도 제외됩니다.
+    assert not included(".venv/lib/x.py")
+    assert not included("./.git/hooks/pre-commit.py")
+    assert not included("docs/conf.py")
+    # 같은 이름의 하위 디렉토리와 비슷한 이름의 디렉토리는 제외하지 않습니다.
+    assert included("src/git/client.py")
+    assert included("pkg/docs/render.py")
+    assert included("venv_tools/x.py")
+    assert included("src/vs/editor.ts")
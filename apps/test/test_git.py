@@ -2,7 +2,9 @@ import os
 import subprocess
 from datetime import datetime
 
-from apps.git import GitRepository, WikiRepository
+import pytest
+
+from apps.git import GitRepository, LocalRepositoryNotFoundError, WikiRepository
 
 
 def test_clone(repo: GitRepository):
@@ -56,3 +58,64 @@ def test_last_commit_time(wiki_repo: WikiRepository):
     last_commit_time = wiki_repo.get_last_commit_time()
     assert last_commit_time is not None
     assert isinstance(last_commit_time, datetime)
+
+
+def test_state_memoized(repo: GitRepository):
+    repo.download()
+    state = repo.state
+    assert repo.state is state
+    assert repo.branch == state.branch
+    assert repo.commit_hash == state.commit_hash
+
+    # HEAD를 변경하는 명령이 실행되면 스냅샷이 갱신됩니다.
+    repo.checkout(branch=repo.default_branch)
+    assert repo.state is not state
+    assert repo.branch == repo.default_branch
+
+
+def test_local_only_metadata(local_repo: GitRepository):
+    assert local_repo.owner == "local"
+    assert local_repo.repo == "fixture"
+    assert local_repo.default_branch == "main"
+    assert local_repo.metadata.clone_url.endswith("origin.git")
+
+    local_repo.download()
+    assert local_repo.branch == "main"
+
+
+def test_local_only_requires_clone(tmp_path):
+    repo = GitRepository(
+        repository="local/missing",
+        pat=None,
+        repo_dir=str(tmp_path),
+        local_only=True,
+    )
+    with pytest.raises(LocalRepositoryNotFoundError):
+        repo.metadata
+
+
+def test_file_churn(local_repo: GitRepository):
+    churn = local_repo.get_file_churn(filter_exists=True)
+    assert "git.py" in churn
+    assert churn["git.py"].commits == 1
+    assert churn["git.py"].lines_changed > 0
+    assert set(churn) <= local_repo.list_tracked_files()
+
+    hotspots = local_repo.get_hotspot_files(top_n=3)
+    assert len(hotspots) == 3
+    assert hotspots[0].weighted_churn >= hotspots[-1].weighted_churn
+
+
+def test_remote_commit_hash(local_repo: GitRepository):
+    local_repo.download()
+    assert local_repo.get_remote_commit_hash() == local_repo.commit_hash
+    assert local_repo.get_remote_commit_hash("branch-not-exist") is None
+
+
+def test_stream_large_stderr(local_repo: GitRepository):
+    # pipe buffer보다 많은 stderr를 써도 stdout을 끝까지 읽어야 합니다.
+    noisy = (
+        "!f() { head -c 200000 /dev/zero | tr '\\0' e >&2; printf 'a\\0b'; }; f"
+    )
+    records = list(local_repo.stream(["-c", f"alias.noisy={noisy}", "noisy"]))
+    assert records == ["a", "b"]
@@ -0,0 +1,49 @@
+from apps.lexical import BM25Index, tokenize
+
+
+def test_tokenize_identifiers():
+    assert tokenize("getFileChurn(repo)") == [
+        "getfilechurn",
+        "get",
+        "file",
+        "churn",
+        "repo",
+    ]
+    assert tokenize("get_file_churn") == [
+        "get_file_churn",
+        "get",
+        "file",
+        "churn",
+    ]
+
+
+def test_tokenize_unicode():
+    # 한글과 악센트가 있는 단어도 용어가 됩니다.
+    assert tokenize("파일 목록을 가져옵니다") == [
+        "파일",
+        "목록을",
+        "가져옵니다",
+    ]
+    assert tokenize("Café menu") == ["café", "menu"]
+    assert tokenize("load_café") == ["load_café", "load", "café"]
+
+
+def test_bm25_search_delete_and_persist(tmp_path):
+    index = BM25Index()
+    index.add("a_0", "def get_file_churn(since): return churn")
+    index.add("b_0", "def render_file_tree(paths): return tree")
+    index.add("c_0", "class HybridRetriever: fuse rankings")
+
+    assert index.search("get_file_churn", k=1)[0][0] == "a_0"
+    assert index.search("file", k=2)[0][0] in ("a_0", "b_0")
+    assert index.search("missing term") == []
+
+    # 삭제된 문서는 검색되지 않고, 저장 후 불러와도 동일하게 동작합니다.
+    assert index.delete(["a_0", "unknown"]) == 1
+    assert "a_0" not in index
+    path = str(tmp_path / "index.bm25")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert len(loaded) == 2
+    assert [doc_id for doc_id, _ in loaded.search("file tree")] == ["b_0"]
+    assert loaded.search("HybridRetriever")[0][0] == "c_0"
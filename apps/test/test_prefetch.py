@@ -0,0 +1,56 @@
+import pytest
+
+from apps.prefetch import (
+    PrefetchedFile,
+    estimate_savings,
+    fair_shares,
+    fitting_shares,
+    prefetch_files,
+    render_files,
+)
+
+
+def test_fair_shares():
+    # 작은 파일은 그대로 두고, 남은 예산을 큰 파일끼리 나눕니다.
+    assert fair_shares([100, 5000, 3000], 2100) == [100, 1000, 1000]
+    assert fair_shares([100, 200], 1000) == [100, 200]
+    assert fair_shares([], 1000) == []
+
+
+def test_fitting_shares():
+    # 통째로 들어가는 작은 파일 때문에 다른 파일을 제외하지 않습니다.
+    assert fitting_shares([5000, 100, 3000, 50], 24000) == [5000, 100, 3000, 50]
+    assert fitting_shares([5000, 100, 3000, 50], 1000) == [425, 100, 425, 50]
+    # 256 token보다 적게 잘리는 파일이 생기면 순위가 낮은 파일부터 제외합니다.
+    assert fitting_shares([5000, 5000, 5000, 50], 600) == [300, 300]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_files(local_repo):
+    files = await prefetch_files(
+        local_repo,
+        ["./retriever.py", "git.py", "missing.py", "tools", "git.py"],
+        query="GitRepository commit hash",
+        budget=3000,
+    )
+
+    # 디렉토리, 없는 파일, 중복 경로는 제외하고 관련도 순으로 정렬합니다.
+    assert [file.path for file in files] == ["git.py", "retriever.py"]
+    assert sum(file.tokens for file in files) <= 3000
+    assert all(file.truncated for file in files)
+    assert files[0].content.startswith(
+        (local_repo.repo_path / "git.py").read_text()[:100]
+    )
+    assert "use view_file_content to read the rest" in render_files(files)
+
+
+def test_estimate_savings():
+    files = [
+        PrefetchedFile(path="a.py", content="", tokens=1000, lines=250),
+        PrefetchedFile(path="b.py", content="", tokens=100, lines=10),
+    ]
+    savings = estimate_savings(files, prompt_tokens=2000)
+
+    # a.py는 3페이지, b.py는 1페이지를 읽는 호출을 줄입니다.
+    assert savings.steps == 4
+    assert savings.input_tokens == 4 * 2000 + (0 + 333 + 666 + 999)
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from apps.pipeline import Operation, Pipeline, Result
+from apps.profiling import (
+    CpuProfiler,
+    MemoryProfiler,
+    start_profiling,
+    stop_profiling,
+    take_snapshot,
+)
+
+
+class Allocate(Operation[None, list, None]):
+    async def invoke(self, context: None, input: None) -> Result[list]:
+        take_snapshot("before allocation")
+        return Result.success([bytearray(1 << 20) for _ in range(8)])
+
+
+def busy_loop(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_memory_profile(tmp_path):
+    profiler = start_profiling("memory")
+    assert isinstance(profiler, MemoryProfiler)
+    pipeline = Pipeline.with_context(None).register(Allocate())
+    pipeline.observers.append(profiler)
+    result = await pipeline.execute()
+    paths = stop_profiling(profiler, tmp_path)
+    assert len(result.value) == 8
+
+    # operation이 끝날 때와 명시한 지점, 종료 시점에 snapshot을 남깁니다.
+    labels = [snapshot.label for snapshot in profiler.snapshots]
+    assert labels == ["before allocation", "after Allocate", "end"]
+    before, after, _ = profiler.snapshots
+    assert after.current - before.current >= 8 << 20
+    assert "test_profiling.py" in after.growth[0]
+
+    assert {path.name for path in paths} == {
+        "memory_00_before_allocation.folded",
+        "memory_01_after_Allocate.folded",
+        "memory_02_end.folded",
+        "memory_top.txt",
+    }
+    folded = (tmp_path / "memory_01_after_Allocate.folded").read_text()
+    assert "test_profiling.py" in folded.splitlines()[0]
+
+    # 프로파일링이 끝나면 snapshot을 남기지 않습니다.
+    take_snapshot("ignored")
+    assert len(profiler.snapshots) == 3
+
+
+def test_cpu_profile(tmp_path):
+    profiler = CpuProfiler(interval=0.001)
+    profiler.start()
+    busy_loop(0.2)
+    paths = stop_profiling(profiler, tmp_path)
+
+    assert [path.name for path in paths] == ["cpu.folded", "cpu_top.txt"]
+    stack, _, count = (
+        (tmp_path / "cpu.folded").read_text().splitlines()[0].rpartition(" ")
+    )
+    assert stack.startswith("MainThread;")
+    assert "test_profiling.py:busy_loop" in stack
+    assert int(count) > 0
+    assert (
+        "test_profiling.py:busy_loop" in (tmp_path / "cpu_top.txt").read_text()
+    )
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+from apps import wiki_page
+from apps.model import WikiPage, WikiStructure
+from apps.resilience import _latencies, is_retryable, resilient_call
+
+SETTINGS = {
+    "timeout": 0.2,
+    "max_retries": 2,
+    "backoff_base": 0.0,
+    "backoff_max": 0.0,
+    "hedge": False,
+    "hedge_quantile": 0.95,
+    "hedge_min_samples": 5,
+}
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def flaky(errors: list[Exception], result="ok"):
+    """정해진 오류를 차례로 발생시킨 뒤 결과를 반환하는 호출"""
+    calls = []
+
+    async def call():
+        calls.append(time.perf_counter())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return call, calls
+
+
+def test_is_retryable():
+    assert is_retryable(RateLimitError())
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError())
+
+    error = Exception()
+    error.status_code = 503  # type: ignore
+    assert is_retryable(error)
+    error.status_code = 400  # type: ignore
+    assert not is_retryable(error)
+
+
+@pytest.mark.asyncio
+async def test_retry_transient_errors():
+    call, calls = flaky([RateLimitError(), RateLimitError()])
+    assert await resilient_call(call, "retry", settings=SETTINGS) == "ok"
+    assert len(calls) == 3
+
+    # 재시도 횟수를 넘거나 일시적인 오류가 아니면 그대로 발생합니다.
+    call, calls = flaky([RateLimitError()] * 3)
+    with pytest.raises(RateLimitError):
+        await resilient_call(call, "retry", settings=SETTINGS)
+    call, calls = flaky([ValueError()])
+    with pytest.raises(ValueError):
+        await resilient_call(call, "retry", settings=SETTINGS)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout():
+    async def slow():
+        await asyncio.sleep(10)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        await resilient_call(slow, "timeout", settings=SETTINGS)
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_request():
+    _latencies.clear()
+    for _ in range(5):
+        _latencies.record("hedge", 0.01)
+    delays = [1.0, 0.0]
+
+    async def call():
+        # 첫 요청만 느리게 응답합니다.
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    start = time.perf_counter()
+    settings = dict(SETTINGS, timeout=5, hedge=True)
+    assert await resilient_call(call, "hedge", settings=settings) == 0.0
+    assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_generate_pages_keeps_partial_results(monkeypatch):
+    async def create_wiki_page(context, structure, page):
+        if page.path == "/b.md":
+            raise RuntimeError("failed")
+
+    monkeypatch.setattr(wiki_page, "_create_wiki_page", create_wiki_page)
+    structure = WikiStructure(
+        title="Wiki",
+        pages=[
+            WikiPage(path=path, title=path, description="")
+            for path in ("/a.md", "/b.md", "/c.md")
+        ],
+    )
+
+    # 실패한 페이지만 제외하고 나머지 페이지는 유지합니다.
+    result = await wiki_page.GeneratePages.invoke(None, structure)  # type: ignore
+    assert result.status == "success"
+    assert [page.path for page in result.value.pages] == ["/a.md", "/c.md"]
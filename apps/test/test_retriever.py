@@ -1,20 +1,47 @@
 import asyncio
+import gc
 import os
 import shutil
+import subprocess
+from pathlib import Path
 
+import numpy as np
 import pytest
 
-from apps.retriever import get_retriever
-from apps.settings import INDEX_DIR
+from apps import retriever as retriever_module
+from apps.bench.fixture import create_fixture_repo
+from apps.retriever import (
+    DocumentLoader,
+    HybridRetriever,
+    RetrieverCache,
+    VectorStoreManager,
+    get_embeddings,
+    get_retriever,
+    start_index_warmup,
+    wait_for_retriever,
+)
+from apps.settings import CONFIG, INDEX_DIR
+from apps.vector_index import IndexMetadata, create_index, index_nbytes
 
 
 @pytest.fixture
-def clean_index(repo):
+def offline_embeddings(monkeypatch):
+    """
+    네트워크 없이 인덱스를 만들 수 있도록 로컬 임베딩을 사용하는 fixture
+    """
+    monkeypatch.setitem(CONFIG["embedder"], "model", "hashing")
+    get_embeddings.cache_clear()
+    yield
+    get_embeddings.cache_clear()
+
+
+@pytest.fixture
+def clean_index(local_repo):
     """
     테스트 전에 인덱스 디렉토리를 정리하는 fixture
     """
     # 인덱스 디렉토리 정리
-    folder_path = os.path.join(INDEX_DIR, repo.owner, repo.repo)
+    folder_path = os.path.join(INDEX_DIR, local_repo.owner, local_repo.repo)
     shutil.rmtree(folder_path, ignore_errors=True)
 
     yield
@@ -24,13 +51,16 @@ def clean_index(repo):
 
 
 @pytest.mark.asyncio
-async def test_concurrent_retriever_access_no_race_condition(repo, clean_index):
+async def test_concurrent_retriever_access_no_race_condition(
+    local_repo, offline_embeddings, clean_index
+):
     """
     여러 코루틴이 동시에 retriever에 접근할 때 인덱스가 한 번만 생성되는지 테스트
     """
     # 인덱스가 없는 상태에서 여러 코루틴이 동시에 retriever에 접근
     tasks = [
-        asyncio.create_task(get_retriever(git_repo=repo)) for _ in range(5)
+        asyncio.create_task(get_retriever(git_repo=local_repo))
+        for _ in range(5)
     ]
     retrievers = await asyncio.gather(*tasks)
 
@@ -42,3 +72,208 @@ async def test_concurrent_retriever_access_no_race_condition(repo, clean_index):
         )
 
     print("모든 retriever가 같은 인스턴스를 참조하고 있습니다.")
+
+
+def test_retriever_cache_eviction():
+    cache = RetrieverCache(max_entries=2, max_bytes=100)
+    cache.put(("a", "1"), "retriever-a", 10)  # type: ignore
+    cache.put(("b", "1"), "retriever-b", 10)  # type: ignore
+    assert cache.get(("a", "1")) == "retriever-a"
+
+    # 가장 오래 사용되지 않은 항목이 제거됩니다.
+    cache.put(("c", "1"), "retriever-c", 10)  # type: ignore
+    assert cache.get(("b", "1")) is None
+    assert cache.get(("a", "1")) == "retriever-a"
+
+    # 메모리 한도를 넘으면 새 항목만 남깁니다.
+    cache.put(("d", "1"), "retriever-d", 95)  # type: ignore
+    assert cache.get(("a", "1")) is None
+    assert cache.get(("c", "1")) is None
+    assert cache.get(("d", "1")) == "retriever-d"
+
+
+@pytest.mark.asyncio
+async def test_retriever_cache_locks():
+    cache = RetrieverCache(max_entries=2, max_bytes=100)
+    key = ("a", "1")
+    async with cache.lock(key):
+        # 잠금을 기다리는 task는 같은 잠금을 받습니다.
+        waiter = asyncio.create_task(_hold(cache.lock(key)))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert len(cache._locks) == 1
+    await waiter
+
+    # 잠금을 쓰는 task가 없으면 남기지 않습니다.
+    gc.collect()
+    assert len(cache._locks) == 0
+
+
+async def _hold(lock: asyncio.Lock):
+    async with lock:
+        pass
+
+
+@pytest.mark.parametrize(
+    "quantization,reduced_dimensions,reduction",
+    [
+        ("none", None, "truncate"),
+        ("fp16", 16, "truncate"),
+        ("int8", 16, "pca"),
+    ],
+)
+def test_create_index(quantization, reduced_dimensions, reduction):
+    metadata = IndexMetadata.from_config(
+        {
+            "model": "test",
+            "dimensions": 32,
+            "quantization": quantization,
+            "reduced_dimensions": reduced_dimensions,
+            "reduction": reduction,
+        }
+    )
+    index = create_index(metadata)
+    vectors = np.random.default_rng(0).random((64, 32), dtype=np.float32)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+
+    # 검색과 MMR에 필요한 reconstruct는 원래 차원을 반환합니다.
+    assert index.d == 32
+    assert index.reconstruct(0).shape == (32,)
+    assert index.search(vectors[:1], 1)[1][0][0] == 0
+    assert index_nbytes(index) <= 64 * 32 * 4 + 32 * 16 * 4
+
+
+def test_offline_index(local_repo, offline_embeddings, tmp_path):
+    """
+    로컬 임베딩으로 네트워크 없이 인덱스를 만들고 검색하는지 테스트
+    """
+    manager = VectorStoreManager(local_repo, index_dir=str(tmp_path))
+    vector_store, lexical_index = manager.load_or_create()
+    assert vector_store.index.ntotal == len(lexical_index) > 0
+
+    for mode in ("vector", "hybrid", "lexical"):
+        retriever = HybridRetriever(
+            lexical_index=lexical_index,
+            docstore=vector_store.docstore,
+            vector_store=vector_store,
+            mode=mode,
+        )
+        documents = retriever.invoke("get_file_churn half_life_days")
+        files = [str(doc.metadata["file_path"]) for doc in documents]
+        assert "git.py" in files, mode
+
+    # 저장된 인덱스를 다시 불러옵니다.
+    manager = VectorStoreManager(local_repo, index_dir=str(tmp_path))
+    loaded, _ = manager.load_or_create()
+    assert loaded.index.ntotal == vector_store.index.ntotal
+
+
+def test_deduplicated_index(tmp_path, offline_embeddings, monkeypatch):
+    """
+    같은 내용의 chunk는 한 번만 인덱싱되고, 원본이 삭제되면 중복 파일을 다시
+    인덱싱하는지 테스트
+    """
+    monkeypatch.setitem(CONFIG["embedder"], "chunk_size", 80)
+    monkeypatch.setitem(CONFIG["embedder"], "chunk_overlap", 0)
+    shared = "def shared(value):\n    return value * 2 + len(str(value))\n"
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "a.py").write_text(f"{shared}\n\ndef only_a():\n    return 1\n")
+    (source / "b.py").write_text(f"{shared}\n\ndef only_b():\n    return 2\n")
+    git_repo = create_fixture_repo(tmp_path / "repo", source=str(source))
+
+    manager = VectorStoreManager(git_repo, index_dir=str(tmp_path / "index"))
+    vector_store, lexical_index = manager.load_or_create()
+    documents = list(vector_store.docstore._dict.values())  # type: ignore
+    assert vector_store.index.ntotal == len(lexical_index) == 3
+    canonical = next(doc for doc in documents if "shared" in doc.page_content)
+    assert canonical.metadata["duplicates"] == ["b.py"]
+
+    # 원본 파일을 삭제하면 중복 chunk를 가진 b.py를 다시 인덱싱합니다.
+    work = git_repo.repo_path
+    subprocess.run(["git", "-C", str(work), "rm", "-q", "a.py"], check=True)
+    subprocess.run(
+        ["git", "-C", str(work), "-c", "user.name=test"]
+        + ["-c", "user.email=test@test", "commit", "-qm", "delete a.py"],
+        check=True,
+    )
+    git_repo.refresh()
+    vector_store, lexical_index = VectorStoreManager(
+        git_repo, index_dir=str(tmp_path / "index")
+    ).load_or_create()
+    documents = list(vector_store.docstore._dict.values())  # type: ignore
+    assert vector_store.index.ntotal == len(lexical_index) == 2
+    assert {str(doc.metadata["file_path"]) for doc in documents} == {"b.py"}
+    assert any("shared" in doc.page_content for doc in documents)
+
+
+def test_load_large_and_skipped_files(tmp_path, monkeypatch):
+    """
+    큰 문서는 window 단위로 나눠 chunk 수 한도까지 인덱싱하고,
+    binary와 minified 파일은 건너뛰는지 테스트
+    """
+    monkeypatch.setitem(CONFIG["embedder"], "window_size", 4096)
+    monkeypatch.setitem(CONFIG["embedder"], "max_chunks_per_file", 20)
+    sections = [f"## Section {i}\n\n" + "text " * 400 for i in range(100)]
+    (tmp_path / "spec.md").write_text("\n\n".join(sections))
+    (tmp_path / "bundle.min.js").write_text("var a=1;" * 10000)
+    (tmp_path / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n\x00" * 100)
+
+    loader = DocumentLoader()
+    documents = loader.load_documents_from_file(tmp_path, Path("spec.md"))
+    assert len(documents) == 20
+    assert documents[0].page_content.startswith("## Section 0")
+    assert [doc.metadata["chunk"] for doc in documents] == list(range(20))
+
+    for name in ("bundle.min.js", "image.png"):
+        assert loader.load_documents_from_file(tmp_path, Path(name)) == []
+
+
+def test_skip_chunks_over_embedding_limit(tmp_path, monkeypatch):
+    """
+    임베딩 입력 한도를 넘는 chunk는 인덱싱하지 않는지 테스트
+    """
+    monkeypatch.setitem(CONFIG["embedder"], "chunk_overlap", 0)
+    monkeypatch.setattr(retriever_module, "MAX_EMBEDDING_TOKENS", 100)
+    (tmp_path / "notes.md").write_text(
+        "## Short\n\nsmall text\n\n## Long\n\n" + "word " * 600
+    )
+
+    documents = DocumentLoader().load_documents_from_file(
+        tmp_path, Path("notes.md")
+    )
+    assert documents
+    assert all(doc.metadata["token_count"] <= 100 for doc in documents)
+    assert "small text" in documents[0].page_content
+
+
+@pytest.mark.asyncio
+async def test_failed_warmup_falls_back(local_repo, monkeypatch):
+    """
+    인덱스 생성이 실패하면 None을 반환하고, 같은 commit에서 다시 만들지 않는지 테스트
+    """
+    calls = 0
+
+    async def failing_get_retriever(git_repo):
+        nonlocal calls
+        calls += 1
+        raise ConnectionError("embedding API is down")
+
+    monkeypatch.setattr(
+        retriever_module, "get_retriever", failing_get_retriever
+    )
+    monkeypatch.setattr(retriever_module, "_failed_warmups", {})
+    monkeypatch.setattr(
+        retriever_module, "_cache", RetrieverCache(max_entries=1, max_bytes=0)
+    )
+
+    assert await wait_for_retriever(local_repo) is None
+    assert await wait_for_retriever(local_repo) is None
+    assert calls == 1
+
+    # 명시적으로 warm-up을 시작하면 다시 시도합니다.
+    with pytest.raises(ConnectionError):
+        await start_index_warmup(local_repo)
+    assert calls == 2
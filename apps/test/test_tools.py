@@ -1,8 +1,14 @@
 import pytest
+from langchain_core.documents import Document
 
 from apps.git import GitRepository
+from apps.tools import semantic_search_files as semantic_search_files_module
+from apps.tools.code_index_search import code_index_search
 from apps.tools.list_files import list_files
-from apps.tools.semantic_search_files import semantic_search_files
+from apps.tools.semantic_search_files import (
+    lexical_search_files,
+    semantic_search_files,
+)
 from apps.tools.view_file_content import view_file_content
 
 # python -m pytest apps/test/test_tools.py -v
@@ -23,7 +29,54 @@ async def test_semantic_search_files(repo: GitRepository):
     assert len(result.files) > 0
 
 
+@pytest.mark.asyncio
+async def test_semantic_search_previews_from_chunks(
+    local_repo: GitRepository, monkeypatch
+):
+    documents = [
+        Document(
+            page_content="import os\n\ndef get_file_churn(since):\n    ...",
+            metadata={"file_path": "git.py"},
+        ),
+        Document(page_content="churn again", metadata={"file_path": "git.py"}),
+        Document(page_content="churn docs", metadata={"file_path": "a.md"}),
+        Document(page_content="churn more", metadata={"file_path": "b.md"}),
+    ]
+
+    class Retriever:
+        async def ainvoke(self, query):
+            return documents
+
+    async def wait_for_retriever(repo):
+        return Retriever()
+
+    monkeypatch.setattr(
+        semantic_search_files_module, "wait_for_retriever", wait_for_retriever
+    )
+    result = await semantic_search_files("file churn", local_repo, max_files=2)
+    # 파일당 가장 관련도가 높은 chunk 하나만 사용합니다.
+    assert result.files == [
+        ("git.py", "def get_file_churn(since):\n    ..."),
+        ("a.md", "churn docs"),
+    ]
+
+
 def test_view_file_content(repo: GitRepository):
     result = view_file_content(repo, "apps/app.py", page=2)
     print(result.render())
     assert len(result.content) > 0
+
+
+def test_lexical_search_files(local_repo: GitRepository):
+    result = lexical_search_files("infer_local_metadata clone", local_repo)
+    assert result.lexical
+    assert result.files[0][0] == "git.py"
+    assert "still being built" in result.render()
+
+
+@pytest.mark.asyncio
+async def test_local_code_index_search(local_repo: GitRepository):
+    # local-only 모드에서는 GitHub code search 대신 git grep을 사용합니다.
+    result = await code_index_search(local_repo, "infer_local_metadata")
+    assert {item.file_path for item in result.results} == {"git.py"}
+    assert "def infer_local_metadata" in result.render()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import pytest
+
+from apps.tracing import span, start_tracing, stop_tracing, traced, tracing
+
+
+@traced("page", "test")
+async def page(delay: float):
+    with span("llm", "llm"):
+        await asyncio.sleep(delay)
+    with span("tool", "tool"):
+        await asyncio.to_thread(lambda: None)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_spans(local_repo, tmp_path):
+    start_tracing()
+    try:
+        with span("GeneratePages", "operation"):
+            await asyncio.gather(page(0.02), page(0.01), page(0.01))
+        local_repo.exec(["status"], capture_output=True)
+    finally:
+        stop_tracing(tmp_path / "trace.json")
+
+    # tracing이 꺼져 있으면 기록하지 않습니다.
+    with span("ignored", "test"):
+        pass
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    assert "ignored" not in {event["name"] for event in spans}
+
+    # 동시에 실행된 페이지는 서로 다른 트랙에 기록합니다.
+    pages = [event for event in spans if event["name"] == "page"]
+    assert len({event["tid"] for event in pages}) == 3
+    # 하위 span은 부모와 같은 트랙에서 부모 구간 안에 기록합니다.
+    for parent in pages:
+        children = [
+            event
+            for event in spans
+            if event["cat"] in ("llm", "tool") and event["tid"] == parent["tid"]
+        ]
+        assert len(children) >= 2
+        for child in children:
+            assert parent["ts"] <= child["ts"]
+            assert child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+
+    git = [event for event in spans if event["cat"] == "git"]
+    assert "git status" in [event["name"] for event in git]
+
+
+def test_span_args(tmp_path):
+    # tool 인자의 이름이 span의 parameter와 겹쳐도 그대로 기록합니다.
+    start_tracing()
+    try:
+        with span("search", "tool", {"name": "main", "category": "class"}):
+            pass
+    finally:
+        stop_tracing(tmp_path / "trace.json")
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    (search,) = [event for event in events if event["name"] == "search"]
+    assert search["cat"] == "tool"
+    assert search["args"] == {"name": "main", "category": "class"}
+
+
+@pytest.mark.asyncio
+async def test_tracing_concurrent_runs(tmp_path):
+    # 동시에 실행된 run의 span은 하나의 tracer에 모두 기록합니다.
+    path = tmp_path / "trace.json"
+
+    async def run(delay: float):
+        with span("run", "operation"):
+            await asyncio.sleep(delay)
+            with span("after", "operation"):
+                pass
+
+    with tracing(str(path)):
+        await asyncio.gather(run(0.01), run(0.03))
+    with tracing(None), span("ignored", "test"):
+        pass
+
+    events = json.loads(path.read_text())["traceEvents"]
+    names = [event["name"] for event in events if event["ph"] == "X"]
+    assert sorted(names) == ["after", "after", "run", "run"]
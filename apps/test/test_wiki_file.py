@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+import pytest
+
+from apps import wiki_file
+from apps.context import Context
+from apps.git import GitRepository
+from apps.model import WikiConfiguration
+from apps.wiki_file import CheckFreshness, SkippedOperationError
+
+
+@pytest.fixture
+def local_context(local_repo: GitRepository, tmp_path, monkeypatch) -> Context:
+    monkeypatch.setattr(wiki_file, "INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(wiki_file, "IS_TEST", False)
+    local_repo.download()
+    return Context(
+        git_repo=local_repo,
+        config=WikiConfiguration(skip=timedelta(0)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_check_freshness_skips_unchanged_source(local_context: Context):
+    result = await CheckFreshness.invoke(local_context, input="main")
+    assert result.status == "success"
+    assert result.value == "main"
+
+    wiki_file.write_wiki_state(local_context.git_repo)
+
+    result = await CheckFreshness.invoke(local_context, input="main")
+    assert result.status == "failure"
+    assert isinstance(result.error, SkippedOperationError)
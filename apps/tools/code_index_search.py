@@ -1,3 +1,4 @@
+import asyncio
 from typing import List
 
 import httpx
@@ -10,6 +11,10 @@ from apps.tools.common import Observation
 from apps.utils import make_sync
 
 INDEX_SEARCH_ENDPOINT = "https://api.github.com/search/code"
+# GitHub code search처럼 파일마다 돌려줄 코드 조각의 수와 앞뒤 줄 수입니다.
+MAX_RESULTS = 10
+MAX_FRAGMENTS = 3
+FRAGMENT_CONTEXT = 2
 
 
 class GHSearchResult(BaseModel):
@@ -39,6 +44,8 @@ class SearchSymbolObservation(Observation):
 async def code_index_search(
     repo: GitRepository, symbol: str
 ) -> SearchSymbolObservation:
+    if repo.local_only:
+        return await asyncio.to_thread(local_code_index_search, repo, symbol)
     query = "{symbol}+in:file+repo:{owner}/{repo}".format(
         symbol=symbol, owner=repo.owner, repo=repo.repo
     )
@@ -68,6 +75,42 @@ async def code_index_search(
     return SearchSymbolObservation(results=results)
 
 
+def local_code_index_search(
+    repo: GitRepository, symbol: str
+) -> SearchSymbolObservation:
+    """
+    Searches the local clone with `git grep` in place of GitHub's code search
+    API, which local-only mode must not call.
+
+    Args:
+        repo (GitRepository): Repository to search in
+        symbol (str): Symbol to search for, case-insensitively
+
+    Returns:
+        SearchSymbolObservation: Files scored by the number of matching lines
+    """
+    results = []
+    for file_path, count in repo.grep_files([symbol])[:MAX_RESULTS]:
+        try:
+            lines = (repo.repo_path / file_path).read_text().splitlines()
+        except (OSError, UnicodeDecodeError):
+            continue
+        fragments = []
+        for i, line in enumerate(lines):
+            if symbol.lower() not in line.lower():
+                continue
+            start = max(0, i - FRAGMENT_CONTEXT)
+            fragments.append("\n".join(lines[start : i + FRAGMENT_CONTEXT + 1]))
+            if len(fragments) >= MAX_FRAGMENTS:
+                break
+        results.append(
+            GHSearchResult(
+                file_path=file_path, score=float(count), fragments=fragments
+            )
+        )
+    return SearchSymbolObservation(results=results)
+
+
 class CodeIndexSearchTool(BaseTool):
     name: str = "code_index_search"
     description: str = """
@@ -1,68 +1,147 @@
-import os
+import asyncio
+import re
 from pathlib import Path
 from typing import List, Tuple
 
 from langchain_core.tools import BaseTool
 
 from apps.git import GitRepository
-from apps.retriever import get_retriever
-from apps.settings import Logger
+from apps.retriever import wait_for_retriever
+from apps.settings import CONFIG, Logger
 from apps.tools.common import Observation, TextSplitCriteria, read_file_content
-from apps.utils import make_sync
+from apps.utils import is_included_file, make_sync
 
 
 class SemanticSearchFileObservation(Observation):
     files: List[Tuple[str, str]] = []
+    lexical: bool = False
 
     def render(self) -> str:
         lines = [f"Found {len(self.files)} related files:\n\n"]
+        if self.lexical:
+            lines.insert(
+                0,
+                "The semantic index is still being built. "
+                "Showing files that contain the query terms instead.",
+            )
         for file_path, content in self.files:
             lines.append(f"[{file_path}]")
             lines.append(f"Preview: {content}\n")
         return "\n".join(lines)
 
 
+PREVIEW_LENGTH = 160
+
+
+def _query_terms(query: str) -> list[str]:
+    return list(dict.fromkeys(re.findall(r"\w{3,}", query)))
+
+
+def _preview(text: str, query: str, length: int = PREVIEW_LENGTH) -> str:
+    """
+    Returns `length` characters of a chunk, starting at the first line that
+    mentions a query term.
+    """
+    lowered = text.lower()
+    positions = [
+        position
+        for term in _query_terms(query.lower())
+        if (position := lowered.find(term)) >= 0
+    ]
+    start = lowered.rfind("\n", 0, min(positions)) + 1 if positions else 0
+    return text[start : start + length].strip()
+
+
 async def semantic_search_files(
     query: str,
     repo: GitRepository,
+    max_files: int | None = None,
 ) -> SemanticSearchFileObservation:
     """
     Asynchronously search for relevant files using semantic search with the given query.
 
+    Results are grouped by file. Retrieved chunks are ranked by relevance, so
+    the first chunk of each file is used as its preview without reading the
+    file from disk.
+
     Args:
         query (str): The natural language query to search with
         repo (GitRepository): Repository to search in
+        max_files (int | None): Maximum number of distinct files to return
 
     Returns:
         SemanticSearchFileObservation: Search results with file paths and content previews
     """
     result = SemanticSearchFileObservation()
+    max_files = max_files or CONFIG["retriever"]["max_files"]
 
-    preview_length = 160
-    retriever = await get_retriever(repo)
+    retriever = await wait_for_retriever(repo)
+    if retriever is None:
+        return await asyncio.to_thread(
+            lexical_search_files, query, repo, max_files
+        )
     documents = await retriever.ainvoke(query)
 
-    if not documents:
-        return result
+    seen = set()
+    for doc in documents:
+        file_path = str(doc.metadata["file_path"])
+        if file_path in seen:
+            continue
+        preview = _preview(doc.page_content, query)
+        if not preview:
+            continue
+        seen.add(file_path)
+        result.files.append((file_path, preview))
+        if len(result.files) >= max_files:
+            break
+
+    return result
 
-    file_paths = [doc.metadata["file_path"] for doc in documents]
 
-    for file_path in file_paths:
-        path = Path(repo.repo_path) / file_path
+def lexical_search_files(
+    query: str,
+    repo: GitRepository,
+    limit: int | None = None,
+) -> SemanticSearchFileObservation:
+    """
+    Search files containing the words of the query with `git grep`.
+    Used while the semantic index is not ready yet.
+
+    Args:
+        query (str): The query to search with
+        repo (GitRepository): Repository to search in
+        limit (int | None): Maximum number of files to return
 
+    Returns:
+        SemanticSearchFileObservation: Files ordered by the number of matching lines
+    """
+    result = SemanticSearchFileObservation(lexical=True)
+    limit = limit or CONFIG["retriever"]["max_files"]
+
+    terms = _query_terms(query)[:8]
+
+    file_filters = CONFIG["file_filters"]
+    extensions = (
+        file_filters["code_extensions"] + file_filters["doc_extensions"]
+    )
+    for file_path, _ in repo.grep_files(terms):
+        if not is_included_file(
+            file_path,
+            extensions,
+            file_filters["excluded_dirs"],
+            file_filters["excluded_files"],
+        ):
+            continue
         content = read_file_content(
-            path,
+            Path(repo.repo_path) / file_path,
             ignore_errors=True,
             split_criteria=TextSplitCriteria.LENGTH,
-            split_size=preview_length,
+            split_size=PREVIEW_LENGTH,
         )
-
-        if not content:
-            continue
-
-        # If file was read successfully, add it to the result list
-        rel_path = os.path.relpath(path, repo.repo_path)
-        result.files.append((rel_path, content))
+        if content:
+            result.files.append((file_path, content))
+        if len(result.files) >= limit:
+            break
 
     return result
 
@@ -87,4 +166,4 @@ class SemanticSearchFilesTool(BaseTool):
             Logger.error(
                 f"Error during semantic search: {str(e)}", exc_info=True
             )
-            return f"Error occurred during semantic search."
+            return "Error occurred during semantic search."
@@ -0,0 +1,194 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+from msgspec import Struct
+
+F = TypeVar("F", bound=Callable)
+
+
+class Span(Struct, eq=False):
+    name: str
+    category: str
+    start: int
+    track: int
+    args: dict[str, Any]
+    parent: "Span | None" = None
+
+
+class Tracer:
+    """
+    Records spans as Chrome trace events, which Perfetto and chrome://tracing
+    can open.
+
+    A span runs on the track of its parent unless a sibling is already open
+    there, in which case it moves to the first free track. Concurrent work
+    therefore shows up as parallel rows, and the number of busy rows is the
+    concurrency at that time.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter_ns()
+        self._events: list[dict[str, Any]] = []
+        # 트랙마다 열려 있는 span을 바깥쪽부터 담습니다.
+        self._tracks: list[list[Span]] = []
+        self._lock = threading.Lock()
+
+    def _now(self) -> int:
+        return time.perf_counter_ns() - self._origin
+
+    def start(
+        self,
+        name: str,
+        category: str,
+        args: dict[str, Any],
+        parent: Span | None,
+    ) -> Span:
+        with self._lock:
+            track = parent.track if parent is not None else 0
+            if track >= len(self._tracks):
+                self._tracks.append([])
+            opened = self._tracks[track]
+            if (opened[-1] if opened else None) is not parent:
+                track = next(
+                    (i for i, spans in enumerate(self._tracks) if not spans),
+                    len(self._tracks),
+                )
+                if track == len(self._tracks):
+                    self._tracks.append([])
+            span = Span(name, category, self._now(), track, args, parent)
+            self._tracks[track].append(span)
+            return span
+
+    def end(self, span: Span):
+        end = self._now()
+        with self._lock:
+            opened = self._tracks[span.track]
+            if span in opened:
+                opened.remove(span)
+            self._events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": span.start / 1000,
+                    "dur": (end - span.start) / 1000,
+                    "pid": os.getpid(),
+                    "tid": span.track,
+                    "args": span.args,
+                }
+            )
+
+    def write(self, path: Path):
+        with self._lock:
+            events = list(self._events)
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": "open-deepwiki"},
+            }
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(
+                {"traceEvents": events, "displayTimeUnit": "ms"}, default=str
+            )
+        )
+
+
+_tracer: Tracer | None = None
+_current: ContextVar[Span | None] = ContextVar("span", default=None)
+
+
+def start_tracing() -> Tracer:
+    """Starts recording spans for the whole process."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing(path: Path | None = None) -> Tracer | None:
+    """Stops recording spans and writes them to `path` if given."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None and path is not None:
+        tracer.write(path)
+    return tracer
+
+
+@contextmanager
+def tracing(path: str | None) -> Iterator[None]:
+    """
+    Records the spans of the block into a Chrome trace at `path`, or does
+    nothing if `path` is empty. The tracer is shared by the whole process,
+    so an entry point starts it once around all of its runs.
+    """
+    if not path:
+        yield
+        return
+    start_tracing()
+    try:
+        yield
+    finally:
+        stop_tracing(Path(path))
+
+
+@contextmanager
+def span(
+    name: str, category: str, args: dict[str, Any] | None = None
+) -> Iterator[None]:
+    """
+    Records the block as a span. Does nothing unless tracing is started.
+
+    Args:
+        name (str): Name shown in the trace viewer
+        category (str): Kind of work, e.g. "operation", "llm" or "git"
+        args (dict[str, Any] | None): Details shown when the span is
+            selected
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield
+        return
+    parent = _current.get()
+    current = tracer.start(name, category, args or {}, parent)
+    _current.set(current)
+    try:
+        yield
+    finally:
+        # generator 안의 span은 다른 context에서 닫힐 수 있어 token 대신
+        # 부모 span을 다시 설정합니다.
+        _current.set(parent)
+        tracer.end(current)
+
+
+def traced(name: str, category: str) -> Callable[[F], F]:
+    """Records every call of the decorated function as a span."""
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, category):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
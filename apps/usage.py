@@ -0,0 +1,28 @@
+from langchain_core.language_models import BaseChatModel
+from msgspec import Struct
+
+
+class StreamStats(Struct):
+    """Output rate of a streamed answer."""
+
+    # 답변을 작성한 호출이 시작된 뒤 첫 토큰까지 걸린 시간(초)입니다.
+    ttft: float | None
+    tokens: int
+    seconds: float
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        return self.tokens / self.seconds if self.seconds > 0 else None
+
+    def render(self) -> str:
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "-"
+        rate = self.tokens_per_second
+        return f"TTFT {ttft}, {self.tokens} tokens" + (
+            f" at {rate:.1f} tokens/s" if rate else ""
+        )
+
+
+def model_name(model: BaseChatModel) -> str:
+    """Returns the name a chat model client was created with."""
+    name = getattr(model, "model_name", None) or getattr(model, "model", None)
+    return str(name or model.get_name())
@@ -1,9 +1,11 @@
 import asyncio
+import fnmatch
 import glob
 import os
 import shutil
 from datetime import timedelta
 from decimal import Decimal
+from functools import cache
 from pathlib import Path
 from typing import Awaitable, Callable, ParamSpec, TypeVar
 
@@ -12,10 +14,34 @@ import tiktoken
 from apps.settings import CONFIG, Logger
 
 
+@cache
+def get_encoding() -> tiktoken.Encoding:
+    """Returns the tokenizer shared by the whole process."""
+    return tiktoken.encoding_for_model(CONFIG["tokenizer"]["model"])
+
+
+def get_model_config(section: str, model: str | None = None) -> dict:
+    """
+    Returns the model settings of a generation step in CONFIG.
+
+    CONFIG is shared by every repository in the process, so the settings are
+    copied before the model is replaced by the per-wiki `model` override.
+
+    Args:
+        section (str): CONFIG section, e.g. "page_generation"
+        model (str | None): "provider/model" configured for the wiki
+
+    Returns:
+        dict: Settings of the section with the model to use
+    """
+    config = dict(CONFIG[section])
+    config["model"] = model or config["model"]
+    return config
+
+
 def count_tokens(text: str) -> int:
     try:
-        encoding = tiktoken.encoding_for_model(CONFIG["tokenizer"]["model"])
-        return len(encoding.encode(text))
+        return len(get_encoding().encode(text, disallowed_special=()))
     except Exception as e:
         Logger.warning(f"Token count error: {e}", exc_info=True)
         # If there's an error in tiktoken,
@@ -29,27 +55,46 @@ def sha1_hash(text: str) -> str:
     return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
 
+def is_included_file(
+    rel_path: str, exts: list[str], excluded_dirs: list, excluded_files: list
+) -> bool:
+    """
+    Checks whether a path relative to the repository root passes the filters.
+
+    Directories in `excluded_dirs` (e.g. "./node_modules/") are relative to
+    the repository root, so a nested directory with the same name is kept.
+    `excluded_files` are matched as glob patterns.
+    """
+    rel_path = rel_path.strip("/").removeprefix("./")
+    *dirs, name = rel_path.split("/")
+    _ext = os.path.splitext(name)[1]
+    if _ext != "" and _ext not in exts:
+        return False
+    for excluded in excluded_dirs:
+        excluded = excluded.removeprefix("./").rstrip("/")
+        if rel_path.startswith(f"{excluded}/"):
+            return False
+    return not any(
+        fnmatch.fnmatch(part, excluded)
+        for part in dirs + [name]
+        for excluded in excluded_files
+    )
+
+
 def filter_files(
     path: str, exts: list[str], excluded_dirs: list, excluded_files: list
 ):
     files = glob.glob(f"{path}/**/*", recursive=True)
     for file_path in files:
-        _ext = os.path.splitext(file_path)[1]
-        is_excluded = False
         if os.path.isdir(file_path):
-            is_excluded = True
-        if not is_excluded and _ext != "" and _ext not in exts:
-            is_excluded = True
-        if any(excluded_dir in file_path for excluded_dir in excluded_dirs):
-            is_excluded = True
-        if not is_excluded and any(
-            os.path.basename(file_path) == excluded
-            for excluded in excluded_files
-        ):
-            is_excluded = True
-        if is_excluded:
             continue
-        yield file_path
+        if is_included_file(
+            os.path.relpath(file_path, path),
+            exts,
+            excluded_dirs,
+            excluded_files,
+        ):
+            yield file_path
 
 
 def move_files(src_dir: str, dst_dir: str):
@@ -0,0 +1,116 @@
+import os
+from typing import TYPE_CHECKING, Literal
+
+import msgspec
+from msgspec import Struct
+
+from apps.settings import CONFIG
+
+if TYPE_CHECKING:
+    import faiss
+
+Quantization = Literal["none", "fp16", "int8"]
+Reduction = Literal["truncate", "pca"]
+
+# Vectors collected before training an index that needs it (int8, PCA).
+TRAINING_SIZE = 4096
+
+# faiss takes long to import, so it is loaded when an index is first built.
+_QUANTIZERS = {"fp16": "QT_fp16", "int8": "QT_8bit"}
+
+
+class IndexMetadata(Struct, frozen=True):
+    """
+    How the vectors of an index are stored. An index is rebuilt when the
+    configured settings no longer match the ones it was built with.
+    """
+
+    model: str
+    dimensions: int
+    stored_dimensions: int
+    quantization: Quantization = "none"
+    reduction: Reduction | None = None
+
+    @classmethod
+    def from_config(cls, config: dict | None = None) -> "IndexMetadata":
+        config = config or CONFIG["embedder"]
+        dimensions = config["dimensions"]
+        stored_dimensions = config.get("reduced_dimensions") or dimensions
+        return cls(
+            model=config["model"],
+            dimensions=dimensions,
+            stored_dimensions=min(stored_dimensions, dimensions),
+            quantization=config.get("quantization", "none"),
+            reduction=(
+                config.get("reduction", "truncate")
+                if stored_dimensions < dimensions
+                else None
+            ),
+        )
+
+    @classmethod
+    def read(cls, path: str) -> "IndexMetadata | None":
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return msgspec.json.decode(f.read(), type=cls)
+
+    def write(self, path: str):
+        with open(path, "wb") as f:
+            f.write(msgspec.json.encode(self))
+
+
+def create_index(metadata: IndexMetadata) -> "faiss.Index":
+    """
+    Creates an empty FAISS index for `metadata`.
+
+    Reduced dimensions are applied as a transform in front of the index, so
+    documents and queries are both embedded with the full dimensions. With
+    "truncate" the leading dimensions are kept and renormalized, which suits
+    Matryoshka embeddings such as text-embedding-3. "pca" learns the
+    projection from the first `TRAINING_SIZE` vectors.
+    """
+    import faiss
+
+    d = metadata.stored_dimensions
+    if metadata.quantization == "none":
+        index = faiss.IndexFlatL2(d)
+    else:
+        index = faiss.IndexScalarQuantizer(
+            d,
+            getattr(faiss.ScalarQuantizer, _QUANTIZERS[metadata.quantization]),
+            faiss.METRIC_L2,
+        )
+
+    match metadata.reduction:
+        case None:
+            return index
+        case "pca":
+            return faiss.IndexPreTransform(
+                faiss.PCAMatrix(metadata.dimensions, d), index
+            )
+        case "truncate":
+            transformed = faiss.IndexPreTransform(index)
+            transformed.prepend_transform(faiss.NormalizationTransform(d))
+            transformed.prepend_transform(
+                faiss.RemapDimensionsTransform(metadata.dimensions, d, False)
+            )
+            return transformed
+
+
+def index_nbytes(index: "faiss.Index") -> int:
+    """Estimates the memory held by the vectors of an index."""
+    import faiss
+
+    if isinstance(index, faiss.IndexPreTransform):
+        transforms = [
+            faiss.downcast_VectorTransform(index.chain.at(i))
+            for i in range(index.chain.size())
+        ]
+        matrices = sum(
+            transform.A.size() * 4
+            for transform in transforms
+            if isinstance(transform, faiss.LinearTransform)
+        )
+        return matrices + index_nbytes(faiss.downcast_index(index.index))
+    return index.ntotal * getattr(index, "code_size", index.d * 4)
@@ -1,32 +1,116 @@
+import asyncio
 from datetime import datetime
+from pathlib import Path
+
+import msgspec
 
 from apps.context import Context
+from apps.git import GitRepository
+from apps.model import WikiState
 from apps.pipeline import Operation, Result
-from apps.settings import IS_TEST, Logger
+from apps.retriever import start_index_warmup
+from apps.settings import INDEX_DIR, IS_TEST, Logger
 
 
 class SkippedOperationError(Exception):
     pass
 
 
-class _DownloadOperation(Operation[str, None, Context]):
-    async def invoke(self, context: Context, input: str) -> Result[None]:
+def _wiki_state_path(git_repo: GitRepository) -> Path:
+    return Path(INDEX_DIR) / git_repo.repository / "wiki_state.json"
+
+
+def read_wiki_state(git_repo: GitRepository) -> dict[str, WikiState]:
+    """
+    branch별 마지막 Wiki 생성 정보를 읽습니다.
+
+    Returns:
+        dict[str, WikiState]: branch 이름별 Wiki 생성 정보
+    """
+    path = _wiki_state_path(git_repo)
+    try:
+        return msgspec.json.decode(path.read_bytes(), type=dict[str, WikiState])
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        Logger.warning(f"Failed to read wiki state {path}: {e}")
+        return {}
+
+
+def write_wiki_state(git_repo: GitRepository):
+    """
+    현재 checkout된 commit으로 Wiki를 생성했음을 기록합니다.
+    """
+    states = read_wiki_state(git_repo)
+    states[git_repo.branch] = WikiState(
+        source_commit=git_repo.commit_hash,
+        generated_at=datetime.now(),
+    )
+    path = _wiki_state_path(git_repo)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(msgspec.json.encode(states))
+
+
+class _CheckFreshnessOperation(Operation[str, str, Context]):
+    """
+    clone하기 전에 Wiki 생성을 건너뛸지 판단합니다.
+    원본 branch의 commit이 마지막 생성 이후 변경되지 않았거나,
+    Wiki의 마지막 commit 이후 skip 주기가 지나지 않은 경우 건너뜁니다.
+    """
+
+    name = "CheckFreshness"
+
+    async def invoke(self, context: Context, input: str) -> Result[str]:
+        if IS_TEST:
+            return Result.success(input)
         try:
-            context.git_repo.download(
-                branch=input, ignore_patterns=context.config.ignore_patterns
-            )
-            # 마지막 커밋이후 interval이 지난 경우에만 Wiki를 생성합니다.
-            now = datetime.now()
-            commit_time = context.wiki_repo.get_last_commit_time()
+            await asyncio.to_thread(self.check, context, input)
+            return Result.success(input)
+        except SkippedOperationError as e:
+            Logger.info(str(e))
+            return Result.failure(e)
+        except Exception as e:
+            # 판단할 수 없는 경우 Wiki를 생성합니다.
+            Logger.warning(f"Pre-flight freshness check failed: {e}")
+            return Result.success(input)
 
-            is_up_to_date = (
-                commit_time and now - commit_time < context.config.skip
-            )
+    def check(self, context: Context, branch: str | None):
+        branch = branch or context.git_repo.default_branch
 
-            if is_up_to_date and not IS_TEST:
+        # 1. 마지막 생성 이후 원본 branch가 변경되지 않은 경우
+        state = read_wiki_state(context.git_repo).get(branch)
+        if state:
+            source_commit = context.git_repo.get_remote_commit_hash(branch)
+            if source_commit == state.source_commit:
                 raise SkippedOperationError(
-                    f"Wiki is up to date. Skipping generation. Last commit: {commit_time}"
+                    f"Source is unchanged since the last wiki build "
+                    f"({source_commit}, {state.generated_at}). Skipping generation."
                 )
+
+        # 2. 마지막 커밋이후 interval이 지나지 않은 경우
+        commit_time = context.wiki_repo.fetch_last_commit_time()
+        if commit_time and datetime.now() - commit_time < context.config.skip:
+            raise SkippedOperationError(
+                f"Wiki is up to date. Skipping generation. Last commit: {commit_time}"
+            )
+
+
+CheckFreshness = _CheckFreshnessOperation()
+
+
+class _DownloadOperation(Operation[str, None, Context]):
+    name = "Download"
+
+    async def invoke(self, context: Context, input: str) -> Result[None]:
+        try:
+            # 다른 Repository의 작업이 멈추지 않도록 별도 스레드에서 실행합니다.
+            await asyncio.to_thread(
+                context.git_repo.download,
+                branch=input,
+                ignore_patterns=context.config.ignore_patterns,
+            )
+            # 인덱스는 구조 생성과 동시에 백그라운드에서 준비합니다.
+            start_index_warmup(context.git_repo)
             return Result.success()
         except Exception as e:
             Logger.error(f"Failed to download repository: {e}")
@@ -37,9 +121,12 @@ Download = _DownloadOperation()
 
 
 class _UploadOperation(Operation[str, None, Context]):
+    name = "Upload"
+
     async def invoke(self, context: Context, input: str) -> Result[None]:
         try:
             context.wiki_repo.upload()
+            write_wiki_state(context.git_repo)
             return Result.success()
         except Exception as e:
             return Result.failure(e)
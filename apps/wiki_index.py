@@ -1,13 +1,17 @@
-from directory_tree import DisplayTree
+import os
 
 from apps.agent import complete_chat
 from apps.context import Context
+from apps.file_tree import render_file_tree
 from apps.pipeline import Operation, Result
 from apps.settings import CONFIG
+from apps.utils import get_model_config
 from apps.wiki_page import WikiStructure
 
 
 class _Operation(Operation[WikiStructure, None, Context]):
+    name = "GenerateIndex"
+
     async def invoke(
         self, context: Context, input: WikiStructure
     ) -> Result[None]:
@@ -28,19 +32,16 @@ async def _create_wiki_index(
     context: Context,
     structure: WikiStructure,
 ):
-    filetree = (
-        DisplayTree(
-            dirPath=context.wiki_repo.wiki_path,
-            stringRep=True,
-        )
-        or ""
+    wiki_path = context.wiki_repo.wiki_path
+    filetree = render_file_tree(
+        os.path.relpath(os.path.join(root, file), wiki_path)
+        for root, _, files in os.walk(wiki_path)
+        for file in files
     )
-    filetree = filetree.replace(f"{context.git_repo.repo}/", "/")
 
     prompt = open(CONFIG["index_generation"]["prompt"]).read()
 
-    model_config = CONFIG["index_generation"]
-    model_config["model"] = context.config.model or model_config["model"]
+    model_config = get_model_config("index_generation", context.config.model)
     content = await complete_chat(
         prompt.format(
             repo=context.git_repo.repo,
@@ -1,20 +1,22 @@
 import asyncio
 from typing import Awaitable, Callable, ParamSpec, TypeVar
 
-from cleantext import clean
-
-from apps.agent import complete_chat
+from apps.accounting import page_scope
+from apps.agent import stream_chat
 from apps.context import Context
 from apps.model import WikiPage, WikiStructure
 from apps.pipeline import Operation, Result
+from apps.prefetch import estimate_savings, prefetch_files, render_files
 from apps.settings import IS_TEST, Logger
-from apps.utils import CONFIG, normalize_path
+from apps.utils import CONFIG, count_tokens, get_model_config, normalize_path
 
 P = ParamSpec("P")
 T = TypeVar("T")
 
 
 class _Operation(Operation[WikiStructure, WikiStructure, Context]):
+    name = "GeneratePages"
+
     async def invoke(
         self, context: Context, input: WikiStructure
     ) -> Result[WikiStructure]:
@@ -25,8 +27,9 @@ class _Operation(Operation[WikiStructure, WikiStructure, Context]):
             # 한꺼번에 3개의 페이지를 생성할 수 있도록 제한합니다.
             semaphore = asyncio.Semaphore(3)
 
+            pages = input.pages[:max_pages]
             tasks = []
-            for page in input.pages[:max_pages]:
+            for page in pages:
                 task = asyncio.create_task(
                     limited_parallel(
                         semaphore,
@@ -39,9 +42,27 @@ class _Operation(Operation[WikiStructure, WikiStructure, Context]):
                 tasks.append(task)
 
             Logger.info(f"Generating {len(tasks)} wiki pages...")
-            await asyncio.gather(*tasks)
+            # 한 페이지의 실패가 다른 페이지에 영향을 주지 않도록 합니다.
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            generated, errors = [], []
+            for page, result in zip(pages, results):
+                if isinstance(result, BaseException):
+                    Logger.error(
+                        f"Failed to generate wiki page {page.title}: {result}"
+                    )
+                    errors.append(result)
+                else:
+                    generated.append(page)
+            if not generated and errors:
+                return Result.failure(errors[0])  # type: ignore
+            if errors:
+                Logger.warning(
+                    f"Generated {len(generated)} of {len(pages)} wiki pages."
+                )
 
-            return Result.success(input)
+            # 생성된 페이지만 index에 포함되도록 합니다.
+            return Result.success(input.model_copy(update={"pages": generated}))
         except Exception as e:
             return Result.failure(e)
 
@@ -69,29 +90,43 @@ async def _create_wiki_page(
 
     prompt = open(CONFIG["page_generation"]["prompt"]).read()
 
-    model_config = CONFIG["page_generation"]
-    model_config["model"] = context.config.model or model_config["model"]
-
-    content = await complete_chat(
-        prompt.format(
-            repository=context.git_repo.repository,
-            title=page.title,
-            description=page.description,
-            branch=context.git_repo.branch,
-            path=page.path,
-            relevant_files="\n".join(page.relevant_files),
-            relevant_pages="\n".join(relevant_pages),
-            language=context.config.language,
-        ),
-        repo=context.git_repo,
-        model_config=model_config,
-    )
+    model_config = get_model_config("page_generation", context.config.model)
 
-    file_path = context.wiki_repo.wiki_path / normalize_path(page.path)
-    file_path.parent.mkdir(parents=True, exist_ok=True)
+    # agent가 view_file_content로 읽을 파일을 미리 프롬프트에 넣습니다.
+    files = await prefetch_files(
+        context.git_repo,
+        page.relevant_files,
+        query=f"{page.title} {page.description}",
+        budget=model_config["prefetch_tokens"],
+    )
+    prompt = prompt.format(
+        repository=context.git_repo.repository,
+        title=page.title,
+        description=page.description,
+        branch=context.git_repo.branch,
+        path=page.path,
+        relevant_files="\n".join(page.relevant_files),
+        relevant_pages="\n".join(relevant_pages),
+        relevant_file_contents=render_files(files),
+        language=context.config.language,
+    )
+    file_tokens = sum(file.tokens for file in files)
+    savings = estimate_savings(files, count_tokens(prompt) - file_tokens)
+    Logger.info(
+        f"Prefetched {len(files)} files for {page.title} "
+        f"({file_tokens} tokens), saving ~{savings.steps} agent steps and "
+        f"~{savings.input_tokens} input tokens."
+    )
 
-    with open(file_path, "w") as file:
-        file.write(content)
+    # 답변을 받는 대로 파일에 쓰고, 완료되면 페이지 경로로 옮깁니다.
+    with page_scope(page.path):
+        stats = await stream_chat(
+            prompt,
+            output=context.wiki_repo.wiki_path / normalize_path(page.path),
+            repo=context.git_repo,
+            model_config=model_config,
+        )
+    Logger.info(f"Generated wiki page {page.title}: {stats.render()}")
 
 
 async def limited_parallel(
@@ -105,6 +140,9 @@ async def limited_parallel(
 
 
 def generate_id(text: str) -> str:
+    # cleantext는 import에 오래 걸리므로 처음 사용할 때 불러옵니다.
+    from cleantext import clean
+
     text = text.replace(" ", "-")
     return clean(
         text,
@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 from apps.agent import complete_chat
@@ -5,9 +6,12 @@ from apps.context import Context
 from apps.model import WikiStructure
 from apps.pipeline import Operation, Result
 from apps.settings import CONFIG
+from apps.utils import get_model_config
 
 
 class _Operation(Operation[None, WikiStructure, Context]):
+    name = "GenerateStructure"
+
     async def invoke(
         self, context: Context, input: None = None
     ) -> Result[WikiStructure]:
@@ -24,13 +28,19 @@ GenerateStructure = _Operation()
 async def _create_wiki_structure(
     context: Context,
 ) -> WikiStructure:
-    file_tree = context.git_repo.get_file_tree()
+    file_tree = await asyncio.to_thread(context.git_repo.get_file_tree)
 
-    most_updated_files = context.git_repo.get_most_updated_files(
+    hotspots = await asyncio.to_thread(
+        context.git_repo.get_hotspot_files,
         since="6 months ago",
         top_n=10,
         filter_exists=True,
     )
+    most_updated_files = "\n".join(
+        f"- {item.path}: {item.commits} commits, "
+        f"{item.lines_changed} lines changed"
+        for item in hotspots
+    )
 
     hint_obj = {
         "tutorial": context.config.tutorial,
@@ -42,8 +52,9 @@ async def _create_wiki_structure(
 
     prompt = open(CONFIG["structure_generation"]["prompt"]).read()
 
-    model_config = CONFIG["structure_generation"]
-    model_config["model"] = context.config.model or model_config["model"]
+    model_config = get_model_config(
+        "structure_generation", context.config.model
+    )
 
     return await complete_chat(
         prompt=prompt.format(